@@ -1,72 +1,618 @@
 #!/usr/bin/env python3
-"""Add favicon to all HTML pages in the project"""
+"""Add favicon (and other registered <head> tags) to all HTML pages in the project"""
 
+import argparse
+import difflib
+import hashlib
+import json
 import os
 import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
+from typing import ClassVar
+
+from treewalk import walk_files
 
 # Favicon line to add
 FAVICON_LINE = '    <link rel="icon" type="image/svg+xml" href="/assets/images/favicon.svg">\n'
 
-def add_favicon_to_file(file_path):
+# Default manifest location, relative to the scanned root
+MANIFEST_NAME = '.favicon-manifest.json'
+
+# Result statuses
+ADDED = 'added'
+SKIPPED = 'skipped'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
+# Per-rule outcomes
+RULE_APPLIED = 'applied'
+RULE_PRESENT = 'present'
+RULE_NOT_APPLICABLE = 'n/a'
+RULE_FAILED = 'failed'
+
+HEAD_CLOSE_RE = re.compile(r'</head\s*>', re.IGNORECASE)
+HEAD_CLOSE_BYTES_RE = re.compile(rb'</head\s*>', re.IGNORECASE)
+# One line with its ending: \r\n, \r or \n (the last line may have none)
+LINE_RE = re.compile(r'([^\r\n]*)(\r\n|\r|\n)|([^\r\n]+)\Z')
+
+# Streaming mode: files at least STREAM_ABOVE bytes are rewritten in
+# CHUNK_SIZE pieces; only the <head> (at most MAX_HEAD_BYTES) is held in memory
+STREAM_ABOVE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+MAX_HEAD_BYTES = 1024 * 1024
+
+
+# ---------------------------------------------------------
+# <head> rules
+# ---------------------------------------------------------
+# A rule only sees the <head> section of a page. is_present() is its
+# idempotency check; apply() returns the new head, or None when the rule
+# cannot be applied to this page.
+
+def _insert_before_head_close(head, line):
+    match = HEAD_CLOSE_RE.search(head)
+    if not match:
+        return None
+    return head[:match.start()] + line + head[match.start():]
+
+
+def _find_tags(head, tag):
+    return re.findall(rf'<{tag}\b[^>]*>', head, re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class FaviconRule:
+    """Insert FAVICON_LINE right after </title>"""
+    name: ClassVar[str] = 'favicon'
+    line: str = FAVICON_LINE
+
+    def is_present(self, head):
+        return 'favicon.svg' in head or 'rel="icon"' in head
+
+    def apply(self, head):
+        # Pattern: match </title> and add favicon on the next line
+        match = re.search(r'(<title>.*?</title>)\n', head, re.IGNORECASE | re.DOTALL)
+        if not match:
+            return None
+        return head[:match.end()] + self.line + head[match.end():]
+
+
+@dataclass(frozen=True)
+class MetaRule:
+    """Add <meta name=... content=...> unless a meta with that name exists"""
+    name: ClassVar[str] = 'meta'
+    meta_name: str
+    content: str
+
+    def is_present(self, head):
+        attr = f'name="{self.meta_name}"'
+        return any(attr in tag for tag in _find_tags(head, 'meta'))
+
+    def apply(self, head):
+        return _insert_before_head_close(
+            head, f'    <meta name="{self.meta_name}" content="{self.content}">\n')
+
+
+@dataclass(frozen=True)
+class LinkHintRule:
+    """Add a resource hint such as <link rel="preconnect"> or rel="preload" """
+    name: ClassVar[str] = 'link'
+    rel: str
+    href: str
+    as_: str = ''
+    crossorigin: bool = False
+
+    def is_present(self, head):
+        rel_attr, href_attr = f'rel="{self.rel}"', f'href="{self.href}"'
+        return any(rel_attr in tag and href_attr in tag for tag in _find_tags(head, 'link'))
+
+    def apply(self, head):
+        attrs = f'rel="{self.rel}" href="{self.href}"'
+        if self.as_:
+            attrs += f' as="{self.as_}"'
+        if self.crossorigin:
+            attrs += ' crossorigin'
+        return _insert_before_head_close(head, f'    <link {attrs}>\n')
+
+
+@dataclass(frozen=True)
+class DeferScriptRule:
+    """Add defer to external <script> tags whose src contains src_contains"""
+    name: ClassVar[str] = 'defer'
+    src_contains: str
+
+    def _targets(self, head):
+        return [tag for tag in _find_tags(head, 'script')
+                if 'src=' in tag and self.src_contains in tag]
+
+    def is_present(self, head):
+        targets = self._targets(head)
+        return bool(targets) and all(re.search(r'\s(defer|async)\b', tag) for tag in targets)
+
+    def apply(self, head):
+        targets = self._targets(head)
+        if not targets:
+            return None
+        for tag in targets:
+            if not re.search(r'\s(defer|async)\b', tag):
+                head = head.replace(tag, tag[:-1].rstrip('/ ') + ' defer>', 1)
+        return head
+
+
+def rule_label(rule):
+    """Label used in reports, e.g. 'meta:description'"""
+    detail = {
+        MetaRule: lambda r: r.meta_name,
+        LinkHintRule: lambda r: f"{r.rel} {r.href}",
+        DeferScriptRule: lambda r: r.src_contains,
+    }.get(type(rule))
+    return f"{rule.name}:{detail(rule)}" if detail else rule.name
+
+
+# Rule types accepted in a --rules JSON file, keyed by "type"
+RULE_TYPES = {
+    'favicon': FaviconRule,
+    'meta': MetaRule,
+    'link': LinkHintRule,
+    'defer': DeferScriptRule,
+}
+
+# Rules applied by main(); extend with register_rule() or --rules
+HEAD_RULES = [FaviconRule()]
+
+
+def register_rule(rule):
+    """Add a rule to the default pipeline"""
+    HEAD_RULES.append(rule)
+
+
+def load_rules(rules_path):
+    """Build rules from a JSON list like [{"type": "meta", "meta_name": ..., "content": ...}]"""
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+    rules = []
+    for spec in specs:
+        spec = dict(spec)
+        rule_type = spec.pop('type')
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unknown rule type '{rule_type}' in {rules_path}")
+        rules.append(RULE_TYPES[rule_type](**spec))
+    return rules
+
+
+def pipeline_version(rules):
+    """Hash of the rule set; changing any rule invalidates the manifest"""
+    signature = '\n'.join(repr(rule) for rule in rules)
+    return hashlib.sha256(signature.encode('utf-8')).hexdigest()[:16]
+
+
+# ---------------------------------------------------------
+# Per-file processing
+# ---------------------------------------------------------
+
+@dataclass
+class FaviconResult:
+    """Outcome of processing one HTML file"""
+    path: str
+    status: str
+    bytes_processed: int = 0
+    message: str = ''
+    mtime_ns: int = 0
+    size: int = 0
+    sha256: str = ''
+    rules: dict = field(default_factory=dict)
+
+    def __bool__(self):
+        # Keep the old True/False contract: truthy only when the file was changed
+        return self.status == ADDED
+
+
+def _normalize_newlines(text):
+    """Universal newlines, as text-mode open() reads them: rules only see \\n"""
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _restore_newlines(original, new_head):
+    """new_head (rules' \\n output for original) with the page's line endings
+
+    Existing lines, edited or not, keep their own ending, whatever it was;
+    only inserted lines take the page's most common ending. Mixed endings
+    therefore survive a rewrite.
+    """
+    if '\r' not in original:
+        return new_head
+    old_lines = [(m.group(1) if m.group(2) else m.group(3), m.group(2) or '')
+                 for m in LINE_RE.finditer(original)]
+    eol = Counter(ending for _, ending in old_lines if ending).most_common(1)[0][0]
+    new_texts = new_head.split('\n')
+    last = len(new_texts) - 1  # the part after the last \\n has no ending
+    old_texts = [text for text, _ in old_lines]
+
+    out = []
+    matcher = difflib.SequenceMatcher(None, old_texts, new_texts, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        i = i1
+        for j in range(j1, j2):
+            ending = eol
+            if op == 'equal':
+                ending = old_lines[i][1] or eol
+                i += 1
+            elif op == 'replace':
+                # An edited line (say, defer added) still looks like its old self
+                for k in range(i, i2):
+                    if difflib.SequenceMatcher(None, old_texts[k], new_texts[j]).ratio() >= 0.6:
+                        ending = old_lines[k][1] or eol
+                        i = k + 1
+                        break
+            out.append(new_texts[j] + ('' if j == last else ending))
+    return ''.join(out)
+
+
+def _replace_file(file_path, data):
+    """Atomically replace file_path with data (bytes), keeping its mode"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)),
+                                    prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as dst:
+            dst.write(data)
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def split_head(content):
+    """Split a page into (head, rest); head ends right after </head>
+
+    Pages without </head> are treated as all head.
+    """
+    match = HEAD_CLOSE_RE.search(content)
+    if not match:
+        return content, ''
+    return content[:match.end()], content[match.end():]
+
+
+def apply_rules(head, rules):
+    """Run every rule over head; return (new head, {label: outcome})"""
+    outcomes = {}
+    for rule in rules:
+        label = rule_label(rule)
+        if rule.is_present(head):
+            outcomes[label] = RULE_PRESENT
+            continue
+        new_head = rule.apply(head)
+        if new_head is None:
+            outcomes[label] = RULE_NOT_APPLICABLE if isinstance(rule, DeferScriptRule) else RULE_FAILED
+        else:
+            head = new_head
+            outcomes[label] = RULE_APPLIED
+    return head, outcomes
+
+
+def _result_for_unwritten(path, size, st, digest, known_hash, outcomes):
+    """Result for a file no rule changed"""
+    failed = [label for label, outcome in outcomes.items() if outcome == RULE_FAILED]
+    if failed:
+        return FaviconResult(path, FAILED, size, f"could not apply {', '.join(failed)}",
+                             rules=outcomes)
+    if digest == known_hash:
+        return FaviconResult(path, UNCHANGED, size, 'content unchanged',
+                             st.st_mtime_ns, st.st_size, digest, outcomes)
+    return FaviconResult(path, SKIPPED, size, 'all rules already present',
+                         st.st_mtime_ns, st.st_size, digest, outcomes)
+
+
+def _copy_chunks(src, dst, hasher, chunk_size):
+    for chunk in iter(partial(src.read, chunk_size), b''):
+        hasher.update(chunk)
+        if dst is not None:
+            dst.write(chunk)
+
+
+def stream_head_rules(file_path, known_hash=None, rules=None,
+                      chunk_size=CHUNK_SIZE, max_head=MAX_HEAD_BYTES):
+    """Streaming variant of apply_head_rules for very large pages
+
+    Reads until </head>, applies the rules to that head only, then copies
+    the body byte-for-byte into a temp file that atomically replaces the
+    original. Peak memory is bounded by max_head + chunk_size.
+    """
+    path = str(file_path)
+    if rules is None:
+        rules = HEAD_RULES
+    tmp_path = None
+    try:
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as src:
+            st = os.fstat(src.fileno())
+            buf = b''
+            match = None
+            for chunk in iter(partial(src.read, chunk_size), b''):
+                hasher.update(chunk)
+                # Only rescan the tail where a split </head> could start
+                search_from = max(0, len(buf) - 64)
+                buf += chunk
+                match = HEAD_CLOSE_BYTES_RE.search(buf, search_from)
+                if match:
+                    break
+                if len(buf) > max_head:
+                    return FaviconResult(path, FAILED, len(buf),
+                                         f"no </head> in the first {max_head} bytes")
+
+            if match:
+                head_bytes, rest = buf[:match.end()], buf[match.end():]
+            else:
+                head_bytes, rest = buf, b''
+            del buf
+
+            # Rules work on '\n'; keep the page's own line endings on write
+            original = head_bytes.decode('utf-8')
+            head = _normalize_newlines(original)
+            new_head, outcomes = apply_rules(head, rules)
+
+            if new_head == head:
+                # Finish the hash for the manifest without keeping the body
+                _copy_chunks(src, None, hasher, chunk_size)
+                return _result_for_unwritten(path, st.st_size, st, hasher.hexdigest(),
+                                             known_hash, outcomes)
+
+            new_head = _restore_newlines(original, new_head)
+            out_hasher = hashlib.sha256()
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)),
+                                            prefix='.', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as dst:
+                for piece in (new_head.encode('utf-8'), rest):
+                    out_hasher.update(piece)
+                    dst.write(piece)
+                del rest
+                _copy_chunks(src, dst, out_hasher, chunk_size)
+
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+        tmp_path = None
+
+        new_st = os.stat(file_path)
+        applied = [label for label, outcome in outcomes.items() if outcome == RULE_APPLIED]
+        return FaviconResult(path, ADDED, st.st_size, ', '.join(applied),
+                             new_st.st_mtime_ns, new_st.st_size, out_hasher.hexdigest(), outcomes)
+    except Exception as e:
+        return FaviconResult(path, FAILED, 0, str(e))
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def apply_head_rules(file_path, known_hash=None, rules=None, stream_above=STREAM_ABOVE):
+    """Apply rules (default HEAD_RULES) to one file with one read and at most one write
+
+    known_hash is the content hash recorded in the manifest; when the file
+    still hashes to it, the scan is skipped even if its mtime moved. Files
+    of stream_above bytes or more go through stream_head_rules() instead.
+    """
+    path = str(file_path)
+    if rules is None:
+        rules = HEAD_RULES
+    try:
+        if stream_above is not None and os.path.getsize(file_path) >= stream_above:
+            return stream_head_rules(file_path, known_hash, rules)
+
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+            st = os.fstat(f.fileno())
+        size = len(raw)
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if digest == known_hash:
+            return FaviconResult(path, UNCHANGED, size, 'content unchanged',
+                                 st.st_mtime_ns, st.st_size, digest)
+
+        # Rules work on '\n'; the body and untouched head lines are written back as read
+        original, rest = split_head(raw.decode('utf-8'))
+        head = _normalize_newlines(original)
+        new_head, outcomes = apply_rules(head, rules)
+
+        if new_head == head:
+            return _result_for_unwritten(path, size, st, digest, known_hash, outcomes)
+
+        new_raw = (_restore_newlines(original, new_head) + rest).encode('utf-8')
+        _replace_file(file_path, new_raw)
+
+        st = os.stat(file_path)
+        digest = hashlib.sha256(new_raw).hexdigest()
+        applied = [label for label, outcome in outcomes.items() if outcome == RULE_APPLIED]
+        return FaviconResult(path, ADDED, size, ', '.join(applied),
+                             st.st_mtime_ns, st.st_size, digest, outcomes)
+    except Exception as e:
+        return FaviconResult(path, FAILED, 0, str(e))
+
+
+def add_favicon_to_file(file_path, known_hash=None):
     """Add favicon link to an HTML file if not already present"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    return apply_head_rules(file_path, known_hash, [FaviconRule()])
+
+
+# ---------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------
+
+def load_manifest(manifest_path, version):
+    """Load manifest entries, or {} if missing, unreadable or for another rule set"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('rules_version') != version:
+        return {}
+    return data.get('files', {})
+
+
+def save_manifest(manifest_path, version, entries):
+    """Atomically write the manifest next to the scanned tree"""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'rules_version': version, 'files': entries}, f,
+                  indent=0, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def partition_by_manifest(root_dir, html_files, entries):
+    """Split files into (unchanged results, [(path, known_hash)] still to process)
+
+    A file whose mtime and size match its manifest entry is not opened.
+    """
+    unchanged = []
+    pending = []
+    for html_file in html_files:
+        key = html_file.relative_to(root_dir).as_posix()
+        entry = entries.get(key)
+        if entry is None:
+            pending.append((html_file, None))
+            continue
+        try:
+            st = html_file.stat()
+        except OSError:
+            pending.append((html_file, None))
+            continue
+        if st.st_mtime_ns == entry['mtime_ns'] and st.st_size == entry['size']:
+            unchanged.append(FaviconResult(str(html_file), UNCHANGED, 0, 'unchanged since last run',
+                                           entry['mtime_ns'], entry['size'], entry['sha256']))
+        else:
+            pending.append((html_file, entry['sha256']))
+    return unchanged, pending
+
 
-    # Check if favicon is already present
-    if 'favicon.svg' in content or 'rel="icon"' in content:
-        print(f"[OK] Skipped {file_path} (favicon already present)")
-        return False
+# ---------------------------------------------------------
+# Batch engine
+# ---------------------------------------------------------
 
-    # Find the title tag and add favicon after it
-    # Pattern: match </title> and add favicon on the next line
-    pattern = r'(<title>.*?</title>)\n'
-    match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+def process_files(html_files, jobs=1, use_threads=False, known_hashes=None, rules=None,
+                  stream_above=STREAM_ABOVE):
+    """Run the rule pipeline over html_files, yielding results in order"""
+    if known_hashes is None:
+        known_hashes = [None] * len(html_files)
+    worker = partial(apply_head_rules, rules=list(HEAD_RULES if rules is None else rules),
+                     stream_above=stream_above)
 
-    if match:
-        # Insert favicon after </title>
-        new_content = content[:match.end()] + FAVICON_LINE + content[match.end():]
+    if jobs <= 1 or len(html_files) <= 1:
+        for html_file, known_hash in zip(html_files, known_hashes):
+            yield worker(html_file, known_hash)
+        return
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+    executor_cls = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    # Large chunks keep inter-process overhead low on big trees
+    chunksize = max(1, len(html_files) // (jobs * 4))
+    with executor_cls(max_workers=jobs) as executor:
+        yield from executor.map(worker, html_files, known_hashes, chunksize=chunksize)
 
-        print(f"[+] Added favicon to {file_path}")
-        return True
+
+def print_result(result):
+    """Print the per-file line for a result"""
+    if result.status == ADDED:
+        print(f"[+] Updated {result.path} ({result.message})")
+    elif result.status in (SKIPPED, UNCHANGED):
+        print(f"[OK] Skipped {result.path} ({result.message})")
     else:
-        print(f"[!] Could not find <title> tag in {file_path}")
-        return False
+        print(f"[!] Error processing {result.path}: {result.message}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('root', nargs='?', type=Path, default=Path(__file__).parent,
+                        help='directory to scan (default: project root)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of parallel workers (default: CPU count, 1 = serial)')
+    parser.add_argument('--threads', action='store_true',
+                        help='use a thread pool instead of a process pool')
+    parser.add_argument('--rules', type=Path,
+                        help='JSON file of extra <head> rules to register')
+    parser.add_argument('--stream', action='store_true',
+                        help='stream every file instead of only large ones')
+    parser.add_argument('--stream-above', type=int, default=STREAM_ABOVE, metavar='BYTES',
+                        help=f'stream files of at least BYTES (default: {STREAM_ABOVE})')
+    parser.add_argument('--manifest', type=Path,
+                        help=f'incremental manifest path (default: <root>/{MANIFEST_NAME})')
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the manifest and rescan every file')
+    parser.add_argument('--no-gitignore', action='store_true',
+                        help='also scan directories and files that .gitignore excludes')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='only print errors and the summary')
+    return parser.parse_args(argv)
 
-def main():
+
+def main(argv=None):
     """Main function to process all HTML files"""
-    root_dir = Path(__file__).parent
+    args = parse_args(argv)
+    root_dir = args.root
+    manifest_path = args.manifest or root_dir / MANIFEST_NAME
 
-    # Find all HTML files
-    html_files = list(root_dir.rglob('*.html'))
+    rules = list(HEAD_RULES)
+    if args.rules:
+        rules += load_rules(args.rules)
+    version = pipeline_version(rules)
 
-    print(f"Found {len(html_files)} HTML files\n")
+    # Find all HTML files, skipping .git and whatever .gitignore excludes
+    html_files = [root_dir / rel for rel, _ in walk_files(root_dir, ('.html',), not args.no_gitignore)]
 
-    added_count = 0
-    skipped_count = 0
-    failed_count = 0
+    print(f"Found {len(html_files)} HTML files, {len(rules)} rule(s)\n")
 
-    for html_file in html_files:
-        try:
-            result = add_favicon_to_file(html_file)
-            if result:
-                added_count += 1
-            elif result is False and 'favicon' in open(html_file, 'r', encoding='utf-8').read():
-                skipped_count += 1
-        except Exception as e:
-            print(f"[!] Error processing {html_file}: {e}")
-            failed_count += 1
+    counts = {ADDED: 0, SKIPPED: 0, UNCHANGED: 0, FAILED: 0}
+    rule_report = {rule_label(rule): {} for rule in rules}
+    total_bytes = 0
+    start = time.perf_counter()
+
+    old_entries = {} if args.force else load_manifest(manifest_path, version)
+    unchanged, pending = partition_by_manifest(root_dir, html_files, old_entries)
+    new_entries = {}
+
+    pending_files = [html_file for html_file, _ in pending]
+    known_hashes = [known_hash for _, known_hash in pending]
+    stream_above = 0 if args.stream else args.stream_above
+    results = process_files(pending_files, args.jobs, args.threads, known_hashes, rules,
+                            stream_above)
+
+    for result in [*unchanged, *results]:
+        counts[result.status] += 1
+        total_bytes += result.bytes_processed
+        for label, outcome in result.rules.items():
+            rule_report[label][outcome] = rule_report[label].get(outcome, 0) + 1
+        if not args.quiet or result.status == FAILED:
+            print_result(result)
+        # Anything with a failed rule is left out so it is re-checked next run
+        if result.status != FAILED and RULE_FAILED not in result.rules.values():
+            key = Path(result.path).relative_to(root_dir).as_posix()
+            new_entries[key] = {'mtime_ns': result.mtime_ns, 'size': result.size,
+                                'sha256': result.sha256}
+
+    if new_entries != old_entries:
+        save_manifest(manifest_path, version, new_entries)
+
+    elapsed = time.perf_counter() - start
 
     print(f"\n{'='*50}")
     print(f"Summary:")
-    print(f"  Added favicon: {added_count} files")
-    print(f"  Already had favicon: {skipped_count} files")
-    print(f"  Failed: {failed_count} files")
-    print(f"  Total processed: {len(html_files)} files")
+    print(f"  Updated: {counts[ADDED]} files")
+    print(f"  Already up to date: {counts[SKIPPED]} files")
+    print(f"  Unchanged since last run: {counts[UNCHANGED]} files")
+    print(f"  Failed: {counts[FAILED]} files")
+    print(f"  Total processed: {len(html_files)} files ({total_bytes} bytes)")
+    print(f"  Elapsed: {elapsed:.2f}s with {max(args.jobs, 1)} worker(s)")
+    print(f"Rules:")
+    for label, outcomes in rule_report.items():
+        detail = ', '.join(f"{n} {outcome}" for outcome, n in sorted(outcomes.items())) or 'no files scanned'
+        print(f"  {label}: {detail}")
     print(f"{'='*50}")
+    return counts
+
 
 if __name__ == '__main__':
     main()
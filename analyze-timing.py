@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Per-endpoint, per-phase latency report from the --timing JSON logs
+
+Reads the lines timing.php writes (one JSON object per request) from
+files, .gz files or stdin. Lines that went to the PHP error log instead
+("... jakob-timing {...}") are picked up too. Memory does not grow with
+the log: latencies go into log-spaced histogram buckets (about 2%
+apart), which is also where the percentiles come from, and only the
+--slowest requests are kept whole.
+
+    analyze-timing.py ../jakob-timing.jsonl
+    analyze-timing.py /var/log/php_errors.log.gz --endpoint api/don.php --json
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import math
+import sys
+from pathlib import Path
+
+# Fine buckets (for percentiles): bucket i covers [GROWTH**i, GROWTH**(i+1)) ms
+GROWTH = 1.02
+# Coarse buckets (for the printed histogram), upper bounds in ms
+DISPLAY_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, math.inf)
+BAR_WIDTH = 30
+
+
+class Histogram:
+    """Streaming latency histogram with approximate percentiles"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        ms = max(float(ms), 0.0)
+        index = int(math.log(ms, GROWTH)) if ms >= 1 else (int(ms * 100) - 100)  # sub-ms in 0.01 steps
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    @staticmethod
+    def _bucket_value(index):
+        if index < 0:
+            return (index + 100) / 100
+        return GROWTH ** (index + 0.5)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self._bucket_value(index), self.max)
+        return self.max
+
+    def coarse(self):
+        counts = [0] * len(DISPLAY_BOUNDS)
+        for index, count in self.buckets.items():
+            value = self._bucket_value(index)
+            slot = next(i for i, bound in enumerate(DISPLAY_BOUNDS) if value < bound)
+            counts[slot] += count
+        return counts
+
+    def summary(self):
+        rounded = lambda value: None if value is None else round(value, 2)
+        return {
+            'count': self.count,
+            'mean_ms': rounded(self.total / self.count) if self.count else None,
+            'p50_ms': rounded(self.percentile(0.50)),
+            'p95_ms': rounded(self.percentile(0.95)),
+            'p99_ms': rounded(self.percentile(0.99)),
+            'max_ms': rounded(self.max),
+            'histogram': {('>=5000ms' if bound == math.inf else f"<{bound}ms"): count
+                          for bound, count in zip(DISPLAY_BOUNDS, self.coarse())},
+        }
+
+
+def open_log(path):
+    if str(path) == '-':
+        return sys.stdin
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def parse_ms(value):
+    """A duration in ms as a finite float; ValueError/TypeError otherwise"""
+    ms = float(value)
+    if not math.isfinite(ms):
+        raise ValueError(f"not a duration: {value!r}")
+    return ms
+
+
+def iter_entries(paths):
+    """Timing entries from every log; the generator returns the skipped line count
+
+    total_ms and every phase are checked and turned into floats here, so one
+    malformed line is skipped instead of aborting the report.
+    """
+    skipped = 0
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                start = line.find('{')
+                if start < 0:
+                    continue
+                try:
+                    entry = json.loads(line[start:])
+                    entry['total_ms'] = parse_ms(entry['total_ms'])
+                    phases = entry.get('phases') or {}
+                    if not isinstance(phases, dict):
+                        raise TypeError('phases is not an object')
+                    entry['phases'] = {str(phase): parse_ms(ms) for phase, ms in phases.items()}
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    skipped += 1
+                    continue
+                yield entry
+    return skipped
+
+
+def analyze(paths, endpoint=None, slowest=10):
+    """{endpoint: {phase: Histogram}} plus the slowest requests"""
+    stats = {}
+    statuses = {}
+    top = []  # min-heap of (total_ms, counter, entry)
+    entries = iter_entries(paths)
+    counter = 0
+    while True:
+        try:
+            entry = next(entries)
+        except StopIteration as stop:
+            skipped = stop.value or 0
+            break
+        name = entry.get('endpoint') or '?'
+        if endpoint and name != endpoint:
+            continue
+        phases = stats.setdefault(name, {})
+        phases.setdefault('total', Histogram()).add(entry['total_ms'])
+        accounted = 0.0
+        for phase, ms in entry['phases'].items():
+            phases.setdefault(phase, Histogram()).add(ms)
+            accounted += ms
+        # Time outside any named phase: PHP startup, rendering, output
+        phases.setdefault('other', Histogram()).add(max(entry['total_ms'] - accounted, 0.0))
+        status = str(entry.get('status', '?'))
+        statuses.setdefault(name, {}).setdefault(status, 0)
+        statuses[name][status] += 1
+
+        counter += 1
+        item = (entry['total_ms'], counter, entry)
+        if len(top) < slowest:
+            heapq.heappush(top, item)
+        elif item[0] > top[0][0]:
+            heapq.heapreplace(top, item)
+
+    return stats, statuses, [entry for _, _, entry in sorted(top, reverse=True)], skipped
+
+
+def print_report(stats, statuses, slowest):
+    for name in sorted(stats, key=lambda n: -stats[n]['total'].count):
+        phases = stats[name]
+        total = phases['total']
+        codes = ', '.join(f"{code}: {count}" for code, count in sorted(statuses[name].items()))
+        print(f"\n{name}  ({total.count} requests; {codes})")
+        print(f"  {'phase':<18} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  share")
+        order = ['total'] + sorted((p for p in phases if p not in ('total', 'other')),
+                                   key=lambda p: -phases[p].total) + ['other']
+        for phase in order:
+            h = phases[phase]
+            share = h.total / total.total if total.total else 0
+            print(f"  {phase:<18} {h.percentile(0.5):>7.2f}ms {h.percentile(0.95):>7.2f}ms "
+                  f"{h.percentile(0.99):>7.2f}ms {h.max:>7.2f}ms  {share:>5.1%}")
+
+        counts = total.coarse()
+        peak = max(counts) or 1
+        print("  total latency:")
+        for bound, count in zip(DISPLAY_BOUNDS, counts):
+            if count:
+                label = '>=5000ms' if bound == math.inf else f"<{bound}ms"
+                print(f"    {label:>9} {'#' * max(1, round(count / peak * BAR_WIDTH)):<{BAR_WIDTH}} {count}")
+
+    if slowest:
+        print(f"\nSlowest requests:")
+        for entry in slowest:
+            phases = ', '.join(f"{phase} {float(ms):.1f}ms" for phase, ms in
+                               sorted((entry.get('phases') or {}).items(), key=lambda kv: -float(kv[1])))
+            print(f"  {float(entry['total_ms']):>9.1f}ms  {entry.get('ts', '')}  {entry.get('method', '')} "
+                  f"{entry.get('endpoint', '')} [{entry.get('status', '')}]  {phases}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('logs', nargs='*', type=Path, default=[Path('..') / 'jakob-timing.jsonl'],
+                        help="timing logs (.jsonl, .gz, or - for stdin; default: ../jakob-timing.jsonl, "
+                             "where a project generated in the current directory logs)")
+    parser.add_argument('--endpoint', help='only this endpoint, e.g. api/don.php')
+    parser.add_argument('--slowest', type=int, default=10, help='slowest requests to list (default: 10)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        stats, statuses, slowest, skipped = analyze(args.logs, args.endpoint, max(args.slowest, 0))
+    except OSError as e:
+        sys.exit(f"[!] {e}")
+
+    if args.json:
+        report = {
+            'endpoints': {name: {'status': statuses[name],
+                                 'phases': {phase: h.summary() for phase, h in sorted(phases.items())}}
+                          for name, phases in sorted(stats.items())},
+            'slowest': slowest,
+            'skipped_lines': skipped,
+        }
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return
+
+    if not stats:
+        print("[!] No timing entries found")
+        return
+    print_report(stats, statuses, slowest)
+    if skipped:
+        print(f"\n[!] Skipped {skipped} unreadable line(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Deterministic initials avatars (SVG) with a size-capped on-disk LRU cache.
+
+The key and the drawing must stay in sync with the avatar.php template in
+installer.py, which renders the same SVG on a cache miss.
+"""
+
+import argparse
+import csv
+import hashlib
+import html
+import os
+import re
+import tempfile
+from pathlib import Path
+
+# Background colours, picked from the key; same order as avatar.php
+PALETTE = ['#2b7a78', '#3aafa9', '#17252a', '#ea2a33', '#6a4c93', '#1982c4', '#8ac926', '#ff924c']
+
+DEFAULT_CACHE_DIR = 'avatars'
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def avatar_key(name):
+    """Cache key for a display name: 16 hex chars of sha1(lowercased name)"""
+    return hashlib.sha1(name.strip().lower().encode('utf-8')).hexdigest()[:16]
+
+
+def initials(name):
+    """Up to two initials, e.g. '@jean_pierre' -> 'JP'"""
+    parts = [p for p in re.split(r'[\s_.\-]+', name.strip().lstrip('@')) if p]
+    letters = ''.join(p[0] for p in parts[:2]).upper()
+    return letters or '?'
+
+
+def render_avatar_svg(name):
+    """SVG markup for name; scalable, so one file serves every size"""
+    key = avatar_key(name)
+    background = PALETTE[int(key[:8], 16) % len(PALETTE)]
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+        f'<rect width="100" height="100" fill="{background}"/>'
+        '<text x="50" y="50" dy=".35em" text-anchor="middle" '
+        'font-family="Segoe UI, sans-serif" font-size="40" fill="#ffffff">'
+        f'{html.escape(initials(name), quote=False)}</text></svg>'
+    )
+
+
+class AvatarCache:
+    """Directory of <key>.svg files kept under max_bytes, least recently used out first.
+
+    A hit refreshes the file's mtime, which is what eviction orders by.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def path_for(self, name):
+        return self.cache_dir / f"{avatar_key(name)}.svg"
+
+    def _current_size(self):
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.cache_dir.glob('*.svg'))
+        return self._size
+
+    def get(self, name):
+        """Path of the avatar for name, rendering it on a miss"""
+        path = self.path_for(name)
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        size_before = self._current_size()
+        data = render_avatar_svg(name).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+        self._size = size_before + len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+        return path
+
+    def evict(self):
+        """Delete least recently used avatars until the cache fits max_bytes"""
+        entries = []
+        for path in self.cache_dir.glob('*.svg'):
+            st = path.stat()
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render avatars into the on-disk cache.")
+    parser.add_argument('names', nargs='*', help='display names to render')
+    parser.add_argument('--csv', type=Path,
+                        help='CSV export with a username column (e.g. from the users table)')
+    parser.add_argument('--cache-dir', type=Path, default=Path(DEFAULT_CACHE_DIR))
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES)
+    args = parser.parse_args()
+
+    names = list(args.names)
+    if args.csv:
+        with open(args.csv, newline='', encoding='utf-8') as f:
+            # profil.php shows "@username", so that is what gets keyed
+            names += [f"@{row['username']}" for row in csv.DictReader(f) if row.get('username')]
+
+    cache = AvatarCache(args.cache_dir, args.max_bytes)
+    for name in names:
+        cache.get(name)
+    print(f"✅ {len(names)} avatar(s) dans {args.cache_dir} ({cache._current_size()} octets)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""Benchmark add-favicon.py and installer.py on synthetic project trees
+
+Trees of --files HTML pages are generated once per size and seed (sizes
+drawn from a lognormal around 6 KB, a few pages above add-favicon's
+streaming threshold, some without <title>, some already carrying the
+favicon, plus a .gitignore'd node_modules/ and a .git/ the walker must
+skip) and copied fresh for every repeat. Each repeat runs in its own
+interpreter, so peak RSS and the I/O counters belong to that scenario
+alone:
+
+  add_favicon_to_file    add_favicon_to_file() over every page, serially
+  add_favicon_main       add-favicon.py main() --force, cold
+  add_favicon_main_warm  main() again on an up-to-date tree (manifest hits)
+  create_project         installer.create_project() into an empty directory
+  create_project_warm    create_project() again, nothing to write
+
+Recorded per scenario (median over --repeat): wall time, files/sec, peak
+RSS, read/write syscalls and bytes from /proc/self/io (Linux; None
+elsewhere) and block I/O from getrusage. With --jobs > 1 the pool
+workers' syscalls are not counted, so baselines are meant for -j 1.
+
+    benchmark.py run --files 1000 10000 --out bench-baseline.json
+    benchmark.py run --files 1000 --out bench-new.json --baseline bench-baseline.json
+    benchmark.py compare bench-baseline.json bench-new.json --threshold 0.1
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+DEFAULT_TREE_DIR = Path(tempfile.gettempdir()) / 'jakob-bench'
+TREE_MARKER = '.bench-tree.json'
+FILES_PER_DIR = 200
+
+# Page mix
+TITLE_FRACTION = 0.9
+FAVICON_FRACTION = 0.3
+IGNORED_FRACTION = 0.1
+MEDIAN_PAGE_BYTES = 6000
+MAX_PAGE_BYTES = 400_000
+LARGE_PAGE_BYTES = 1_200_000  # above add-favicon's STREAM_ABOVE
+MAX_LARGE_PAGES = 5
+
+FAVICON_SCENARIOS = ('add_favicon_to_file', 'add_favicon_main', 'add_favicon_main_warm')
+INSTALLER_SCENARIOS = ('create_project', 'create_project_warm')
+SCENARIOS = FAVICON_SCENARIOS + INSTALLER_SCENARIOS
+
+# Compared by `compare`; lower is better for all of them
+METRICS = ('wall_s', 'peak_rss_kb', 'syscalls', 'io_bytes')
+# Differences below these are noise, whatever the ratio
+NOISE_FLOOR = {'wall_s': 0.005, 'peak_rss_kb': 1024, 'syscalls': 50, 'io_bytes': 64 * 1024}
+
+FILLER = ('<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod '
+          'tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam.</p>\n') * 32
+
+
+def load_script(filename):
+    """Import one of the hyphenated scripts as a module"""
+    name = filename[:-3].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, HERE / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # so process pools can pickle its functions
+    spec.loader.exec_module(module)
+    return module
+
+
+# ---------------------------------------------------------
+# Synthetic trees
+# ---------------------------------------------------------
+
+def render_page(index, size, title, favicon, favicon_line):
+    head = ['<!DOCTYPE html>\n<html lang="fr">\n<head>\n  <meta charset="UTF-8">\n']
+    if title:
+        head.append(f'  <title>Page {index}</title>\n')
+    if favicon:
+        head.append(favicon_line)
+    head.append('  <link rel="stylesheet" href="/style.css">\n</head>\n<body>\n')
+    page = ''.join(head)
+    missing = max(size - len(page) - 16, 0)
+    body = FILLER * (missing // len(FILLER)) + FILLER[:missing % len(FILLER)]
+    return f"{page}{body}\n</body>\n</html>\n"
+
+
+def generate_tree(root, files, seed):
+    """Write a synthetic project of `files` pages into root; returns its spec"""
+    favicon_line = load_script('add-favicon.py').FAVICON_LINE
+    rng = random.Random(f"{seed}/{files}")
+    large = set(rng.sample(range(files), min(MAX_LARGE_PAGES, files // 1000)))
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    total_bytes = 0
+    with_title = with_favicon = 0
+    for i in range(files):
+        size = LARGE_PAGE_BYTES if i in large else int(min(
+            max(rng.lognormvariate(math.log(MEDIAN_PAGE_BYTES), 1.0), 300), MAX_PAGE_BYTES))
+        title = rng.random() < TITLE_FRACTION
+        favicon = rng.random() < FAVICON_FRACTION
+        directory = root / 'pages' / f"section{i // FILES_PER_DIR:04d}"
+        if i % FILES_PER_DIR == 0:
+            directory.mkdir(parents=True)
+        content = render_page(i, size, title, favicon, favicon_line)
+        (directory / f"page{i:06d}.html").write_text(content, encoding='utf-8')
+        total_bytes += len(content)
+        with_title += title
+        with_favicon += favicon
+
+    # Pages no tool should touch: ignored dependencies and the git directory
+    ignored = max(int(files * IGNORED_FRACTION), 1)
+    for i in range(ignored):
+        directory = root / 'node_modules' / f"pkg{i // FILES_PER_DIR:04d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"readme{i:06d}.html").write_text(render_page(i, 2000, True, False, favicon_line),
+                                                       encoding='utf-8')
+    (root / '.git' / 'objects').mkdir(parents=True)
+    (root / '.git' / 'description.html').write_text('<html><head><title>git</title>\n</head></html>\n')
+    (root / '.gitignore').write_text('node_modules/\n*.gz\n*.br\n', encoding='utf-8')
+
+    spec = {'files': files, 'seed': seed, 'bytes': total_bytes, 'with_title': with_title,
+            'with_favicon': with_favicon, 'large': len(large), 'ignored': ignored}
+    (root / TREE_MARKER).write_text(json.dumps(spec, sort_keys=True), encoding='utf-8')
+    return spec
+
+
+def ensure_tree(tree_dir, files, seed):
+    """Pristine tree for (files, seed), generated on first use"""
+    root = tree_dir / f"{files}-{seed}"
+    try:
+        spec = json.loads((root / TREE_MARKER).read_text(encoding='utf-8'))
+        if spec['files'] == files and spec['seed'] == seed:
+            return root, spec
+    except (OSError, ValueError, KeyError):
+        pass
+    print(f"[+] Generating {files} pages in {root}...")
+    start = time.perf_counter()
+    spec = generate_tree(root, files, seed)
+    print(f"[OK] {spec['bytes'] / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+    return root, spec
+
+
+# ---------------------------------------------------------
+# Measuring (in the child interpreter)
+# ---------------------------------------------------------
+
+def read_proc_io():
+    """Counters from /proc/self/io, or None where it does not exist"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            return {key: int(value) for key, value in (line.split(':') for line in f)}
+    except (OSError, ValueError):
+        return None
+
+
+def max_rss_kb():
+    """Peak RSS of this interpreter and its reaped children, in KB"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    try:
+        # VmHWM starts afresh at exec; ru_maxrss would inherit the parent's peak
+        with open('/proc/self/status', 'r') as f:
+            own = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+    except (OSError, StopIteration, ValueError):
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = max(own, children)
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KB elsewhere
+
+
+def block_io():
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_inblock for u in usage), sum(u.ru_oublock for u in usage)
+
+
+def measure(operation):
+    """Run operation() (which returns a file count) and collect its costs"""
+    io_before = read_proc_io()
+    blocks_before = block_io()
+    start = time.perf_counter()
+    files = operation()
+    wall = time.perf_counter() - start
+    io_after = read_proc_io()
+    blocks_after = block_io()
+
+    result = {
+        'wall_s': wall,
+        'files': files,
+        'files_per_s': files / wall if wall > 0 else None,
+        'peak_rss_kb': max_rss_kb(),
+        'block_in': blocks_after[0] - blocks_before[0],
+        'block_out': blocks_after[1] - blocks_before[1],
+    }
+    if io_before and io_after:
+        delta = {key: io_after[key] - io_before[key] for key in io_after}
+        result.update({
+            'syscr': delta['syscr'], 'syscw': delta['syscw'],
+            'rchar': delta['rchar'], 'wchar': delta['wchar'],
+            'syscalls': delta['syscr'] + delta['syscw'],
+            'io_bytes': delta['rchar'] + delta['wchar'],
+        })
+    else:
+        result.update(dict.fromkeys(('syscr', 'syscw', 'rchar', 'wchar', 'syscalls', 'io_bytes')))
+    return result
+
+
+def run_scenario(scenario, work, jobs):
+    """One scenario against the work directory, in this process"""
+    devnull = open(os.devnull, 'w')
+    if scenario in FAVICON_SCENARIOS:
+        add_favicon = load_script('add-favicon.py')
+        argv = [str(work), '-q', '-j', str(jobs)]
+        if scenario == 'add_favicon_to_file':
+            pages = sorted(work.rglob('page*.html'))
+
+            def operation():
+                for page in pages:
+                    add_favicon.add_favicon_to_file(page)
+                return len(pages)
+        else:
+            if scenario == 'add_favicon_main_warm':
+                with contextlib.redirect_stdout(devnull):
+                    add_favicon.main(argv)
+            else:
+                argv.append('--force')
+
+            def operation():
+                with contextlib.redirect_stdout(devnull):
+                    return sum(add_favicon.main(argv).values())
+    else:
+        import installer
+        target = work / 'project'
+        target.mkdir(parents=True, exist_ok=True)
+        if scenario == 'create_project_warm':
+            installer.create_project(root=str(target), quiet=True)
+
+        def operation():
+            result = installer.create_project(root=str(target), quiet=True)
+            return sum(len(names) for names in result.values())
+
+    with devnull:
+        return measure(operation)
+
+
+# ---------------------------------------------------------
+# Running (in the parent)
+# ---------------------------------------------------------
+
+def spawn(scenario, tree, jobs):
+    """One repeat in a fresh interpreter, on a fresh copy of the tree"""
+    work = Path(tempfile.mkdtemp(prefix='jakob-bench-'))
+    try:
+        if tree is not None:
+            shutil.copytree(tree, work, dirs_exist_ok=True)
+        proc = subprocess.run([sys.executable, str(HERE / 'benchmark.py'), 'measure', scenario, str(work),
+                               '--jobs', str(jobs)], capture_output=True, text=True, cwd=HERE)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{scenario} failed:\n{proc.stderr.strip()}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def summarize(samples):
+    """Median of every metric over the repeats, plus the raw wall times"""
+    summary = {}
+    for key in samples[0]:
+        values = [sample[key] for sample in samples if sample[key] is not None]
+        median = statistics.median(values) if values else None
+        # Counters stay integers
+        summary[key] = round(median) if values and all(isinstance(v, int) for v in values) else median
+    summary['wall_s_all'] = [sample['wall_s'] for sample in samples]
+    summary['wall_s_min'] = min(summary['wall_s_all'])
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=HERE, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt(value, unit=''):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:,.3f}{unit}" if value < 100 else f"{value:,.0f}{unit}"
+    return f"{value:,}{unit}"
+
+
+def print_results(results):
+    print(f"{'scenario':<34} {'files':>8} {'wall':>10} {'files/s':>10} {'peak RSS':>10} "
+          f"{'syscalls':>10} {'I/O MB':>9}")
+    for name, r in results.items():
+        io_mb = None if r['io_bytes'] is None else r['io_bytes'] / 1e6
+        print(f"{name:<34} {_fmt(r['files']):>8} {_fmt(r['wall_s'], 's'):>10} {_fmt(r['files_per_s']):>10} "
+              f"{_fmt(r['peak_rss_kb'] // 1024, ' MB'):>10} {_fmt(r['syscalls']):>10} {_fmt(io_mb):>9}")
+
+
+def cmd_run(args):
+    scenarios = args.scenario or list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"[!] Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    plan = []  # (result name, scenario, tree or None)
+    trees = {}
+    for files in args.files:
+        if any(s in FAVICON_SCENARIOS for s in scenarios):
+            tree, spec = ensure_tree(args.tree_dir, files, args.seed)
+            trees[str(files)] = spec
+            plan += [(f"{s}/{files}", s, tree) for s in scenarios if s in FAVICON_SCENARIOS]
+    # The installer's output does not depend on the tree size
+    plan += [(s, s, None) for s in scenarios if s in INSTALLER_SCENARIOS]
+
+    results = {}
+    for name, scenario, tree in plan:
+        print(f"[+] {name} x{args.repeat}")
+        try:
+            samples = [spawn(scenario, tree, args.jobs) for _ in range(max(args.repeat, 1))]
+        except RuntimeError as e:
+            sys.exit(f"[!] {e}")
+        results[name] = summarize(samples)
+
+    report = {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'jobs': args.jobs,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'trees': trees,
+        },
+        'results': results,
+    }
+    if args.out:
+        tmp_path = f"{args.out}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, args.out)
+
+    print(f"\n{'='*50}")
+    print_results(results)
+    if args.out:
+        print(f"\n  Results written to {args.out}")
+    print(f"{'='*50}")
+
+    if args.baseline:
+        regressions = compare(load_report(args.baseline), report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+# ---------------------------------------------------------
+# Comparing
+# ---------------------------------------------------------
+
+def load_report(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        sys.exit(f"[!] Cannot read {path}: {e}")
+
+
+def compare(baseline, current, threshold):
+    """Print metric changes per scenario; returns the list of regressions"""
+    regressions = []
+    base_results, cur_results = baseline['results'], current['results']
+    for key in ('python', 'platform', 'cpu_count', 'jobs'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"[!] {key} differs: {baseline['meta'].get(key)} -> {current['meta'].get(key)}")
+
+    print(f"\n{'scenario':<34} {'metric':<12} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name in sorted(set(base_results) | set(cur_results)):
+        if name not in cur_results or name not in base_results:
+            print(f"{name:<34} {'only in ' + ('baseline' if name in base_results else 'current')}")
+            continue
+        for metric in METRICS:
+            old, new = base_results[name].get(metric), cur_results[name].get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            flag = ''
+            if new - old > NOISE_FLOOR[metric] and change > threshold:
+                flag = '[!] REGRESSION'
+                regressions.append((name, metric, old, new))
+            elif old - new > NOISE_FLOOR[metric] and -change > threshold:
+                flag = '[OK] improved'
+            print(f"{name:<34} {metric:<12} {_fmt(old):>14} {_fmt(new):>14} {change:>+8.1%}  {flag}")
+
+    print(f"\n{'='*50}")
+    print(f"Summary:")
+    print(f"  Baseline: {baseline['meta'].get('revision')} ({baseline['meta'].get('created')})")
+    print(f"  Current:  {current['meta'].get('revision')} ({current['meta'].get('created')})")
+    print(f"  Threshold: {threshold:.0%}")
+    print(f"  Regressions: {len(regressions)}")
+    print(f"{'='*50}")
+    return regressions
+
+
+def cmd_compare(args):
+    regressions = compare(load_report(args.baseline), load_report(args.current), args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+def cmd_measure(args):
+    print(json.dumps(run_scenario(args.scenario, args.work, args.jobs)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the scenarios and write a JSON report')
+    run.add_argument('--files', type=int, nargs='+', default=[1000],
+                     help='tree sizes in HTML pages, e.g. 1000 10000 100000 (default: 1000)')
+    run.add_argument('--scenario', action='append', choices=SCENARIOS,
+                     help='scenario to run; repeatable (default: all)')
+    run.add_argument('--repeat', type=int, default=3, help='runs per scenario; the median is kept (default: 3)')
+    run.add_argument('-j', '--jobs', type=int, default=1,
+                     help='add-favicon.py workers (default: 1, so every syscall is counted)')
+    run.add_argument('--seed', type=int, default=42, help='tree generator seed (default: 42)')
+    run.add_argument('--tree-dir', type=Path, default=DEFAULT_TREE_DIR,
+                     help=f'where generated trees are kept between runs (default: {DEFAULT_TREE_DIR})')
+    run.add_argument('--out', help='JSON report to write, e.g. bench-baseline.json')
+    run.add_argument('--baseline', help='compare against this report afterwards; exit 1 on regression')
+    run.add_argument('--threshold', type=float, default=0.10,
+                     help='relative slowdown/growth flagged as a regression (default: 0.10)')
+    run.set_defaults(func=cmd_run)
+
+    comparison = commands.add_parser('compare', help='compare two JSON reports; exit 1 on regression')
+    comparison.add_argument('baseline')
+    comparison.add_argument('current')
+    comparison.add_argument('--threshold', type=float, default=0.10,
+                            help='relative slowdown/growth flagged as a regression (default: 0.10)')
+    comparison.set_defaults(func=cmd_compare)
+
+    measure_cmd = commands.add_parser('measure', help='run one scenario in this process (used by run)')
+    measure_cmd.add_argument('scenario', choices=SCENARIOS)
+    measure_cmd.add_argument('work', type=Path, help='scratch copy of a generated tree')
+    measure_cmd.add_argument('-j', '--jobs', type=int, default=1)
+    measure_cmd.set_defaults(func=cmd_measure)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
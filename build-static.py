@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Minify HTML/CSS/JS and write precompressed .gz/.br variants next to them"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # .br variants are skipped without the brotli package
+    brotli = None
+
+# Default manifest location, relative to the scanned root
+MANIFEST_NAME = '.static-manifest.json'
+
+MINIFY_EXTENSIONS = {'.html', '.css', '.js'}
+COMPRESS_EXTENSIONS = MINIFY_EXTENSIONS | {'.svg', '.json', '.txt', '.xml'}
+
+# Directories never worth walking into
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv'}
+
+# installer.py's sources at the top of the repo: not site output, and
+# installer.py must not find compressed copies among its templates
+SOURCE_DIRS = {'templates', 'template_variants'}
+
+# Files smaller than this are not worth a compressed variant
+MIN_COMPRESS_SIZE = 256
+
+
+# ---------------------------------------------------------
+# Minifiers
+# ---------------------------------------------------------
+# These are deliberately conservative: they drop comments and
+# indentation but never join lines, so JS automatic semicolon
+# insertion and string contents are left alone.
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_STRING_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+
+
+def minify_css(css):
+    """Strip comments and collapse whitespace outside of strings"""
+    parts = CSS_STRING_RE.split(CSS_COMMENT_RE.sub('', css))
+    for i in range(0, len(parts), 2):  # even indexes are outside strings
+        text = re.sub(r'\s+', ' ', parts[i])
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        # Only the space after ':' is safe to drop; "a :hover" is a selector
+        text = re.sub(r':\s+', ':', text)
+        parts[i] = text.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def _template_open_after(line, in_template):
+    """Whether a template literal is still open at the end of line"""
+    quote = None
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if in_template:
+            in_template = ch != '`'
+        elif quote:
+            if ch == quote:
+                quote = None
+        elif ch in '\'"':
+            quote = ch
+        elif ch == '`':
+            in_template = True
+        elif line.startswith('//', i):
+            break
+        i += 1
+    return in_template
+
+
+def minify_js(js):
+    """Drop blank lines, indentation and whole-line // comments
+
+    Lines inside template literals are kept verbatim.
+    """
+    out = []
+    in_template = False
+    for line in js.split('\n'):
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                out.append(stripped)
+        in_template = _template_open_after(line, in_template)
+    return '\n'.join(out)
+
+
+HTML_RAW_BLOCK_RE = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)',
+                               re.IGNORECASE | re.DOTALL)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+
+
+def _minify_html_text(text):
+    text = HTML_COMMENT_RE.sub('', text)
+    return '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+
+
+def minify_html(html):
+    """Strip comments and indentation; minify inline <script>/<style>"""
+    out = []
+    pos = 0
+    for match in HTML_RAW_BLOCK_RE.finditer(html):
+        out.append(_minify_html_text(html[pos:match.start()]))
+        open_tag, tag, body, close_tag = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        if tag == 'script' and 'src=' not in open_tag.lower():
+            body = minify_js(body)
+        elif tag == 'style':
+            body = minify_css(body)
+        out.append(open_tag + body + close_tag)
+        pos = match.end()
+    out.append(_minify_html_text(html[pos:]))
+    return '\n'.join(part for part in out if part)
+
+
+MINIFIERS = {'.html': minify_html, '.css': minify_css, '.js': minify_js}
+
+
+# ---------------------------------------------------------
+# Per-file build
+# ---------------------------------------------------------
+
+@dataclass
+class BuildResult:
+    """Sizes for one file; zero means the variant was not written"""
+    path: str
+    original: int = 0
+    minified: int = 0
+    gz: int = 0
+    br: int = 0
+    sha256: str = ''
+    mtime_ns: int = 0
+    size: int = 0
+    rebuilt: bool = True
+    error: str = ''
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_variant(path, suffix, data):
+    """Write path+suffix if it beats the plain file, else remove a stale one"""
+    variant = f"{path}{suffix}"
+    if data is not None and len(data) < os.path.getsize(path):
+        _write_atomic(variant, data)
+        return len(data)
+    if os.path.exists(variant):
+        os.remove(variant)
+    return 0
+
+
+def build_file(file_path, minify_in_place=False, known=None):
+    """Minify and precompress one file
+
+    The .gz/.br variants always hold the minified content; the file itself
+    is only rewritten when minify_in_place is set. known is the file's
+    previous manifest entry: if the content still hashes the same, nothing
+    is rebuilt.
+    """
+    path = str(file_path)
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+            st = os.fstat(f.fileno())
+        digest = hashlib.sha256(raw).hexdigest()
+        if known is not None and known['sha256'] == digest and _variants_exist(path, known):
+            return BuildResult(path=path, original=known['original'], minified=known['minified'],
+                               gz=known['gz'], br=known['br'], sha256=digest,
+                               mtime_ns=st.st_mtime_ns, size=st.st_size, rebuilt=False)
+        ext = os.path.splitext(path)[1].lower()
+
+        data = raw
+        if ext in MINIFIERS:
+            text = raw.decode('utf-8').replace('\r\n', '\n')
+            minified = MINIFIERS[ext](text).encode('utf-8')
+            if len(minified) < len(raw):
+                data = minified
+        if minify_in_place and data is not raw:
+            _write_atomic(path, data)
+
+        gz_data = br_data = None
+        if len(data) >= MIN_COMPRESS_SIZE:
+            gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                br_data = brotli.compress(data, quality=11)
+
+        st = os.stat(path)
+        return BuildResult(
+            path=path,
+            original=len(raw),
+            minified=len(data),
+            gz=_write_variant(path, '.gz', gz_data),
+            br=_write_variant(path, '.br', br_data),
+            sha256=hashlib.sha256(data).hexdigest() if minify_in_place else digest,
+            mtime_ns=st.st_mtime_ns,
+            size=st.st_size,
+        )
+    except Exception as e:
+        return BuildResult(path=path, error=str(e))
+
+
+def find_static_files(root_dir):
+    """Files with a compressible extension, skipping SKIP_DIRS and top-level SOURCE_DIRS"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        top = dirpath == os.fspath(root_dir)  # os.walk yields the root first, as given
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not (top and d in SOURCE_DIRS)]
+        for name in filenames:
+            if name.startswith('.'):
+                continue
+            if os.path.splitext(name)[1].lower() in COMPRESS_EXTENSIONS:
+                found.append(Path(dirpath) / name)
+    return sorted(found)
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest_path, entries):
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=0, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def _variants_exist(path, entry):
+    return (not entry['gz'] or os.path.exists(f"{path}.gz")) and \
+        (not entry['br'] or os.path.exists(f"{path}.br"))
+
+
+def _is_current(path, entry):
+    """True when path still matches its manifest entry and its variants exist"""
+    if entry is None:
+        return False
+    st = path.stat()
+    if st.st_mtime_ns != entry['mtime_ns'] or st.st_size != entry['size']:
+        return False
+    return _variants_exist(path, entry)
+
+
+# ---------------------------------------------------------
+# Report
+# ---------------------------------------------------------
+
+def _kb(n):
+    return f"{n / 1024:,.1f} KB"
+
+
+def print_report(results):
+    """Before/after byte sizes per file type"""
+    totals = {}
+    for result in results:
+        ext = os.path.splitext(result.path)[1].lower()
+        row = totals.setdefault(ext, [0, 0, 0, 0, 0])
+        row[0] += 1
+        row[1] += result.original
+        row[2] += result.minified
+        row[3] += result.gz or result.minified
+        row[4] += result.br or result.gz or result.minified
+
+    print(f"{'type':<6} {'files':>6} {'original':>12} {'minified':>12} {'gzip':>12} {'brotli':>12}")
+    grand = [0, 0, 0, 0, 0]
+    for ext, row in sorted(totals.items()):
+        print(f"{ext:<6} {row[0]:>6} {_kb(row[1]):>12} {_kb(row[2]):>12} {_kb(row[3]):>12} "
+              f"{_kb(row[4]) if brotli else '-':>12}")
+        grand = [a + b for a, b in zip(grand, row)]
+    print(f"{'total':<6} {grand[0]:>6} {_kb(grand[1]):>12} {_kb(grand[2]):>12} {_kb(grand[3]):>12} "
+          f"{_kb(grand[4]) if brotli else '-':>12}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('root', nargs='?', type=Path, default=Path(__file__).parent,
+                        help='directory to build (default: project root)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of parallel workers (default: CPU count)')
+    parser.add_argument('--minify-in-place', action='store_true',
+                        help='also overwrite the originals with their minified version')
+    parser.add_argument('--manifest', type=Path,
+                        help=f'manifest path (default: <root>/{MANIFEST_NAME})')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild every file, ignoring the manifest')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Build minified and precompressed variants for every static file"""
+    args = parse_args(argv)
+    root_dir = args.root
+    manifest_path = args.manifest or root_dir / MANIFEST_NAME
+    start = time.perf_counter()
+
+    if brotli is None:
+        print("[!] brotli package not installed: only .gz variants will be written\n")
+
+    old_entries = {} if args.force else load_manifest(manifest_path)
+    files = find_static_files(root_dir)
+
+    current, pending = [], []
+    for path in files:
+        key = path.relative_to(root_dir).as_posix()
+        (current if _is_current(path, old_entries.get(key)) else pending).append(path)
+
+    results = []
+    built = failed = 0
+    new_entries = {}
+    for path in current:
+        key = path.relative_to(root_dir).as_posix()
+        new_entries[key] = old_entries[key]
+        results.append(BuildResult(path=str(path), rebuilt=False, **old_entries[key]))
+
+    known = [old_entries.get(path.relative_to(root_dir).as_posix()) for path in pending]
+    workers = max(args.jobs, 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(pending) // (workers * 4))
+        for result in executor.map(build_file, pending, [args.minify_in_place] * len(pending),
+                                   known, chunksize=chunksize):
+            if result.error:
+                print(f"[!] Error processing {result.path}: {result.error}")
+                failed += 1
+                continue
+            if result.rebuilt:
+                built += 1
+                print(f"[+] Built {result.path}")
+            results.append(result)
+            key = Path(result.path).relative_to(root_dir).as_posix()
+            new_entries[key] = {'original': result.original, 'minified': result.minified,
+                                'gz': result.gz, 'br': result.br, 'sha256': result.sha256,
+                                'mtime_ns': result.mtime_ns, 'size': result.size}
+
+    save_manifest(manifest_path, new_entries)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'='*50}")
+    print_report(results)
+    print(f"\n  Built: {built} files, unchanged: {len(results) - built}, failed: {failed}")
+    print(f"  Elapsed: {elapsed:.2f}s with {workers} worker(s)")
+    print(f"{'='*50}")
+
+
+if __name__ == '__main__':
+    main()
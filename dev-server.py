@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""Watch the project, reapply the build steps to changed files, and serve it
+
+A polling watcher (mtime + size over a .gitignore-aware scandir walk, see
+treewalk.py) notices changed files and sends only those through the
+existing rewrite functions:
+
+  * HTML pages go through add-favicon.py's <head> rules;
+  * with --build-static, compressible assets get their .gz/.br variants
+    rebuilt by build-static.py;
+  * with --installer, an edit under templates/ or template_variants/
+    regenerates the installer project into the served root
+    (create_project() only rewrites files whose content changed).
+
+The static dev server answers from an in-memory cache: each file is read
+and compressed once, served with a strong ETag (304 on If-None-Match) and
+gzip/brotli picked from Accept-Encoding. Every hit is revalidated
+against the file's mtime and size, so files the watcher does not track
+(.gitignore'd ones such as profiles/) are never served stale; the watcher
+also evicts entries as their files change. PHP files and dotfiles are
+never served. installer.py's own templates/ and template_variants/ are
+not processed.
+
+    dev-server.py                       # watch + serve the project root on :8000
+    dev-server.py /tmp/jakob --installer --variant timing --port 8080
+    dev-server.py --no-serve --build-static
+"""
+
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import mimetypes
+import os
+import posixpath
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import installer
+from treewalk import walk_files
+
+try:
+    import brotli
+except ImportError:  # responses are gzip-only without the brotli package
+    brotli = None
+
+HERE = Path(__file__).resolve().parent
+
+
+def load_script(filename):
+    """Import one of the hyphenated build scripts as a module"""
+    name = filename[:-3].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, HERE / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+add_favicon = load_script('add-favicon.py')
+build_static = load_script('build-static.py')
+
+# Poll interval, in seconds
+DEFAULT_INTERVAL = 0.5
+
+# In-memory cache budget (plain + compressed bytes)
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Never served: server-side code, config and logs
+BLOCKED_EXTENSIONS = {'.php', '.py', '.sql', '.ini', '.jsonl'}
+BLOCKED_NAMES = {'userlist.txt'}
+
+
+# ---------------------------------------------------------
+# Watcher
+# ---------------------------------------------------------
+
+def snapshot(root, use_gitignore=True, skip_top=()):
+    """{relative path: (mtime_ns, size)} for every file under root
+
+    Files under the top-level directories in skip_top are left out.
+    """
+    state = {}
+    for rel, entry in walk_files(root, use_gitignore=use_gitignore):
+        if rel.split('/', 1)[0] in skip_top:
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        state[rel] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def diff_snapshots(old, new):
+    """(changed or added, removed) relative paths"""
+    changed = [rel for rel, sig in new.items() if old.get(rel) != sig]
+    removed = [rel for rel in old if rel not in new]
+    return sorted(changed), sorted(removed)
+
+
+def stat_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Watcher:
+    """Polls root and the installer templates, reprocessing what changed"""
+
+    def __init__(self, root, rules, cache=None, build_assets=False, installer_files=None,
+                 use_gitignore=True):
+        self.root = Path(root)
+        self.rules = rules
+        self.cache = cache
+        self.build_assets = build_assets
+        self.installer_files = installer_files
+        self.use_gitignore = use_gitignore
+        self.state = self._root_snapshot()
+        self.template_state = self._template_snapshot()
+
+    def _root_snapshot(self):
+        # installer.py's sources are not site output: no favicon rules, no .gz/.br next to them
+        return snapshot(self.root, self.use_gitignore, build_static.SOURCE_DIRS)
+
+    def _template_snapshot(self):
+        if self.installer_files is None:
+            return {}
+        state = {}
+        for directory in (installer.TEMPLATES_DIR, *self.installer_files.variant_dirs):
+            state.update({f"{directory.name}/{rel}": sig
+                          for rel, sig in snapshot(directory, use_gitignore=False).items()})
+        return state
+
+    def poll(self):
+        """One pass; returns the number of files reprocessed"""
+        work = 0
+        if self.installer_files is not None:
+            templates = self._template_snapshot()
+            changed, removed = diff_snapshots(self.template_state, templates)
+            self.template_state = templates
+            if changed or removed:
+                work += self.regenerate(changed + removed)
+
+        new_state = self._root_snapshot()
+        changed, removed = diff_snapshots(self.state, new_state)
+        self.state = new_state
+        for rel in removed:
+            print(f"[-] Removed {rel}")
+            if self.cache is not None:
+                self.cache.invalidate(rel)
+        for rel in changed:
+            self.process(rel)
+            work += 1
+        return work
+
+    def regenerate(self, templates):
+        print(f"[+] Templates changed: {', '.join(templates)}")
+        installer.read_template.cache_clear()
+        self.installer_files._names = None  # added/removed templates
+        try:
+            result = installer.create_project(root=str(self.root), files=self.installer_files, quiet=True)
+        except (KeyError, OSError, UnicodeDecodeError) as e:
+            print(f"[!] Installer failed: {e}")
+            return 0
+        for filepath in result['written']:
+            print(f"[+] Regenerated {filepath}")
+        # The written files are picked up (favicon, cache) by the root scan that follows
+        return len(result['written'])
+
+    def process(self, rel):
+        path = self.root / rel
+        ext = os.path.splitext(rel)[1].lower()
+        if ext == '.html':
+            result = add_favicon.apply_head_rules(path, rules=self.rules)
+            add_favicon.print_result(result)
+        if self.build_assets and ext in build_static.COMPRESS_EXTENSIONS:
+            result = build_static.build_file(path)
+            if result.error:
+                print(f"[!] Error building {rel}: {result.error}")
+            else:
+                print(f"[+] Built {rel} (gz {result.gz}, br {result.br})")
+        elif ext != '.html':
+            print(f"[+] Changed {rel}")
+        # Our own rewrite must not look like a new change on the next poll
+        signature = stat_signature(path)
+        if signature is not None:
+            self.state[rel] = signature
+        if self.cache is not None:
+            self.cache.invalidate(rel)
+
+    def run(self, interval, stop):
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                self.poll()
+            except Exception as e:  # keep watching whatever a single pass hits
+                print(f"[!] Watch pass failed: {e}")
+            stop.wait(max(interval - (time.perf_counter() - started), 0.05))
+
+
+# ---------------------------------------------------------
+# In-memory cache
+# ---------------------------------------------------------
+
+class CacheEntry:
+    """One file: plain bytes plus its compressed variants"""
+
+    def __init__(self, data, content_type, compress, signature):
+        self.signature = signature  # (mtime_ns, size) of the file that was read
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha256(data).hexdigest()[:20]}"'
+        self.variants = {'identity': data}
+        if compress and len(data) >= build_static.MIN_COMPRESS_SIZE:
+            gz = gzip.compress(data, compresslevel=6, mtime=0)
+            if len(gz) < len(data):
+                self.variants['gzip'] = gz
+            if brotli is not None:
+                br = brotli.compress(data, quality=5)
+                if len(br) < len(data):
+                    self.variants['br'] = br
+        self.size = sum(len(body) for body in self.variants.values())
+
+    def variant_etag(self, encoding):
+        # Each encoding is a different representation, so it gets its own validator
+        return self.etag if encoding == 'identity' else f'{self.etag[:-1]}-{encoding}"'
+
+
+class FileCache:
+    """LRU of CacheEntry keyed by relative path, bounded by total bytes"""
+
+    def __init__(self, root, max_bytes=DEFAULT_CACHE_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, rel):
+        """Entry for rel, re-read when the file no longer matches the cached stat"""
+        signature = stat_signature(self.root / rel)
+        with self.lock:
+            entry = self.entries.get(rel)
+            if entry is not None and entry.signature == signature:
+                self.entries.move_to_end(rel)
+                self.hits += 1
+                return entry
+        with open(self.root / rel, 'rb') as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+        content_type = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+        compress = os.path.splitext(rel)[1].lower() in build_static.COMPRESS_EXTENSIONS
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml',
+                                                                'application/json'):
+            content_type += '; charset=utf-8'
+        entry = CacheEntry(data, content_type, compress, (st.st_mtime_ns, st.st_size))
+        with self.lock:
+            self.misses += 1
+            # A racing invalidation may have dropped this path meanwhile; storing it
+            # anyway is safe, since the next hit compares the stat again
+            if entry.size <= self.max_bytes:
+                self._drop(rel)
+                self.entries[rel] = entry
+                self.bytes += entry.size
+                while self.bytes > self.max_bytes:
+                    self._drop(next(iter(self.entries)))
+        return entry
+
+    def _drop(self, rel):
+        entry = self.entries.pop(rel, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def invalidate(self, rel):
+        with self.lock:
+            self._drop(rel)
+
+
+# ---------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------
+
+def accepted_encodings(header):
+    """Codings the client accepts (q > 0), e.g. {'gzip', 'br'}"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'JakobDev/1.0'
+    protocol_version = 'HTTP/1.1'  # keep-alive; every response sets Content-Length
+    cache = None  # FileCache, set by make_server()
+    verbose = False
+
+    def resolve(self):
+        """Relative file path for the request, or an HTTP error status"""
+        path = unquote(urlsplit(self.path).path)
+        parts = [part for part in path.split('/') if part]
+        if any(part.startswith('.') for part in parts):
+            return HTTPStatus.NOT_FOUND
+        rel = posixpath.join(*parts) if parts else ''
+        full = self.cache.root / rel
+        if full.is_dir():
+            if parts and not path.endswith('/'):
+                return HTTPStatus.MOVED_PERMANENTLY
+            rel = posixpath.join(rel, 'index.html') if rel else 'index.html'
+            full = self.cache.root / rel
+        if os.path.splitext(rel)[1].lower() in BLOCKED_EXTENSIONS or posixpath.basename(rel) in BLOCKED_NAMES:
+            return HTTPStatus.FORBIDDEN
+        if not full.is_file():
+            return HTTPStatus.NOT_FOUND
+        return rel
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        rel = self.resolve()
+        if rel == HTTPStatus.MOVED_PERMANENTLY:
+            self.send_response(rel)
+            self.send_header('Location', urlsplit(self.path).path + '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if isinstance(rel, HTTPStatus):
+            self.send_error(rel)
+            return
+        try:
+            entry = self.cache.get(rel)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        encoding = next((name for name in ('br', 'gzip') if name in entry.variants and name in accepted),
+                        'identity')
+        etag = entry.variant_etag(encoding)
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        body = entry.variants[encoding]
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', entry.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')  # always revalidate; 304s are cheap
+        if len(entry.variants) > 1:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+
+def make_server(root, host, port, cache_bytes=DEFAULT_CACHE_BYTES, verbose=False):
+    handler = type('Handler', (DevRequestHandler,), {
+        'cache': FileCache(root, cache_bytes),
+        'verbose': verbose,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root', nargs='?', type=Path,
+                        help='directory to watch and serve (default: project root; '
+                             'required with --installer)')
+    parser.add_argument('--host', default='127.0.0.1', help='address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='port to serve on (default: 8000)')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f'seconds between polls (default: {DEFAULT_INTERVAL})')
+    parser.add_argument('--rules', type=Path,
+                        help="extra <head> rules, as for add-favicon.py --rules")
+    parser.add_argument('--build-static', action='store_true',
+                        help='rebuild .gz/.br variants of changed assets on disk')
+    parser.add_argument('--installer', action='store_true',
+                        help='regenerate the installer project into root when templates change')
+    parser.add_argument('--variant', action='append', default=[],
+                        help='installer template variant (partitioned, pooled, timing); repeatable')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+                        help='in-memory cache budget in MB (default: %(default)s)')
+    parser.add_argument('--no-serve', action='store_true', help='watch only')
+    parser.add_argument('--no-gitignore', action='store_true',
+                        help='also watch files that .gitignore excludes')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every request')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Watch (and serve) until interrupted"""
+    args = parse_args(argv)
+    if args.installer and (args.root is None or args.root.resolve() == HERE):
+        sys.exit("[!] --installer needs an explicit root outside the repository, e.g. /tmp/jakob")
+    root = (args.root or HERE).resolve()
+
+    rules = list(add_favicon.HEAD_RULES)
+    if args.rules:
+        rules += add_favicon.load_rules(args.rules)
+    installer_files = None
+    if args.installer:
+        try:
+            installer_files = installer.TemplateSet(variants=tuple(args.variant))
+        except KeyError as e:
+            sys.exit(f"[!] {e}")
+        result = installer.create_project(root=str(root), files=installer_files, quiet=True)
+        print(f"[+] Installer project in {root}: {len(result['written'])} written, "
+              f"{len(result['unchanged'])} unchanged")
+
+    server = None
+    cache = None
+    if not args.no_serve:
+        server = make_server(root, args.host, args.port, args.cache_mb * 1024 * 1024, args.verbose)
+        cache = server.RequestHandlerClass.cache
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    start = time.perf_counter()
+    watcher = Watcher(root, rules, cache, args.build_static, installer_files, not args.no_gitignore)
+    print(f"[OK] Watching {len(watcher.state)} files in {root} "
+          f"(initial scan {time.perf_counter() - start:.2f}s, every {args.interval}s)")
+    if server is not None:
+        host, port = server.server_address[:2]
+        print(f"[OK] Serving on http://{host}:{port}/  (Ctrl+C to stop)")
+
+    stop = threading.Event()
+    try:
+        watcher.run(args.interval, stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    print(f"\n{'='*50}")
+    print(f"Summary:")
+    print(f"  Files watched: {len(watcher.state)}")
+    if cache is not None:
+        print(f"  Cache: {cache.hits} hits, {cache.misses} misses, {len(cache.entries)} entries "
+              f"({cache.bytes} bytes)")
+    print(f"{'='*50}")
+
+
+if __name__ == '__main__':
+    main()
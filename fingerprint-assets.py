@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Write content-hashed copies of assets/ and point every HTML reference at them"""
+
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from treewalk import walk_files
+
+# Assets live under this directory, relative to the project root
+ASSETS_DIR = 'assets'
+
+# Default manifest location, relative to the project root
+MANIFEST_NAME = 'assets-manifest.json'
+
+# Hex digits of the content hash kept in file names: user-data.3f2a9c1b0e.js
+HASH_LENGTH = 10
+HASHED_NAME_RE = re.compile(rf'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<ext>\.[^./]+)$')
+
+# src="..." / href="..." attribute values
+REFERENCE_RE = re.compile(r'''(?P<attr>\b(?:src|href)\s*=\s*)(?P<quote>["'])(?P<url>[^"']+)(?P=quote)''',
+                          re.IGNORECASE)
+
+
+def hashed_name(logical_path, digest):
+    """assets/js/user-data.js -> assets/js/user-data.<hash>.js"""
+    stem, ext = posixpath.splitext(logical_path)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def logical_name(path):
+    """Strip a fingerprint from a path, if it has one"""
+    directory, name = posixpath.split(path)
+    match = HASHED_NAME_RE.match(name)
+    if not match:
+        return path
+    return posixpath.join(directory, match.group('stem') + match.group('ext'))
+
+
+def hash_file(file_path):
+    """sha256 of a file, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def scan_tree(root_dir, use_gitignore=True):
+    """One walk of root_dir: (logical asset paths, HTML page paths), both relative"""
+    assets, pages = [], []
+    prefix = ASSETS_DIR + '/'
+    for rel, entry in walk_files(root_dir, use_gitignore=use_gitignore):
+        if rel.startswith(prefix):
+            if not HASHED_NAME_RE.match(entry.name) and not entry.name.endswith(('.gz', '.br')):
+                assets.append(rel)
+        elif entry.name.lower().endswith('.html'):
+            pages.append(rel)
+    return sorted(assets), pages
+
+
+def load_manifest(manifest_path):
+    """Previous manifest, or an empty one"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {'assets': {}, 'pages': {}}
+    data.setdefault('assets', {})
+    data.setdefault('pages', {})
+    return data
+
+
+def save_manifest(manifest_path, manifest):
+    """Atomically write the manifest"""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, manifest_path)
+
+
+def _same_stat(entry, st):
+    return entry is not None and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size
+
+
+def fingerprint_assets(root_dir, logical_paths, old_assets, jobs, keep_old=False):
+    """Hash changed assets and write their fingerprinted copies
+
+    Returns (new asset entries, set of logical paths whose hash changed).
+    Assets whose mtime and size match the manifest are not re-read.
+    """
+    stats = {path: (root_dir / path).stat() for path in logical_paths}
+    to_hash = [path for path in logical_paths
+               if not _same_stat(old_assets.get(path), stats[path])
+               or not (root_dir / old_assets[path]['hashed']).exists()]
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        digests = dict(zip(to_hash, executor.map(lambda p: hash_file(root_dir / p), to_hash)))
+
+    new_assets = {}
+    changed = set()
+    for path in logical_paths:
+        if path not in digests:
+            new_assets[path] = old_assets[path]
+            continue
+
+        st = stats[path]
+        digest = digests[path]
+        hashed = hashed_name(path, digest)
+        if not (root_dir / hashed).exists():
+            shutil.copy2(root_dir / path, root_dir / hashed)
+            print(f"[+] {path} -> {hashed}")
+
+        old = old_assets.get(path)
+        if old is None or old['hashed'] != hashed:
+            changed.add(path)
+            if old is not None and not keep_old and (root_dir / old['hashed']).exists():
+                os.remove(root_dir / old['hashed'])
+
+        new_assets[path] = {'hashed': hashed, 'sha256': digest,
+                            'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+    # Assets deleted from the tree take their fingerprinted copy with them
+    for path, old in old_assets.items():
+        if path not in new_assets:
+            changed.add(path)
+            if not keep_old and (root_dir / old['hashed']).exists():
+                os.remove(root_dir / old['hashed'])
+
+    return new_assets, changed
+
+
+def rewrite_references(content, page_path, assets):
+    """Point src/href values at fingerprinted assets
+
+    page_path is the page's path relative to the root; relative and
+    root-relative URLs are both understood. A reference to an asset that no
+    longer exists goes back to its un-fingerprinted URL, so it is picked up
+    again if the asset returns. Returns (content, referenced logical asset
+    paths, missing logical asset paths).
+    """
+    page_dir = posixpath.dirname(page_path)
+    refs = set()
+    missing = set()
+
+    def replace(match):
+        url = match.group('url')
+        if '://' in url or url.startswith(('//', 'data:', '#', 'mailto:')):
+            return match.group(0)
+
+        path, sep, suffix = url, '', ''
+        split = re.search(r'[?#]', url)
+        if split:
+            path, sep, suffix = url[:split.start()], url[split.start()], url[split.end():]
+
+        if path.startswith('/'):
+            resolved = posixpath.normpath(path.lstrip('/'))
+        else:
+            resolved = posixpath.normpath(posixpath.join(page_dir, path))
+
+        logical = logical_name(resolved)
+        entry = assets.get(logical)
+        if entry is not None:
+            new_name = posixpath.basename(entry['hashed'])
+        elif logical.startswith(ASSETS_DIR + '/'):
+            missing.add(logical)
+            new_name = posixpath.basename(logical)
+        else:
+            return match.group(0)
+
+        refs.add(logical)
+        new_path = posixpath.join(posixpath.dirname(path), new_name)
+        return f"{match.group('attr')}{match.group('quote')}{new_path}{sep}{suffix}{match.group('quote')}"
+
+    return REFERENCE_RE.sub(replace, content), refs, missing
+
+
+def rewrite_page(root_dir, page_path, assets):
+    """Rewrite one page; returns (written, referenced logical assets, missing ones)"""
+    file_path = root_dir / page_path
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        content = f.read()
+
+    new_content, refs, missing = rewrite_references(content, page_path, assets)
+    if new_content == content:
+        return False, refs, missing
+
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(new_content)
+    shutil.copymode(file_path, tmp_path)
+    os.replace(tmp_path, file_path)
+    return True, refs, missing
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('root', nargs='?', type=Path, default=Path(__file__).parent,
+                        help='project root (default: this directory)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of parallel hashing workers (default: CPU count)')
+    parser.add_argument('--manifest', type=Path,
+                        help=f'manifest path (default: <root>/{MANIFEST_NAME})')
+    parser.add_argument('--keep-old', action='store_true',
+                        help='keep superseded fingerprinted copies for stale clients')
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the manifest and rehash everything')
+    parser.add_argument('--no-gitignore', action='store_true',
+                        help='also scan directories and files that .gitignore excludes')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fingerprint assets and rewrite HTML references"""
+    args = parse_args(argv)
+    root_dir = args.root
+    manifest_path = args.manifest or root_dir / MANIFEST_NAME
+    start = time.perf_counter()
+
+    old = {'assets': {}, 'pages': {}} if args.force else load_manifest(manifest_path)
+    # Skips .git and whatever .gitignore excludes
+    logical_paths, page_paths = scan_tree(root_dir, not args.no_gitignore)
+    assets, changed = fingerprint_assets(root_dir, logical_paths, old['assets'],
+                                         max(args.jobs, 1), args.keep_old)
+
+    pages = {}
+    rewritten = 0
+    untouched = 0
+    broken = 0
+    for page_path in page_paths:
+        html_file = root_dir / page_path
+        entry = old['pages'].get(page_path)
+        # Unchanged pages that reference no changed asset are not opened
+        if _same_stat(entry, html_file.stat()) and not changed.intersection(entry['refs']):
+            pages[page_path] = entry
+            missing = entry.get('missing', [])
+            untouched += 1
+        else:
+            try:
+                written, refs, missing = rewrite_page(root_dir, page_path, assets)
+            except Exception as e:
+                print(f"[!] Error processing {page_path}: {e}")
+                continue
+            if written:
+                rewritten += 1
+                print(f"[+] Rewrote references in {page_path}")
+            else:
+                untouched += 1
+            st = html_file.stat()
+            pages[page_path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                                'refs': sorted(refs), 'missing': sorted(missing)}
+        for logical in sorted(missing):
+            print(f"[!] {page_path}: {logical} does not exist")
+        broken += len(missing)
+
+    save_manifest(manifest_path, {'assets': assets, 'pages': pages})
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'='*50}")
+    print(f"Summary:")
+    print(f"  Assets: {len(assets)} ({len(changed)} changed)")
+    print(f"  Pages rewritten: {rewritten}")
+    print(f"  Pages unchanged: {untouched}")
+    print(f"  Missing asset references: {broken}")
+    print(f"  Manifest: {manifest_path}")
+    print(f"  Elapsed: {elapsed:.2f}s")
+    print(f"{'='*50}")
+
+
+if __name__ == '__main__':
+    main()
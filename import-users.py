@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Bulk-import creators/donors from a partner CSV into the users table
+
+Each row is cleaned exactly like api/inscription.php does it:
+
+  - username: drop everything but [a-zA-Z0-9_], then lowercase
+  - telephone: keep digits only; 8-digit numbers get the 509 prefix
+
+Rows are handled in batches: duplicates within the file are caught
+in memory, then each batch is COPYed into a temporary staging table and
+moved into users with a single INSERT ... ON CONFLICT DO NOTHING, which
+also rejects usernames or phones already in the database (including
+ones taken by a concurrent sign-up). Every rejected row ends up in a
+CSV report with its line number and reason.
+
+    import-users.py partners.csv --dsn "dbname=jakob_db" --creators
+    import-users.py partners.csv --dry-run      # validate only, no database
+"""
+
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+    try:
+        import psycopg2
+    except ImportError:  # only --dry-run works without a driver
+        psycopg2 = None
+
+BATCH_SIZE = 5000
+
+# Column widths from database.sql
+MAX_USERNAME = 50
+MAX_TELEPHONE = 20
+MAX_NAME = 50
+
+USERNAME_STRIP_RE = re.compile(r'[^a-zA-Z0-9_]')
+PHONE_STRIP_RE = re.compile(r'[^0-9]')
+
+TRUE_VALUES = {'1', 't', 'true', 'y', 'yes', 'o', 'oui'}
+
+STAGING_SQL = """\
+CREATE TEMPORARY TABLE IF NOT EXISTS users_import (
+    line INTEGER,
+    username VARCHAR(50),
+    telephone VARCHAR(20),
+    prenom VARCHAR(50),
+    nom VARCHAR(50),
+    is_creator BOOLEAN
+) ON COMMIT DELETE ROWS"""
+
+MERGE_SQL = """\
+INSERT INTO users (username, telephone, prenom, nom, is_creator, active)
+SELECT username, telephone, prenom, nom, is_creator, TRUE FROM users_import ORDER BY line
+ON CONFLICT DO NOTHING
+RETURNING username"""
+
+
+def clean_usernames(values):
+    """inscription.php: strtolower(preg_replace('/[^a-zA-Z0-9_]/', '', ...))"""
+    strip = USERNAME_STRIP_RE.sub
+    return [strip('', value).lower() for value in values]
+
+
+def clean_phones(values):
+    """inscription.php: digits only, '509' prefix for 8-digit numbers"""
+    strip = PHONE_STRIP_RE.sub
+    phones = [strip('', value) for value in values]
+    return ['509' + phone if len(phone) == 8 else phone for phone in phones]
+
+
+def read_batches(csv_path, batch_size):
+    """(line number, row dict) lists of at most batch_size rows"""
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        missing = {'username', 'telephone'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"missing column(s): {', '.join(sorted(missing))}")
+        batch = []
+        for row in reader:
+            batch.append((reader.line_num, row))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class Importer:
+    """Validates and dedupes batches; remembers what the file already used"""
+
+    def __init__(self, default_creator=False):
+        self.default_creator = default_creator
+        self.seen_usernames = {}
+        self.seen_phones = {}
+        self.rejected = []
+
+    def reject(self, line, row, reason):
+        self.rejected.append((line, row.get('username', ''), row.get('telephone', ''), reason))
+
+    def prepare(self, batch):
+        """Clean a batch; returns the rows worth sending to the database"""
+        usernames = clean_usernames([row.get('username') or '' for _, row in batch])
+        phones = clean_phones([row.get('telephone') or '' for _, row in batch])
+
+        accepted = []
+        for (line, row), username, phone in zip(batch, usernames, phones):
+            prenom = (row.get('prenom') or '').strip() or None
+            nom = (row.get('nom') or '').strip() or None
+            if not (row.get('username') or '').strip() or not (row.get('telephone') or '').strip():
+                self.reject(line, row, 'username and telephone are required')
+            elif not username:
+                self.reject(line, row, 'username is empty after cleaning')
+            elif len(username) > MAX_USERNAME:
+                self.reject(line, row, f'username longer than {MAX_USERNAME} characters')
+            elif not phone or len(phone) > MAX_TELEPHONE:
+                self.reject(line, row, 'invalid telephone')
+            elif len(prenom or '') > MAX_NAME or len(nom or '') > MAX_NAME:
+                self.reject(line, row, f'prenom/nom longer than {MAX_NAME} characters')
+            elif username in self.seen_usernames:
+                self.reject(line, row, f'duplicate username in file (line {self.seen_usernames[username]})')
+            elif phone in self.seen_phones:
+                self.reject(line, row, f'duplicate telephone in file (line {self.seen_phones[phone]})')
+            else:
+                self.seen_usernames[username] = line
+                self.seen_phones[phone] = line
+                creator = row.get('is_creator')
+                is_creator = (creator.strip().lower() in TRUE_VALUES) if creator else self.default_creator
+                accepted.append((line, username, phone, prenom, nom, is_creator))
+        return accepted
+
+
+def copy_text(value):
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    # Partner data can hold anything: escape per COPY text format
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_payload(rows):
+    return ''.join('\t'.join(copy_text(v) for v in row) + '\n' for row in rows)
+
+
+def connect(dsn):
+    if psycopg is not None:
+        return psycopg.connect(dsn)
+    if psycopg2 is not None:
+        return psycopg2.connect(dsn)
+    sys.exit("[!] psycopg (or psycopg2) is required; use --dry-run to only validate the file")
+
+
+def copy_into_staging(cursor, payload):
+    sql = "COPY users_import (line, username, telephone, prenom, nom, is_creator) FROM STDIN"
+    if psycopg is not None:
+        with cursor.copy(sql) as copy:
+            copy.write(payload)
+    else:
+        cursor.copy_expert(sql, io.StringIO(payload))
+
+
+def load_batch(conn, importer, rows):
+    """COPY rows to staging and merge them into users in one transaction
+
+    Returns the number of users inserted; rows the database refused are
+    added to the importer's rejects.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(STAGING_SQL)
+        copy_into_staging(cursor, copy_payload(rows))
+        cursor.execute(MERGE_SQL)
+        inserted = {row[0] for row in cursor.fetchall()}
+    conn.commit()
+
+    for line, username, phone, *_ in rows:
+        if username not in inserted:
+            importer.rejected.append((line, username, phone, 'username or telephone already registered'))
+    return len(inserted)
+
+
+def write_report(report_path, rejected):
+    tmp_path = f"{report_path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['line', 'username', 'telephone', 'reason'])
+        writer.writerows(sorted(rejected))
+    os.replace(tmp_path, report_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', type=Path,
+                        help='CSV with username and telephone columns (optional: prenom, nom, is_creator)')
+    parser.add_argument('--dsn', default=os.environ.get('JAKOB_DSN', ''),
+                        help='libpq connection string (default: $JAKOB_DSN, then the PG* variables)')
+    parser.add_argument('--creators', action='store_true',
+                        help='mark rows as creators when the file has no is_creator column')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'rows per COPY/merge round trip (default: {BATCH_SIZE})')
+    parser.add_argument('--report', type=Path,
+                        help='rejected rows CSV (default: <csv>.rejected.csv)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='clean and dedupe the file only; nothing is sent to the database')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Import the partner file"""
+    args = parse_args(argv)
+    report_path = args.report or args.csv.with_name(args.csv.name + '.rejected.csv')
+    start = time.perf_counter()
+
+    importer = Importer(default_creator=args.creators)
+    conn = None if args.dry_run else connect(args.dsn)
+    rows_read = accepted = inserted = 0
+    try:
+        for batch in read_batches(args.csv, max(args.batch_size, 1)):
+            rows_read += len(batch)
+            rows = importer.prepare(batch)
+            accepted += len(rows)
+            if conn is not None and rows:
+                inserted += load_batch(conn, importer, rows)
+                print(f"[+] {rows_read:,} rows read, {inserted:,} inserted")
+    except ValueError as e:
+        sys.exit(f"[!] {args.csv}: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+    write_report(report_path, importer.rejected)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'='*50}")
+    print(f"Summary:")
+    print(f"  Rows read: {rows_read:,}")
+    if args.dry_run:
+        print(f"  Valid (not imported, dry run): {accepted:,}")
+    else:
+        print(f"  Inserted: {inserted:,}")
+    print(f"  Rejected: {len(importer.rejected):,} -> {report_path}")
+    print(f"  Elapsed: {elapsed:.2f}s")
+    print(f"{'='*50}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,517 +1,507 @@
+import argparse
+import difflib
+import functools
+import hashlib
+import json
 import os
-
-# Définition de la structure du projet et du contenu des fichiers
-project_files = {
-    # ---------------------------------------------------------
-    # 1. BASE DE DONNÉES (SQL)
-    # ---------------------------------------------------------
-    "database.sql": """
--- SCHEMA DE BASE DE DONNEES JAKOB
--- A importer dans PostgreSQL
-
--- 1. TABLE UTILISATEURS
-CREATE TABLE IF NOT EXISTS users (
-    id SERIAL PRIMARY KEY,
-    username VARCHAR(50) UNIQUE NOT NULL,
-    telephone VARCHAR(20) UNIQUE NOT NULL,
-    prenom VARCHAR(50), -- Optionnel
-    nom VARCHAR(50),    -- Optionnel
-    is_creator BOOLEAN DEFAULT FALSE,
-    active BOOLEAN DEFAULT TRUE,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
-
--- 2. TABLE TRANSACTIONS
-CREATE TABLE IF NOT EXISTS transactions_jakob (
-    id BIGSERIAL PRIMARY KEY,
-    user_id INTEGER, -- NULL si anonyme
-    recipient_id INTEGER NOT NULL REFERENCES users(id),
-    montant_brut NUMERIC(12,2) NOT NULL CHECK (montant_brut >= 50),
-    platform_fee NUMERIC(12,2) NOT NULL DEFAULT 0,
-    canal VARCHAR(20) CHECK (canal IN ('MONCASH', 'NATCASH')),
-    reference_externe VARCHAR(100) UNIQUE,
-    statut VARCHAR(20) DEFAULT 'PENDING',
-    metadata JSONB DEFAULT '{}',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
-
--- DONNEES DE TEST
-INSERT INTO users (username, telephone, is_creator) 
-VALUES ('megantheestallion', '50900000000', TRUE)
-ON CONFLICT DO NOTHING;
-""",
-
-    # ---------------------------------------------------------
-    # 2. CONFIGURATION BACKEND
-    # ---------------------------------------------------------
-    "db.php": """<?php
-// db.php
-// Configuration sécurisée de la base de données
-$host = 'localhost';
-$db   = 'jakob_db';
-$user = 'postgres'; 
-$pass = 'ton_mot_de_passe'; // <--- CHANGE CECI
-$port = "5432";
-
-try {
-    $pdo = new PDO("pgsql:host=$host;port=$port;dbname=$db", $user, $pass, [
-        PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
-        PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC
-    ]);
-} catch (\\PDOException $e) {
-    http_response_code(500);
-    // En prod : error_log($e->getMessage());
-    die(json_encode(["error" => "Erreur de connexion BDD. Vérifiez db.php"]));
-}
-?>""",
-
-    # ---------------------------------------------------------
-    # 3. API (LOGIQUE MÉTIER)
-    # ---------------------------------------------------------
-    "api/inscription.php": """<?php
-header("Access-Control-Allow-Origin: *");
-header("Content-Type: application/json");
-require_once '../db.php';
-
-$input = json_decode(file_get_contents("php://input"), true);
-
-// Validation
-if (empty($input['username']) || empty($input['telephone'])) {
-    http_response_code(400);
-    echo json_encode(["error" => "Username et Téléphone requis."]);
-    exit;
-}
-
-// Nettoyage
-$username = strtolower(preg_replace('/[^a-zA-Z0-9_]/', '', $input['username']));
-$phone = preg_replace('/[^0-9]/', '', $input['telephone']);
-if (strlen($phone) == 8) $phone = '509' . $phone;
-
-try {
-    // Vérification doublons
-    $check = $pdo->prepare("SELECT id FROM users WHERE telephone = ? OR username = ?");
-    $check->execute([$phone, $username]);
-    if ($check->fetch()) {
-        throw new Exception("Ce numéro ou ce nom d'utilisateur est déjà pris.");
-    }
-
-    // Insertion
-    $stmt = $pdo->prepare("INSERT INTO users (username, telephone, active) VALUES (?, ?, TRUE)");
-    $stmt->execute([$username, $phone]);
-
-    http_response_code(201);
-    echo json_encode(["success" => true]);
-
-} catch (Exception $e) {
-    http_response_code(400);
-    echo json_encode(["error" => $e->getMessage()]);
+import re
+import shutil
+import sys
+import tempfile
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# ---------------------------------------------------------
+# TEMPLATES (chargés à la demande)
+# ---------------------------------------------------------
+# Chaque fichier de templates/ donne le fichier du même chemin dans le projet
+# généré. Les marqueurs {{ variable }} sont remplacés par les variables du
+# tenant ; rien n'est lu au chargement du module.
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+# Variantes optionnelles : template_variants/<nom>/ remplace les fichiers de
+# même chemin dans templates/ (ex. partitioned/_partials/transactions.sql).
+VARIANTS_DIR = Path(__file__).resolve().parent / "template_variants"
+
+# Jamais des templates : variantes compressées, fichiers temporaires, manifestes
+NON_TEMPLATE_SUFFIXES = (".gz", ".br", ".tmp")
+# Seuls fichiers cachés qui sont de vrais templates
+TEMPLATE_DOTFILES = {".htaccess"}
+# Morceaux inclus par une ligne {{> nom }} ; jamais écrits tels quels. Une
+# variante ne remplace ainsi que la partie qui change (ex. la table partitionnée).
+PARTIALS_DIR = "_partials"
+
+
+def is_template(relpath):
+    """Vrai pour un vrai fichier de template (pas de fichier caché ni d'artefact de build)."""
+    parts = Path(relpath).parts
+    hidden = any(part.startswith(".") and part not in TEMPLATE_DOTFILES for part in parts)
+    return (not hidden and parts[0] != PARTIALS_DIR
+            and not relpath.endswith(NON_TEMPLATE_SUFFIXES))
+
+DEFAULT_VARIABLES = {
+    "site_name": "JaKòb",
+    "main_color": "#2b7a78",
+    "accent_color": "#f7c59f",
+    "db_host": "localhost",
+    "db_port": "5432",
+    "db_name": "jakob_db",
+    "db_user": "postgres",
+    "db_password": "ton_mot_de_passe",
+    "fee_rate": "0.05",
+    # Profil poolé (--pooled) : PgBouncer et dimensionnement du pool
+    "pgbouncer_port": "6432",
+    "php_workers": "16",
+    "web_servers": "1",
+    "db_max_connections": "100",
+    # Instrumentation (--timing) : journal JSON des durées ; un chemin relatif
+    # part du dossier parent du projet, pour rester hors de la racine web
+    "timing_log": "jakob-timing.jsonl",
 }
-?>""",
-
-    "api/don.php": """<?php
-header("Access-Control-Allow-Origin: *");
-header("Content-Type: application/json");
-require_once '../db.php';
-
-$input = json_decode(file_get_contents("php://input"), true);
 
-if (empty($input['createurId']) || empty($input['montant']) || empty($input['canal'])) {
-    http_response_code(400);
-    echo json_encode(["error" => "Données incomplètes."]);
-    exit;
-}
-
-$fee = round($input['montant'] * 0.05, 2);
-
-try {
-    // Vérif créateur
-    $stmt = $pdo->prepare("SELECT id FROM users WHERE id = ? AND is_creator = TRUE");
-    $stmt->execute([$input['createurId']]);
-    if (!$stmt->fetch()) throw new Exception("Créateur introuvable.");
-
-    // Insertion Transaction
-    $sql = "INSERT INTO transactions_jakob 
-            (recipient_id, montant_brut, platform_fee, canal, reference_externe, statut) 
-            VALUES (?, ?, ?, ?, ?, 'PENDING')";
-    
-    $pdo->prepare($sql)->execute([
-        $input['createurId'],
-        $input['montant'],
-        $fee,
-        $input['canal'],
-        $input['idempotencyKey']
-    ]);
-
-    // Succès
-    echo json_encode([
-        "success" => true,
-        "payment_url" => "thanks.html" 
-    ]);
-
-} catch (Exception $e) {
-    // Idempotence
-    if ($e instanceof PDOException && $e->getCode() == '23505') {
-         echo json_encode(["success" => true, "payment_url" => "thanks.html"]);
-         exit;
+# Connexions PostgreSQL gardées hors du pool (superuser, migrations, psql...)
+ADMIN_CONNECTIONS = 5
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Une inclusion occupe toute sa ligne, remplacée par le morceau
+INCLUDE_RE = re.compile(r"^\{\{>\s*([\w.-]+)\s*\}\}\r?\n", re.MULTILINE)
+
+
+def render_template(text, variables):
+    """Remplace les {{ variable }} ; une variable inconnue est une erreur."""
+    def replace(match):
+        name = match.group(1)
+        if name not in variables:
+            raise KeyError(f"Variable de template inconnue : {name}")
+        return str(variables[name])
+    return PLACEHOLDER_RE.sub(replace, text)
+
+
+@functools.lru_cache(maxsize=32)
+def read_template(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+class TemplateSet(Mapping):
+    """Fichiers du projet, lus et rendus un par un à l'accès."""
+
+    def __init__(self, directory=TEMPLATES_DIR, variables=None, variants=()):
+        self.directory = Path(directory)
+        self.variant_dirs = [VARIANTS_DIR / name for name in variants]
+        for variant_dir in self.variant_dirs:
+            if not variant_dir.is_dir():
+                raise KeyError(f"Variante de template inconnue : {variant_dir.name}")
+        self.variables = {**DEFAULT_VARIABLES, **(variables or {})}
+        self.variables.setdefault("site_initial", self.variables["site_name"][:1])
+        for name, value in pool_sizing(self.variables["php_workers"], self.variables["web_servers"],
+                                       self.variables["db_max_connections"]).items():
+            self.variables.setdefault(name, value)
+        self._names = None
+
+    def _list(self):
+        if self._names is None:
+            self._names = sorted({
+                relpath
+                for directory in [self.directory, *self.variant_dirs]
+                for path in directory.rglob("*") if path.is_file()
+                for relpath in [path.relative_to(directory).as_posix()] if is_template(relpath)
+            })
+        return self._names
+
+    def _path(self, filepath):
+        """Fichier source : la dernière variante qui le définit, sinon templates/."""
+        for directory in reversed(self.variant_dirs):
+            if (directory / filepath).is_file():
+                return directory / filepath
+        return self.directory / filepath
+
+    def _include(self, match):
+        path = self._path(f"{PARTIALS_DIR}/{match.group(1)}")
+        if not path.is_file():
+            raise KeyError(f"Morceau de template inconnu : {match.group(1)}")
+        return read_template(path)
+
+    def __getitem__(self, filepath):
+        path = self._path(filepath)
+        if not path.is_file():
+            raise KeyError(filepath)
+        text = INCLUDE_RE.sub(self._include, read_template(path))
+        return render_template(text, self.variables)
+
+    def __iter__(self):
+        return iter(self._list())
+
+    def __len__(self):
+        return len(self._list())
+
+
+def pool_sizing(php_workers, web_servers, db_max_connections):
+    """Tailles PgBouncer déduites du nombre de workers PHP.
+
+    Chaque worker garde une connexion cliente persistante ; le pool serveur
+    ne dépasse ni le nombre de clients ni le budget PostgreSQL, réserve comprise.
+    """
+    clients = int(php_workers) * int(web_servers)
+    budget = max(int(db_max_connections) - ADMIN_CONNECTIONS, 2)
+    reserve = max(1, budget // 10)
+    pool = max(1, min(clients, budget - reserve))
+    return {
+        "max_client_conn": clients + clients // 4 + 10,
+        "pool_size": pool,
+        "min_pool_size": max(1, pool // 4),
+        "reserve_pool_size": reserve,
     }
-    http_response_code(400);
-    echo json_encode(["error" => $e->getMessage()]);
-}
-?>""",
-
-    # ---------------------------------------------------------
-    # 4. FRONTEND (HTML/PHP/CSS)
-    # ---------------------------------------------------------
-    "style.css": """/* style.css - Version Complète */
-:root {
-  --main-color: #2b7a78;
-  --accent-color: #f7c59f;
-  --text-dark: #17252a;
-  --text-light: #def2f1;
-  --white: #ffffff;
-}
-
-body {
-  font-family: 'Segoe UI', sans-serif;
-  background-color: var(--white);
-  color: var(--text-dark);
-  margin: 0; padding: 0;
-  line-height: 1.6;
-}
 
-.header {
-  display: flex;
-  justify-content: space-between;
-  align-items: center;
-  padding: 1rem;
-  background-color: var(--main-color);
-  color: var(--text-light);
-}
 
-.logo-container { display: flex; align-items: center; gap: 1rem; }
-.logo { width: 50px; height: 50px; border-radius: 50%; }
-.site-title { font-size: 1.5rem; }
-.menu-button { background: none; border: none; color: var(--text-light); font-size: 2rem; cursor: pointer; }
-
-/* Formulaires */
-.form-container, .profile-container {
-  max-width: 400px;
-  margin: 2rem auto;
-  padding: 2rem;
-  border-radius: 12px;
-  box-shadow: 0 4px 10px rgba(0,0,0,0.1);
-  text-align: center;
-}
-
-input, select, button {
-  width: 100%;
-  padding: 12px;
-  margin: 8px 0;
-  border-radius: 8px;
-  border: 1px solid #ddd;
-  box-sizing: border-box;
-}
+# Définition de la structure du projet et du contenu des fichiers
+project_files = TemplateSet()
+
+# ---------------------------------------------------------
+# CSS CRITIQUE (optionnel)
+# ---------------------------------------------------------
+STYLESHEET_LINK = '<link rel="stylesheet" href="style.css" />'
+
+# Chargement asynchrone de la feuille complète, avec repli sans JS
+ASYNC_STYLESHEET = (
+    '<link rel="preload" href="style.css" as="style" onload="this.onload=null;this.rel=\'stylesheet\'" />\n'
+    '  <noscript><link rel="stylesheet" href="style.css" /></noscript>'
+)
+
+
+def parse_css_rules(css):
+    """Découpe une feuille en [(sélecteurs, déclarations)] de premier niveau.
+
+    Les @media, @supports, @font-face... sont ignorés en entier, règles
+    internes comprises : inlinées hors de leur bloc, elles s'appliqueraient
+    sans condition. Les accolades sont comptées, chaînes exclues.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    rules = []
+    depth = 0
+    start = 0       # début du prélude (sélecteurs) en cours
+    opened = 0      # position de l'accolade ouvrante de la règle en cours
+    skipping = False
+    i, n = 0, len(css)
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            end = i + 1
+            while end < n and css[end] != c:
+                end += 2 if css[end] == '\\' else 1
+            i = end + 1
+            continue
+        if c == '{':
+            if depth == 0:
+                skipping = css[start:i].lstrip().startswith('@')
+                opened = i
+            depth += 1
+        elif c == '}' and depth:
+            depth -= 1
+            if depth == 0:
+                if not skipping:
+                    selectors = ' '.join(css[start:opened].split())
+                    body = ' '.join(css[opened + 1:i].split())
+                    body = re.sub(r'\s*([:;])\s*', r'\1', body).strip().rstrip(';')
+                    rules.append((selectors, body))
+                start = i + 1
+        elif c == ';' and depth == 0:
+            start = i + 1  # @import, @charset...
+        i += 1
+    return rules
+
+
+def page_selectors(html):
+    """Balises, classes et ids présents dans une page."""
+    tags = {t.lower() for t in re.findall(r'<([a-zA-Z][\w-]*)', html)}
+    classes = set()
+    for value in re.findall(r'class="([^"]*)"', html):
+        classes.update(value.split())
+    ids = set(re.findall(r'id="([^"]*)"', html))
+    return tags, classes, ids
+
+
+def selector_matches(selector, tags, classes, ids):
+    """Approximation prudente : chaque partie du sélecteur existe dans la page."""
+    selector = re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector)
+    selector = re.sub(r'\[[^\]]*\]', '', selector)
+    for compound in re.split(r'\s*[>+~]\s*|\s+', selector.strip()):
+        if not compound or compound == '*':
+            continue
+        tag = re.match(r'[a-zA-Z][\w-]*', compound)
+        if tag and tag.group(0).lower() not in tags:
+            return False
+        if not set(re.findall(r'\.([\w-]+)', compound)) <= classes:
+            return False
+        if not set(re.findall(r'#([\w-]+)', compound)) <= ids:
+            return False
+    return True
+
+
+def critical_css_for(html, rules):
+    """Règles de style.css utilisées par la page, minifiées."""
+    tags, classes, ids = page_selectors(html)
+    used = []
+    for selectors, body in rules:
+        if any(selector_matches(sel, tags, classes, ids) for sel in selectors.split(',')):
+            used.append(f"{selectors}{{{body}}}")
+    return ''.join(used)
+
+
+def inline_critical_css(content, rules):
+    """Injecte le CSS critique d'une page dans <head> et charge style.css en asynchrone.
+
+    Retourne (nouveau contenu, octets inlinés), ou (contenu, None) si la page
+    n'utilise pas style.css.
+    """
+    if STYLESHEET_LINK not in content:
+        return content, None
+    critical = critical_css_for(content, rules)
+    content = content.replace(
+        STYLESHEET_LINK, f"<style>{critical}</style>\n  {ASYNC_STYLESHEET}", 1)
+    return content, len(critical.encode("utf-8"))
+
+
+# ---------------------------------------------------------
+# RÉGÉNÉRATION IDEMPOTENTE
+# ---------------------------------------------------------
+# Fichiers que l'utilisateur doit personnaliser (mot de passe...) : créés
+# s'ils manquent, et jamais écrasés une fois modifiés à la main. Le manifeste
+# garde l'empreinte de ce que l'installeur a écrit en dernier, pour savoir
+# si le fichier a été touché depuis.
+USER_EDITED_FILES = {"db.php", "config/userlist.txt"}
+INSTALL_MANIFEST = ".installer-manifest.json"
+
+
+def rendered_bytes(content):
+    """Octets exacts qu'écrirait open(..., "w") sur cette plateforme."""
+    return content.replace("\n", os.linesep).encode("utf-8")
+
+
+def file_sha256(filepath):
+    """Empreinte du fichier existant, ou None s'il n'existe pas."""
+    try:
+        with open(filepath, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def write_atomic(filepath, data):
+    """Écrit via un fichier temporaire puis os.replace : jamais de fichier à moitié écrit."""
+    directory = os.path.dirname(filepath) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if os.path.exists(filepath):
+            shutil.copymode(filepath, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_install_manifest(manifest_path):
+    """{fichier: sha256 écrit par l'installeur}, ou {} si absent ou illisible."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def print_diff(filepath, data):
+    """Diff unifié entre le fichier sur disque et la version générée."""
+    try:
+        with open(filepath, "r", encoding="utf-8", newline="") as f:
+            old = f.read().splitlines(keepends=True)
+    except FileNotFoundError:
+        old = []
+    new = data.decode("utf-8").splitlines(keepends=True)
+    for line in difflib.unified_diff(old, new, f"a/{filepath}", f"b/{filepath}"):
+        sys.stdout.write(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n")
 
-.submit-btn, .validate-button {
-  background-color: var(--main-color);
-  color: white;
-  border: none;
-  font-weight: bold;
-  cursor: pointer;
-}
-.submit-btn:hover { opacity: 0.9; }
-
-/* Profil */
-.orbit-container { text-align: center; margin-top: 20px; }
-.profile-pic { width: 150px; height: 150px; border-radius: 50%; object-fit: cover; border: 4px solid var(--main-color); }
-.suggested-amounts { display: grid; grid-template-columns: 1fr 1fr; gap: 10px; margin-bottom: 10px; }
-.suggested-amounts button { background: #eef; border: 1px solid #ccc; color: #333; }
-
-/* --- AJOUTS FONCTIONNELS (Alertes) --- */
-.alert {
-  padding: 12px;
-  border-radius: 8px;
-  margin-bottom: 1rem;
-  text-align: center;
-  font-weight: 600;
-  font-size: 0.9rem;
-}
-.success { background-color: #dcfce7; color: #166534; border: 1px solid #bbf7d0; }
-.error { background-color: #fee2e2; color: #991b1b; border: 1px solid #fecaca; }
-
-/* Inputs spéciaux */
-.input-phone, select { border: 2px solid #ddd; outline: none; }
-.input-phone:focus { border-color: var(--main-color); }
-
-.username-group { position: relative; width: 100%; margin: 0.5rem 0; }
-.username-group span { position: absolute; left: 15px; top: 50%; transform: translateY(-50%); color: #555; font-weight: bold; }
-.username-group input { padding-left: 35px !important; }
-""",
-
-    "inscription-donateur.html": """<!DOCTYPE html>
-<html lang="fr">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0"/>
-  <title>Inscription Donateur</title>
-  <link rel="stylesheet" href="style.css" />
-</head>
-<body>
-  <header class="header">
-    <div class="logo-container">
-      <img src="https://tse1.mm.bing.net/th/id/OIP.j5cceZXE70QB1K-TcN3-PQHaHa?r=0&rs=1&pid=ImgDetMain&o=7&rm=3" alt="Logo" class="logo" />
-      <h1 class="site-title">JaKòb</h1>
-    </div>
-    <button class="menu-button" onclick="window.location.href='menu.html'">&#9776;</button>
-  </header>
-
-  <form id="registerForm" class="form-container">
-    <h2>Créer un compte</h2>
-    <div id="msgBox" class="alert" style="display:none;"></div>
-
-    <div class="username-group">
-        <span>@</span>
-        <input type="text" id="username" placeholder="nom_utilisateur" required autocomplete="off" />
-    </div>
-
-    <input type="tel" id="telephone" placeholder="Téléphone (Ex: 37000000)" required />
-    <label style="display:block; text-align:left; font-size:0.9rem;">
-        <input type="checkbox" style="width:auto;" required /> J'accepte les conditions
-    </label>
-    
-    <button type="submit" id="btnSubmit" class="submit-btn">S’inscrire</button>
-  </form>
-
-  <script>
-    document.getElementById('registerForm').addEventListener('submit', async (e) => {
-        e.preventDefault();
-        const btn = document.getElementById('btnSubmit');
-        const msg = document.getElementById('msgBox');
-        
-        btn.disabled = true; btn.innerText = "Traitement..."; msg.style.display = 'none';
-
-        try {
-            const res = await fetch('api/inscription.php', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({
-                    username: document.getElementById('username').value,
-                    telephone: document.getElementById('telephone').value
-                })
-            });
-            const data = await res.json();
-            if(!res.ok) throw new Error(data.error || "Erreur serveur");
-
-            msg.className = "alert success"; msg.innerText = "✅ Bienvenue !"; msg.style.display = 'block';
-            setTimeout(() => window.location.href = "thanks.html", 1500);
-
-        } catch (err) {
-            msg.className = "alert error"; msg.innerText = "⚠️ " + err.message; msg.style.display = 'block';
-            btn.disabled = false; btn.innerText = "S’inscrire";
-        }
-    });
-  </script>
-</body>
-</html>""",
-
-    "profil.php": """<?php
-require_once 'db.php';
-$id = $_GET['id'] ?? 1; // ID par défaut
-
-try {
-    $stmt = $pdo->prepare("SELECT id, username, prenom, nom FROM users WHERE id = ?");
-    $stmt->execute([$id]);
-    $user = $stmt->fetch();
-    
-    // Fallback si user non trouvé (pour éviter crash démo)
-    if (!$user) { 
-        $user = ['id' => 0, 'username' => 'Inconnu', 'prenom' => '', 'nom' => '']; 
-        $displayName = "Utilisateur Introuvable";
-    } else {
-        $displayName = $user['username'] ? "@" . $user['username'] : $user['prenom'];
-    }
-} catch (Exception $e) { die("Erreur système"); }
-?>
-<!DOCTYPE html>
-<html lang="fr">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>Profil de <?php echo htmlspecialchars($displayName); ?></title>
-  <link rel="stylesheet" href="style.css" />
-</head>
-<body>
-  <header class="header">
-    <div class="logo-container">
-      <img src="https://tse1.mm.bing.net/th/id/OIP.j5cceZXE70QB1K-TcN3-PQHaHa?r=0&rs=1&pid=ImgDetMain&o=7&rm=3" alt="Logo" class="logo" />
-      <h1 class="site-title">JaKòb</h1>
-    </div>
-    <button class="menu-button" onclick="window.location.href='menu.html'">&#9776;</button>
-  </header>
-
-  <main>
-    <div class="orbit-container">
-      <img src="https://ui-avatars.com/api/?name=<?php echo urlencode($displayName); ?>&background=random&size=256" alt="Profil" class="profile-pic" />
-    </div>
-
-    <div class="profile-container">
-      <h3 class="profile-name"><?php echo htmlspecialchars($displayName); ?></h3>
-      <p class="profile-bio">Merci pour votre soutien ! 🙏🏽</p>
-
-      <div id="donationMsg" class="alert" style="display:none;"></div>
-      <input type="hidden" id="createurId" value="<?php echo $user['id']; ?>">
-
-      <div class="amount-section">
-        <input type="number" id="customAmount" placeholder="Montant (Gourdes)" class="input-phone" min="50" />
-        
-        <select id="canalSelect" class="input-phone" style="margin-top:5px; background:white;">
-            <option value="" disabled selected>Choisir Paiement</option>
-            <option value="MONCASH">MonCash</option>
-            <option value="NATCASH">NatCash</option>
-        </select>
-
-        <div class="suggested-amounts">
-           <button onclick="document.getElementById('customAmount').value=100">100 G</button>
-           <button onclick="document.getElementById('customAmount').value=250">250 G</button>
-           <button onclick="document.getElementById('customAmount').value=500">500 G</button>
-           <button onclick="document.getElementById('customAmount').value=1000">1000 G</button>
-        </div>
-        
-        <button id="btnPay" class="validate-button" onclick="processDonation()">ENVOYER LE DON</button>
-      </div>
-    </div>
-  </main>
-
-  <script>
-    const idempotencyKey = 'uuid-' + Date.now() + '-' + Math.random().toString(36).substr(2, 9);
-
-    async function processDonation() {
-        const amount = document.getElementById('customAmount').value;
-        const canal = document.getElementById('canalSelect').value;
-        const btn = document.getElementById('btnPay');
-        const msg = document.getElementById('donationMsg');
-
-        if(amount < 50) { alert("Minimum 50 Gourdes"); return; }
-        if(!canal) { alert("Choisissez MonCash ou NatCash"); return; }
-
-        btn.disabled = true; btn.innerText = "Traitement..."; msg.style.display = 'none';
-
-        try {
-            const res = await fetch('api/don.php', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({
-                    createurId: document.getElementById('createurId').value,
-                    montant: amount,
-                    canal: canal,
-                    idempotencyKey: idempotencyKey
-                })
-            });
-            const data = await res.json();
-            if(!res.ok) throw new Error(data.error || "Erreur");
-
-            window.location.href = data.payment_url; 
-
-        } catch(e) {
-            msg.className = "alert error"; msg.innerText = "❌ " + e.message; msg.style.display = 'block';
-            btn.disabled = false; btn.innerText = "ENVOYER";
-        }
-    }
-  </script>
-</body>
-</html>""",
-
-    "thanks.html": """<!DOCTYPE html>
-<html lang="fr">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>Merci</title>
-  <link rel="stylesheet" href="style.css" />
-</head>
-<body>
-  <div class="form-container" style="margin-top: 100px;">
-    <h2>🎉 Opération Réussie ! 🎉</h2>
-    <p>Merci pour votre confiance.</p>
-    <br>
-    <a href="index.html" class="validate-button" style="display:inline-block; text-decoration:none;">Retour Accueil</a>
-  </div>
-</body>
-</html>""",
-
-    "menu.html": """<!DOCTYPE html>
-<html lang="fr">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>Menu</title>
-  <link rel="stylesheet" href="style.css" />
-</head>
-<body>
-  <header class="header">
-    <div class="logo-container">
-      <h1 class="site-title">JaKòb</h1>
-    </div>
-    <button class="menu-button" onclick="window.location.href='index.html'">✖</button>
-  </header>
-  <main style="padding: 2rem;">
-    <ul style="list-style:none; padding:0; font-size:1.2rem; line-height:2.5;">
-      <li><a href="profil.php?id=1" style="text-decoration:none; color:#333;">👤 Mon Profil (Démo ID 1)</a></li>
-      <li><a href="inscription-donateur.html" style="text-decoration:none; color:#333;">📝 Inscription</a></li>
-      <li onclick="alert('Bientôt disponible')">⚙️ Paramètres</li>
-      <li><a href="index.html" style="text-decoration:none; color:red;">Déconnexion</a></li>
-    </ul>
-  </main>
-</body>
-</html>""",
-
-    "index.html": """<!DOCTYPE html>
-<html lang="fr">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>Accueil - JaKòb</title>
-  <link rel="stylesheet" href="style.css" />
-</head>
-<body>
-  <header class="header">
-    <div class="logo-container">
-       <img src="https://tse1.mm.bing.net/th/id/OIP.j5cceZXE70QB1K-TcN3-PQHaHa?r=0&rs=1&pid=ImgDetMain&o=7&rm=3" alt="Logo" class="logo" />
-      <h1 class="site-title">JaKòb</h1>
-    </div>
-    <button class="menu-button" onclick="window.location.href='menu.html'">&#9776;</button>
-  </header>
-
-  <main style="text-align:center; padding:2rem;">
-    <h2>Bienvenue sur JaKòb</h2>
-    <p>La plateforme de soutien aux créateurs Haïtiens.</p>
-    
-    <div style="margin-top:2rem;">
-        <a href="inscription-donateur.html" class="validate-button" style="display:block; text-decoration:none; margin-bottom:1rem;">Créer un compte</a>
-        <a href="profil.php?id=1" class="validate-button" style="display:block; text-decoration:none; background:#f7c59f; color:#333;">Voir un profil démo</a>
-    </div>
-  </main>
-</body>
-</html>"""
-}
 
 # Création des fichiers
-def create_project():
-    print("🚀 Création du projet Jakob...")
-    for filepath, content in project_files.items():
-        # Créer les dossiers si nécessaire (ex: 'api/')
-        directory = os.path.dirname(filepath)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
-        
-        # Écrire le fichier
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
-        print(f"✅ Fichier créé : {filepath}")
-    
-    print("\\n🎉 Projet généré avec succès !")
-    print("👉 N'oublie pas de configurer ton mot de passe dans 'db.php'.")
-    print("👉 Importe 'database.sql' dans PostgreSQL.")
+def create_project(critical_css=False, dry_run=False, show_diff=False, root=".",
+                   files=None, quiet=False):
+    """Génère (ou met à jour) le projet dans root.
+
+    files est un TemplateSet (par défaut : project_files). Retourne
+    {"written": [...], "unchanged": [...], "kept": [...]}.
+    """
+    say = (lambda *a, **k: None) if quiet else print
+    files = project_files if files is None else files
+    say("🚀 Création du projet Jakob..." + (" (simulation)" if dry_run else ""))
+
+    if critical_css:
+        style = files["style.css"]
+        rules = parse_css_rules(style)
+        total = len(style.encode("utf-8"))
+        report = {}
+
+    manifest_path = os.path.join(root, INSTALL_MANIFEST)
+    generated = load_install_manifest(manifest_path)
+    produced = {}
+
+    written, unchanged, kept = [], [], []
+    for filepath in files:
+        content = files[filepath]
+        if critical_css:
+            content, inlined = inline_critical_css(content, rules)
+            if inlined is not None:
+                report[filepath] = inlined
+        data = rendered_bytes(content)
+        target = os.path.join(root, filepath)
+        current = file_sha256(target)
+        digest = hashlib.sha256(data).hexdigest()
+
+        if current == digest:
+            unchanged.append(filepath)
+            produced[filepath] = digest
+            continue
+        # Modifié à la main (ou projet antérieur au manifeste) : on garde, mais on le dit
+        if current is not None and filepath in USER_EDITED_FILES and current != generated.get(filepath):
+            kept.append(filepath)
+            say(f"⚠️  Conservé (personnalisé) : {filepath} — la version générée n'est PAS appliquée")
+            if show_diff:
+                print_diff(target, data)
+            continue
+
+        if show_diff:
+            print_diff(target, data)
+        if not dry_run:
+            write_atomic(target, data)
+        written.append(filepath)
+        produced[filepath] = digest
+        say(f"✅ Fichier {'créé' if current is None else 'mis à jour'} : {filepath}")
+
+    if critical_css:
+        say("\n🎨 CSS critique inliné :")
+        for filepath, inlined in report.items():
+            say(f"   {filepath:<28} {inlined:>6} / {total} octets ({inlined * 100 // total}%)")
+
+    if not dry_run and {**generated, **produced} != generated:
+        write_atomic(manifest_path, json.dumps({**generated, **produced}, indent=0, sort_keys=True).encode("utf-8"))
+
+    verb = "à écrire" if dry_run else "écrits"
+    say(f"\n📊 {len(written)} fichier(s) {verb}, {len(unchanged)} inchangé(s), {len(kept)} conservé(s)")
+    if kept:
+        say(f"⚠️  Non mis à jour car personnalisé(s) : {', '.join(kept)}. "
+            "Compare avec --diff et reporte les changements (ex. db.php de --pooled) à la main.")
+    if not dry_run:
+        say("\n🎉 Projet généré avec succès !")
+        say("👉 N'oublie pas de configurer ton mot de passe dans 'db.php'.")
+        say("👉 Importe 'database.sql' dans PostgreSQL.")
+        say("👉 Base existante : lance 'backfill_creator_totals.sql' pour remplir creator_totals.")
+        say("👉 Profils statiques (optionnel) : python3 prerender-profiles.py --dsn ... en tâche planifiée.")
+        if "config/pgbouncer.ini" in files:
+            say("👉 Mets le mot de passe dans 'config/userlist.txt' puis lance : cd config && pgbouncer pgbouncer.ini")
+            say("⚠️  config/ contient le mot de passe : sors-le de la racine web (Apache : bloqué par config/.htaccess).")
+        if any(directory.name == "timing" for directory in files.variant_dirs):
+            log = files.variables["timing_log"]
+            log = log if os.path.isabs(log) else os.path.join("..", log)
+            say(f"👉 Durées journalisées dans '{log}' : python3 analyze-timing.py {log}")
+    return {"written": written, "unchanged": unchanged, "kept": kept}
+
+
+# ---------------------------------------------------------
+# MULTI-TENANT
+# ---------------------------------------------------------
+def load_tenants(spec_path):
+    """Lit un fichier de tenants :
+
+    {"defaults": {...variables...},
+     "tenants": [{"name": "acme", "output": "sites/acme", "db_name": "acme_db", ...}]}
+
+    "output" vaut par défaut tenants/<name>, relatif au fichier de spec.
+    """
+    with open(spec_path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    base = os.path.dirname(os.path.abspath(spec_path))
+    defaults = spec.get("defaults", {})
+    tenants = []
+    for tenant in spec["tenants"]:
+        tenant = dict(tenant)
+        name = tenant.pop("name")
+        output = os.path.join(base, tenant.pop("output", os.path.join("tenants", name)))
+        tenants.append((name, output, {**defaults, **tenant}))
+    return tenants
+
+
+def scaffold_tenant(name, output, variables, critical_css=False, dry_run=False, variants=()):
+    """Génère un tenant ; exécuté dans un processus fils."""
+    files = TemplateSet(variables=variables, variants=variants)
+    result = create_project(critical_css=critical_css, dry_run=dry_run, root=output,
+                            files=files, quiet=True)
+    return name, output, result
+
+
+def scaffold_tenants(spec_path, jobs=None, critical_css=False, dry_run=False, variants=(),
+                     overrides=None):
+    """Génère tous les tenants du fichier de spec en parallèle.
+
+    overrides (options de la ligne de commande) passe avant les variables du spec.
+    """
+    tenants = [(name, output, {**variables, **(overrides or {})})
+               for name, output, variables in load_tenants(spec_path)]
+    print(f"🚀 {len(tenants)} tenant(s) à générer...")
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(scaffold_tenant, name, output, variables, critical_css, dry_run,
+                                   variants)
+                   for name, output, variables in tenants]
+        for future in futures:
+            name, output, result = future.result()
+            print(f"✅ {name:<20} {output} : {len(result['written'])} écrit(s), "
+                  f"{len(result['unchanged'])} inchangé(s), {len(result['kept'])} conservé(s)")
+    print("\n🎉 Tenants générés avec succès !")
+
 
 if __name__ == "__main__":
-    create_project()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Génère le projet Jakob dans le dossier courant.")
+    parser.add_argument("--critical-css", action="store_true",
+                        help="inline le CSS critique de chaque page et charge style.css en asynchrone")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="affiche ce qui serait écrit sans rien toucher")
+    parser.add_argument("--diff", action="store_true",
+                        help="affiche le diff unifié de chaque fichier modifié")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="transactions_jakob partitionnée par mois (PostgreSQL 13+), "
+                             "voir manage-partitions.py")
+    parser.add_argument("--pooled", action="store_true",
+                        help="connexions PDO persistantes via PgBouncer (mode transaction), "
+                             "avec config/pgbouncer.ini et api/pool-stats.php")
+    parser.add_argument("--timing", action="store_true",
+                        help="chronomètre api/don.php, api/inscription.php et profil.php "
+                             "(en-tête Server-Timing + journal JSON, voir analyze-timing.py)")
+    parser.add_argument("--php-workers", type=int,
+                        help="workers PHP par serveur web, pour dimensionner le pool (défaut : 16)")
+    parser.add_argument("--web-servers", type=int,
+                        help="nombre de serveurs web partageant la base (défaut : 1)")
+    parser.add_argument("--db-max-connections", type=int,
+                        help="max_connections de PostgreSQL (défaut : 100)")
+    parser.add_argument("--tenants", metavar="SPEC.json",
+                        help="génère chaque tenant du fichier de spec, en parallèle")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="nombre de processus pour --tenants (défaut : nombre de CPU)")
+    args = parser.parse_args()
+    variants = tuple(name for name, enabled in (("partitioned", args.partitioned),
+                                                ("pooled", args.pooled),
+                                                ("timing", args.timing)) if enabled)
+    overrides = {name: str(value) for name, value in (("php_workers", args.php_workers),
+                                                      ("web_servers", args.web_servers),
+                                                      ("db_max_connections", args.db_max_connections))
+                 if value is not None}
+    if args.tenants:
+        scaffold_tenants(args.tenants, args.jobs, critical_css=args.critical_css, dry_run=args.dry_run,
+                         variants=variants, overrides=overrides)
+    else:
+        files = TemplateSet(variables=overrides, variants=variants) if variants or overrides else None
+        create_project(critical_css=args.critical_css, dry_run=args.dry_run, show_diff=args.diff,
+                       files=files)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""Load-test the api/ endpoints and report throughput and tail latency as JSON
+
+Starts `php -S` on the project (or targets --url), then replays a weighted
+traffic mix from --concurrency virtual users for --duration seconds. A
+share of donation requests is replayed with the same idempotency key,
+the way a double tap or a flaky network would, and reported separately.
+
+    load-test.py --docroot . --duration 30 --concurrency 32 --output run.json
+    load-test.py --url http://127.0.0.1:8000 --mix campaign-mix.json --rate 200
+
+With --rate, requests are scheduled at a fixed rate and latency is
+measured from the scheduled start, so a stalled server shows up in the
+percentiles instead of silently lowering the request rate.
+
+The report is written with sorted keys, so two runs can be diffed.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# name, method, path, weight, JSON body template (None for GET). The default
+# only hits pages installer.py generates; other endpoints go in a --mix file.
+# Strings in a body may use {seq}, {uuid}, {phone}, {amount}, {creator_id}, {canal}.
+DEFAULT_MIX = {
+    'endpoints': [
+        {'name': 'don', 'method': 'POST', 'path': '/api/don.php', 'weight': 50,
+         'body': {'createurId': '{creator_id}', 'montant': '{amount}', 'canal': '{canal}',
+                  'idempotencyKey': '{uuid}'},
+         'retry_key': 'idempotencyKey'},
+        {'name': 'inscription', 'method': 'POST', 'path': '/api/inscription.php', 'weight': 10,
+         'body': {'username': 'load{seq}', 'telephone': '{phone}'}},
+        {'name': 'profil', 'method': 'GET', 'path': '/profil.php?id=1', 'weight': 40},
+    ],
+    # Optional: each virtual user logs in once and keeps its session cookie
+    'login': None,
+    'creator_ids': [1],
+}
+
+REQUEST_TIMEOUT = 30.0
+
+
+class ProtocolError(Exception):
+    """The server closed the connection or sent something that is not HTTP"""
+
+
+# ---------------------------------------------------------
+# Minimal HTTP client (one connection per request, like php -S)
+# ---------------------------------------------------------
+
+async def http_request(host, port, method, path, body=None, cookies=None, timeout=REQUEST_TIMEOUT):
+    """Returns (status, headers dict, body bytes)"""
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close",
+             "Accept: application/json"]
+    if body is not None:
+        lines += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+    if cookies:
+        lines.append("Cookie: " + '; '.join(f"{k}={v}" for k, v in cookies.items()))
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    raw = await asyncio.wait_for(exchange(), timeout)
+    if not raw:
+        raise ProtocolError('empty response')
+    head, _, content = raw.partition(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    parts = status_line.split()
+    if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+        raise ProtocolError(f"bad status line {status_line[:60]!r}")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(':')
+        headers.setdefault(name.strip().lower(), []).append(value.strip())
+    return int(parts[1]), headers, content
+
+
+def update_cookies(cookies, headers):
+    for value in headers.get('set-cookie', []):
+        name, _, rest = value.partition('=')
+        cookies[name.strip()] = rest.split(';', 1)[0]
+
+
+# ---------------------------------------------------------
+# Traffic
+# ---------------------------------------------------------
+
+class RequestFactory:
+    """Expands body templates; counters are shared by all virtual users"""
+
+    def __init__(self, mix, seed):
+        self.rng = random.Random(seed)
+        self.seq = itertools.count(1)
+        self.run_id = uuid.UUID(int=self.rng.getrandbits(128)).hex[:8]
+        self.creator_ids = mix.get('creator_ids') or [1]
+        self.endpoints = mix['endpoints']
+        self.weights = [endpoint.get('weight', 1) for endpoint in self.endpoints]
+
+    def pick(self):
+        return self.rng.choices(self.endpoints, weights=self.weights)[0]
+
+    def values(self):
+        seq = next(self.seq)
+        return {
+            'seq': f"{self.run_id}{seq}",
+            'uuid': str(uuid.UUID(int=self.rng.getrandbits(128))),
+            'phone': f"5094{self.rng.randrange(10**7):07d}",
+            'amount': self.rng.choice([50, 100, 250, 500, 1000, 2500]),
+            'creator_id': self.rng.choice(self.creator_ids),
+            'canal': self.rng.choice(['MONCASH', 'MONCASH', 'NATCASH']),
+        }
+
+    def expand(self, template, values):
+        if isinstance(template, dict):
+            return {key: self.expand(value, values) for key, value in template.items()}
+        if isinstance(template, list):
+            return [self.expand(value, values) for value in template]
+        if isinstance(template, str):
+            # A lone placeholder keeps the value's type ({amount} stays a number)
+            if template.startswith('{') and template.endswith('}') and template[1:-1] in values:
+                return values[template[1:-1]]
+            return template.format_map(values)
+        return template
+
+
+class Recorder:
+    """Latency samples and status counts per endpoint"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, name, latency, status):
+        entry = self.samples.setdefault(name, {'latencies': [], 'status': {}})
+        entry['latencies'].append(latency)
+        entry['status'][status] = entry['status'].get(status, 0) + 1
+
+    @staticmethod
+    def _percentile(ordered, fraction):
+        if not ordered:
+            return None
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]  # nearest rank
+
+    def summary(self, name, latencies, statuses, elapsed):
+        ordered = sorted(latencies)
+        errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400)
+        ms = lambda value: None if value is None else round(value * 1000, 2)
+        return {
+            'requests': len(ordered),
+            'errors': errors,
+            'error_rate': round(errors / len(ordered), 4) if ordered else 0.0,
+            'rps': round(len(ordered) / elapsed, 2),
+            'p50_ms': ms(self._percentile(ordered, 0.50)),
+            'p95_ms': ms(self._percentile(ordered, 0.95)),
+            'p99_ms': ms(self._percentile(ordered, 0.99)),
+            'max_ms': ms(ordered[-1] if ordered else None),
+            'status': dict(sorted(statuses.items())),
+        }
+
+    def report(self, elapsed):
+        endpoints = {name: self.summary(name, entry['latencies'], entry['status'], elapsed)
+                     for name, entry in sorted(self.samples.items())}
+        all_latencies = [v for entry in self.samples.values() for v in entry['latencies']]
+        all_status = {}
+        for entry in self.samples.values():
+            for status, count in entry['status'].items():
+                all_status[status] = all_status.get(status, 0) + count
+        return {'endpoints': endpoints, 'total': self.summary('total', all_latencies, all_status, elapsed)}
+
+
+async def send(target, endpoint, body, cookies, recorder, name, scheduled=None):
+    host, port = target
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        status, headers, _ = await http_request(host, port, endpoint['method'], endpoint['path'],
+                                                body, cookies)
+        update_cookies(cookies, headers)
+        status = str(status)
+    except asyncio.TimeoutError:
+        status = 'timeout'
+    except ProtocolError:
+        status = 'protocol_error'
+    except OSError as e:
+        status = type(e).__name__
+    recorder.add(name, time.perf_counter() - start, status)
+
+
+async def virtual_user(target, factory, mix, recorder, deadline, retry_rate, slots):
+    cookies = {}
+    login = mix.get('login')
+    if login:
+        await send(target, {'method': 'POST', 'path': login['path']},
+                   factory.expand(login.get('body', {}), factory.values()), cookies, recorder, 'login')
+
+    while time.perf_counter() < deadline:
+        scheduled = None
+        if slots is not None:
+            scheduled = await next_slot(slots, deadline)
+            if scheduled is None:
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        endpoint = factory.pick()
+        body = factory.expand(endpoint['body'], factory.values()) if endpoint.get('body') is not None else None
+        await send(target, endpoint, body, cookies, recorder, endpoint['name'], scheduled)
+
+        # Same idempotency key again: must be cheap and must not double-insert
+        if endpoint.get('retry_key') and factory.rng.random() < retry_rate:
+            await send(target, endpoint, body, cookies, recorder, f"{endpoint['name']} (retry)")
+
+
+async def next_slot(slots, deadline):
+    """Next scheduled start time, or None once the deadline has passed"""
+    remaining = deadline - time.perf_counter()
+    if remaining <= 0:
+        return None
+    try:
+        return await asyncio.wait_for(slots.get(), remaining)
+    except asyncio.TimeoutError:
+        return None
+
+
+async def schedule_slots(slots, rate, deadline):
+    """Feed start times at a fixed rate until the deadline
+
+    The queue is unbounded on purpose: the schedule never waits for the
+    users, so a saturated server leaves a backlog (reported as unsent)
+    instead of slowing the schedule down.
+    """
+    interval = 1.0 / rate
+    next_start = time.perf_counter()
+    while next_start < deadline:
+        slots.put_nowait(next_start)
+        next_start += interval
+        delay = next_start - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(min(delay, interval))
+
+
+async def run_load(target, mix, args):
+    factory = RequestFactory(mix, args.seed)
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    slots = asyncio.Queue() if args.rate else None
+    tasks = [asyncio.create_task(virtual_user(target, factory, mix, recorder, deadline,
+                                              args.retry_rate, slots))
+             for _ in range(args.concurrency)]
+    if slots is not None:
+        tasks.append(asyncio.create_task(schedule_slots(slots, args.rate, deadline)))
+    # Every task stops on its own at the deadline (plus at most one in-flight request)
+    await asyncio.gather(*tasks)
+    report = recorder.report(time.perf_counter() - start)
+    if slots is not None:
+        report['unsent'] = slots.qsize()  # scheduled, but no user was free before the deadline
+    return report
+
+
+# ---------------------------------------------------------
+# PHP built-in server
+# ---------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_php_server(docroot, port, workers):
+    """php -S on docroot; PHP_CLI_SERVER_WORKERS lets it serve requests in parallel"""
+    php = shutil.which('php')
+    if php is None:
+        sys.exit("[!] php not found in PATH; start a server yourself and pass --url")
+    env = dict(os.environ, PHP_CLI_SERVER_WORKERS=str(workers))
+    process = subprocess.Popen([php, '-S', f"127.0.0.1:{port}", '-t', str(docroot)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    sys.exit(f"[!] php -S did not start on port {port}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='existing server to test, e.g. http://127.0.0.1:8000')
+    target.add_argument('--docroot', type=Path, default=Path('.'),
+                        help='start php -S on this generated project (default: current directory, '
+                             'where installer.py writes it)')
+    parser.add_argument('--php-workers', type=int, default=os.cpu_count() or 1,
+                        help='PHP_CLI_SERVER_WORKERS for the started server (default: CPU count)')
+    parser.add_argument('--mix', type=Path, help='JSON traffic mix (default: built-in, see DEFAULT_MIX)')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of load (default: 30)')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='virtual users (default: 16)')
+    parser.add_argument('--rate', type=float,
+                        help='target requests/s across all users (default: as fast as possible)')
+    parser.add_argument('--retry-rate', type=float, default=0.1,
+                        help='share of idempotent requests resent with the same key (default: 0.1)')
+    parser.add_argument('--seed', type=int, default=1, help='traffic RNG seed')
+    parser.add_argument('--output', type=Path, help='write the JSON report here (default: stdout only)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix, 'r', encoding='utf-8') as f:
+            mix = {**DEFAULT_MIX, **json.load(f)}
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        target = (parts.hostname, parts.port or 80)
+    else:
+        endpoints = []
+        for endpoint in mix['endpoints']:
+            path = endpoint['path'].split('?', 1)[0]
+            if (args.docroot / path.lstrip('/')).is_file():
+                endpoints.append(endpoint)
+            else:
+                print(f"[!] {args.docroot} has no {path}: {endpoint['name']} left out of the mix",
+                      file=sys.stderr)
+        if not endpoints:
+            sys.exit(f"[!] Nothing to test in {args.docroot}: generate the project there with "
+                     f"installer.py, or pass --url")
+        mix = {**mix, 'endpoints': endpoints}
+        port = free_port()
+        server = start_php_server(args.docroot, port, args.php_workers)
+        target = ('127.0.0.1', port)
+
+    try:
+        report = asyncio.run(run_load(target, mix, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report['config'] = {'duration': args.duration, 'concurrency': args.concurrency, 'rate': args.rate,
+                        'retry_rate': args.retry_rate, 'seed': args.seed,
+                        'mix': {e['name']: e.get('weight', 1) for e in mix['endpoints']}}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(text + '\n', encoding='utf-8')
+
+    total = report['total']
+    if not args.output:
+        print(text)
+    print(f"\n{'='*50}", file=sys.stderr)
+    for name, stats in report['endpoints'].items():
+        print(f"  {name:<24} {stats['requests']:>7} req  p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  "
+              f"p99 {stats['p99_ms']}ms  errors {stats['error_rate']:.1%}", file=sys.stderr)
+    print(f"  Total: {total['requests']} requests, {total['rps']} req/s, errors {total['error_rate']:.1%}",
+          file=sys.stderr)
+    if report.get('unsent'):
+        print(f"  [!] {report['unsent']} scheduled request(s) never sent: the server could not keep up",
+              file=sys.stderr)
+    print(f"{'='*50}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Create future monthly partitions of transactions_jakob and archive old ones
+
+Works against the schema generated by `installer.py --partitioned`.
+Partitions are named transactions_jakob_pYYYYMM and cover one UTC month.
+
+    manage-partitions.py create --ahead 3          # this month + 3 more
+    manage-partitions.py archive --keep 12         # gzip + drop older months
+    manage-partitions.py list
+
+reference_externe idempotency lives in transaction_refs, which is not
+partitioned: archiving a month never lets an old reference be reused.
+"""
+
+import argparse
+import datetime
+import gzip
+import os
+import re
+import sys
+from pathlib import Path
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+    try:
+        import psycopg2
+    except ImportError:  # without a driver only `create --sql` works
+        psycopg2 = None
+
+PARENT_TABLE = 'transactions_jakob'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+PARTITION_RE = re.compile(rf'^{PARENT_TABLE}_p(?P<year>\d{{4}})(?P<month>\d{{2}})$')
+
+ARCHIVE_DIR = 'archives'
+
+
+def month_start(day):
+    return datetime.date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name):
+    """First day of the month a partition covers, or None for other tables"""
+    match = PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime.date(int(match.group('year')), int(match.group('month')), 1)
+
+
+def create_partition_sql(month):
+    """Idempotent DDL for the partition holding month"""
+    return (f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') "
+            f"TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00');")
+
+
+def months_to_create(today, ahead):
+    """The current month and the next `ahead` months"""
+    first = month_start(today)
+    return [add_months(first, i) for i in range(ahead + 1)]
+
+
+def months_to_archive(partitions, today, keep):
+    """Partitions entirely older than the last `keep` months, oldest first"""
+    cutoff = add_months(month_start(today), -keep)
+    old = [(month, name) for name in partitions
+           if (month := partition_month(name)) is not None and month < cutoff]
+    return [name for _, name in sorted(old)]
+
+
+# ---------------------------------------------------------
+# Database access
+# ---------------------------------------------------------
+
+def connect(dsn):
+    """Open a connection with whichever driver is installed"""
+    if psycopg is not None:
+        return psycopg.connect(dsn, autocommit=True)
+    if psycopg2 is not None:
+        conn = psycopg2.connect(dsn)
+        conn.autocommit = True
+        return conn
+    sys.exit("[!] psycopg (or psycopg2) is required to talk to the database; "
+             "use `create --sql` to print the DDL instead")
+
+
+def copy_out(cursor, sql, fileobj):
+    """Stream COPY ... TO STDOUT into fileobj"""
+    if psycopg is not None:
+        with cursor.copy(sql) as copy:
+            for data in copy:
+                fileobj.write(data)
+    else:
+        cursor.copy_expert(sql, fileobj)
+
+
+def list_partitions(cursor):
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass ORDER BY c.relname", (PARENT_TABLE,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def count_rows(cursor, table):
+    cursor.execute(f"SELECT count(*) FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def archive_partition(cursor, name, archive_dir, drop=True):
+    """Dump a partition to <archive_dir>/<name>.csv.gz, then detach (and drop) it
+
+    The archive is written to a temp file and renamed only once COPY has
+    finished; the partition is detached only if the dump holds as many
+    rows as the table. Returns the number of archived rows.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archive_path = archive_dir / f"{name}.csv.gz"
+    tmp_path = archive_dir / f".{name}.csv.gz.tmp"
+
+    expected = count_rows(cursor, name)
+    with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+        copy_out(cursor, f"COPY {name} TO STDOUT (FORMAT csv, HEADER)", f)
+    with gzip.open(tmp_path, 'rb') as f:
+        dumped = sum(1 for _ in f) - 1
+    if dumped < expected:
+        # Multi-line values (e.g. metadata) only make the dump count higher
+        os.remove(tmp_path)
+        raise RuntimeError(f"archive of {name} holds {dumped} rows, table has {expected}")
+    os.replace(tmp_path, archive_path)
+
+    cursor.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+    if drop:
+        cursor.execute(f"DROP TABLE {name}")
+    return expected
+
+
+# ---------------------------------------------------------
+# Commands
+# ---------------------------------------------------------
+
+def cmd_create(args, today):
+    statements = [create_partition_sql(month) for month in months_to_create(today, args.ahead)]
+    if args.sql:
+        print('\n'.join(statements))
+        return
+
+    with connect(args.dsn) as conn, conn.cursor() as cursor:
+        existing = set(list_partitions(cursor))
+        for month, statement in zip(months_to_create(today, args.ahead), statements):
+            name = partition_name(month)
+            if name in existing:
+                continue
+            cursor.execute(statement)
+            print(f"[+] Created {name}")
+        stray = count_rows(cursor, DEFAULT_PARTITION) if DEFAULT_PARTITION in existing else 0
+    if stray:
+        print(f"[!] {DEFAULT_PARTITION} holds {stray} row(s) outside every monthly partition")
+    print(f"[OK] Partitions exist through {add_months(month_start(today), args.ahead):%Y-%m}")
+
+
+def cmd_archive(args, today):
+    with connect(args.dsn) as conn, conn.cursor() as cursor:
+        names = months_to_archive(list_partitions(cursor), today, args.keep)
+        if not names:
+            print(f"[OK] Nothing older than {args.keep} month(s) to archive")
+            return
+        archived = failed = 0
+        for name in names:
+            if args.dry_run:
+                print(f"[+] Would archive {name} ({count_rows(cursor, name)} rows)")
+                continue
+            try:
+                rows = archive_partition(cursor, name, args.archive_dir, drop=not args.detach_only)
+            except Exception as e:
+                print(f"[!] Error archiving {name}: {e}")
+                failed += 1
+                continue
+            archived += 1
+            action = 'detached' if args.detach_only else 'dropped'
+            print(f"[+] Archived {name}: {rows} rows -> {args.archive_dir / (name + '.csv.gz')}, {action}")
+
+    print(f"\n{'='*50}")
+    print(f"  Archived: {archived} partition(s), failed: {failed}")
+    print(f"{'='*50}")
+
+
+def cmd_list(args, today):
+    with connect(args.dsn) as conn, conn.cursor() as cursor:
+        for name in list_partitions(cursor):
+            print(f"{name:<36} {count_rows(cursor, name):>12} rows")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.environ.get('JAKOB_DSN', ''),
+                        help='libpq connection string (default: $JAKOB_DSN, then the PG* variables)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create = commands.add_parser('create', help='pre-create upcoming monthly partitions')
+    create.add_argument('--ahead', type=int, default=3,
+                        help='months to create after the current one (default: 3)')
+    create.add_argument('--sql', action='store_true',
+                        help='print the DDL instead of running it (no driver needed)')
+    create.set_defaults(func=cmd_create)
+
+    archive = commands.add_parser('archive', help='dump old partitions to .csv.gz and remove them')
+    archive.add_argument('--keep', type=int, default=12,
+                         help='months of history to keep online, before the current one (default: 12)')
+    archive.add_argument('--archive-dir', type=Path, default=Path(ARCHIVE_DIR),
+                         help=f'where the dumps go (default: {ARCHIVE_DIR}/)')
+    archive.add_argument('--detach-only', action='store_true',
+                         help='detach archived partitions but keep them as plain tables')
+    archive.add_argument('--dry-run', action='store_true',
+                         help='only list the partitions that would be archived')
+    archive.set_defaults(func=cmd_archive)
+
+    listing = commands.add_parser('list', help='show partitions and their row counts')
+    listing.set_defaults(func=cmd_list)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.func(args, datetime.datetime.now(datetime.timezone.utc).date())
+
+
+if __name__ == '__main__':
+    main()
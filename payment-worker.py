@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Resolve PENDING donations against the MonCash/NatCash status APIs
+
+Each claim loop marks a batch of PENDING rows as PROCESSING in one short
+transaction (FOR UPDATE SKIP LOCKED, so loops and worker processes never
+share rows) and commits before asking the provider about every reference
+concurrently: no row lock is held during the HTTP calls. The answers are
+written back in one UPDATE. Rows the provider still reports as PENDING go
+back to PENDING, stamped with metadata.checked_at, and are left alone for
+--recheck seconds. A PROCESSING row whose worker died is claimed again
+once its metadata.locked_at is --lease seconds old.
+
+    payment-worker.py mock-provider --port 8089 --latency-ms 40
+    payment-worker.py run --dsn "dbname=jakob_db" --provider-url http://127.0.0.1:8089
+
+`run` needs asyncpg and aiohttp; `mock-provider` only needs the stdlib.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+try:
+    import aiohttp
+except ImportError:  # only needed by `run`
+    aiohttp = None
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+FINAL_STATUSES = {'SUCCESS', 'FAILED'}
+
+# Claimed rows are committed as PROCESSING; $5 tags them for this batch only
+CLAIM_SQL = """\
+UPDATE transactions_jakob t
+SET statut = 'PROCESSING',
+    metadata = COALESCE(t.metadata, '{}'::jsonb)
+               || jsonb_build_object('locked_at', now(), 'claim', $5::text)
+FROM (
+    SELECT id, created_at
+    FROM transactions_jakob
+    WHERE reference_externe IS NOT NULL
+      AND ((statut = 'PENDING'
+            AND created_at <= now() - make_interval(secs => $2)
+            AND COALESCE((metadata->>'checked_at')::timestamptz, '-infinity') <= now() - make_interval(secs => $3))
+        OR (statut = 'PROCESSING'
+            AND (metadata->>'locked_at')::timestamptz <= now() - make_interval(secs => $4)))
+    ORDER BY created_at
+    LIMIT $1
+    FOR UPDATE SKIP LOCKED
+) c
+WHERE t.id = c.id AND t.created_at = c.created_at
+RETURNING t.id, t.created_at, t.reference_externe, t.canal"""
+
+# created_at is part of the key so the partitioned schema can prune; a row
+# reclaimed by another worker after --lease no longer carries our claim tag
+UPDATE_SQL = """\
+UPDATE transactions_jakob t
+SET statut = v.statut,
+    metadata = (COALESCE(t.metadata, '{}'::jsonb) - 'locked_at' - 'claim')
+               || jsonb_build_object('checked_at', now(), 'provider_status', v.statut)
+FROM unnest($1::bigint[], $2::timestamptz[], $3::text[]) AS v(id, created_at, statut)
+WHERE t.id = v.id AND t.created_at = v.created_at
+  AND t.statut = 'PROCESSING' AND t.metadata->>'claim' = $4"""
+
+QUEUE_SQL = """\
+SELECT count(*), EXTRACT(EPOCH FROM now() - min(created_at))
+FROM transactions_jakob WHERE statut IN ('PENDING', 'PROCESSING')"""
+
+
+# ---------------------------------------------------------
+# Mock provider
+# ---------------------------------------------------------
+
+def mock_status(reference, success_rate, failed_rate):
+    """Deterministic outcome for a reference, so reruns agree"""
+    roll = int(hashlib.sha1(reference.encode('utf-8')).hexdigest()[:8], 16) / 0xFFFFFFFF
+    if roll < success_rate:
+        return 'SUCCESS'
+    if roll < success_rate + failed_rate:
+        return 'FAILED'
+    return 'PENDING'
+
+
+def make_mock_handler(latency, success_rate, failed_rate, error_rate):
+    class MockProviderHandler(BaseHTTPRequestHandler):
+        """GET /<moncash|natcash>/status/<reference>"""
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real APIs
+
+        def do_GET(self):
+            parts = self.path.strip('/').split('/')
+            if len(parts) != 3 or parts[0] not in ('moncash', 'natcash') or parts[1] != 'status':
+                return self._reply(404, {'error': 'not found'})
+            time.sleep(latency * random.uniform(0.5, 1.5))
+            if random.random() < error_rate:
+                return self._reply(503, {'error': 'provider unavailable'})
+            reference = unquote(parts[2])
+            self._reply(200, {'reference': reference, 'provider': parts[0],
+                              'status': mock_status(reference, success_rate, failed_rate)})
+
+        def _reply(self, code, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockProviderHandler
+
+
+def cmd_mock_provider(args):
+    handler = make_mock_handler(args.latency_ms / 1000, args.success, args.failed, args.errors)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    print(f"[+] Mock MonCash/NatCash on http://{args.host}:{args.port}/<moncash|natcash>/status/<reference>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+# ---------------------------------------------------------
+# Worker
+# ---------------------------------------------------------
+
+class Metrics:
+    """Counters for throughput and queue lag"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.claimed = 0
+        self.resolved = 0
+        self.still_pending = 0
+        self.errors = 0
+        self.batches = 0
+        self.lags = []  # seconds between created_at and the provider answer
+
+    def percentile(self, fraction):
+        if not self.lags:
+            return 0.0
+        ordered = sorted(self.lags)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self, queue_depth=None, oldest=None):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'batches': self.batches,
+            'claimed': self.claimed,
+            'resolved': self.resolved,
+            'still_pending': self.still_pending,
+            'errors': self.errors,
+            'rows_per_s': round(self.claimed / elapsed, 1),
+            'resolved_per_s': round(self.resolved / elapsed, 1),
+            'lag_p50_s': round(self.percentile(0.50), 3),
+            'lag_p95_s': round(self.percentile(0.95), 3),
+            'queue_depth': queue_depth,
+            'oldest_pending_s': None if oldest is None else round(float(oldest), 3),
+        }
+
+
+async def fetch_status(session, semaphore, base_url, row, metrics):
+    """Provider status for one row; 'PENDING' when the call or the row is unusable
+
+    Never raises for one bad row: the rest of the batch would stay PROCESSING
+    until --lease runs out.
+    """
+    async with semaphore:
+        try:
+            if not row['canal']:
+                raise ValueError('no canal')
+            url = f"{base_url}/{row['canal'].lower()}/status/{quote(row['reference_externe'], safe='')}"
+            async with session.get(url) as response:
+                if response.status != 200:
+                    metrics.errors += 1
+                    return 'PENDING'
+                body = await response.json()
+            if not isinstance(body, dict):
+                raise ValueError('response is not a JSON object')
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            metrics.errors += 1
+            return 'PENDING'
+    status = str(body.get('status', 'PENDING')).upper()
+    return status if status in FINAL_STATUSES else 'PENDING'
+
+
+async def process_batch(pool, session, semaphore, args, metrics):
+    """Claim, resolve and update one batch; returns the number of rows claimed"""
+    claim = os.urandom(8).hex()
+    async with pool.acquire() as conn:
+        # Autocommit: the row locks end with the claim, before any HTTP call
+        rows = await conn.fetch(CLAIM_SQL, args.batch_size, args.min_age, args.recheck,
+                                args.lease, claim)
+        if not rows:
+            return 0
+        statuses = await asyncio.gather(*(fetch_status(session, semaphore, args.provider_url, row, metrics)
+                                          for row in rows))
+        await conn.execute(UPDATE_SQL, [row['id'] for row in rows],
+                           [row['created_at'] for row in rows], statuses, claim)
+
+    now = time.time()
+    metrics.batches += 1
+    metrics.claimed += len(rows)
+    for row, status in zip(rows, statuses):
+        if status == 'PENDING':
+            metrics.still_pending += 1
+        else:
+            metrics.resolved += 1
+            metrics.lags.append(now - row['created_at'].timestamp())
+    return len(rows)
+
+
+async def claim_loop(pool, session, semaphore, args, metrics, stop):
+    while not stop.is_set():
+        claimed = await process_batch(pool, session, semaphore, args, metrics)
+        if claimed == 0:
+            if args.once:
+                return
+            try:
+                await asyncio.wait_for(stop.wait(), args.idle_sleep)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def report_loop(pool, metrics, interval, stop):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        depth, oldest = await pool.fetchrow(QUEUE_SQL)
+        snap = metrics.snapshot(depth, oldest)
+        print(f"[+] {snap['rows_per_s']:>8} rows/s, resolved {snap['resolved']:,}, "
+              f"queue {depth:,}, oldest {snap['oldest_pending_s']}s, "
+              f"lag p50/p95 {snap['lag_p50_s']}/{snap['lag_p95_s']}s, errors {snap['errors']}")
+
+
+async def run_worker(args):
+    metrics = Metrics()
+    stop = asyncio.Event()
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency, keepalive_timeout=30)
+    pool = await asyncpg.create_pool(args.dsn or None, min_size=1, max_size=args.loops + 1)
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            semaphore = asyncio.Semaphore(args.concurrency)
+            reporter = asyncio.create_task(report_loop(pool, metrics, args.report_interval, stop))
+            loops = [asyncio.create_task(claim_loop(pool, session, semaphore, args, metrics, stop))
+                     for _ in range(args.loops)]
+            try:
+                await asyncio.gather(*loops)
+            finally:
+                stop.set()
+                for task in loops:
+                    task.cancel()
+                await asyncio.gather(reporter, *loops, return_exceptions=True)
+        depth, oldest = await pool.fetchrow(QUEUE_SQL)
+    finally:
+        await pool.close()
+    return metrics.snapshot(depth, oldest)
+
+
+def cmd_run(args):
+    if aiohttp is None or asyncpg is None:
+        sys.exit("[!] `run` needs aiohttp and asyncpg: pip install aiohttp asyncpg")
+    args.provider_url = args.provider_url.rstrip('/')
+    try:
+        snap = asyncio.run(run_worker(args))
+    except KeyboardInterrupt:
+        return
+
+    print(f"\n{'='*50}")
+    print(f"  Claimed: {snap['claimed']:,} in {snap['batches']:,} batch(es)")
+    print(f"  Resolved: {snap['resolved']:,}, still pending: {snap['still_pending']:,}, "
+          f"provider errors: {snap['errors']:,}")
+    print(f"  Throughput: {snap['rows_per_s']} rows/s ({args.loops} loop(s), concurrency {args.concurrency})")
+    print(f"  Lag p50/p95: {snap['lag_p50_s']}s / {snap['lag_p95_s']}s, queue left: {snap['queue_depth']}")
+    print(f"{'='*50}")
+    if args.metrics_json:
+        with open(args.metrics_json, 'w', encoding='utf-8') as f:
+            json.dump(snap, f, indent=2)
+            f.write('\n')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='resolve PENDING rows')
+    run.add_argument('--dsn', default=os.environ.get('JAKOB_DSN', ''),
+                     help='PostgreSQL DSN (default: $JAKOB_DSN, then the PG* variables)')
+    run.add_argument('--provider-url', default='http://127.0.0.1:8089',
+                     help='base URL of the status API (default: the mock provider)')
+    run.add_argument('--batch-size', type=int, default=200, help='rows claimed per transaction')
+    run.add_argument('--loops', type=int, default=4,
+                     help='concurrent claim loops, each with its own DB connection (default: 4)')
+    run.add_argument('--concurrency', type=int, default=64,
+                     help='max in-flight provider requests, shared by all loops (default: 64)')
+    run.add_argument('--timeout', type=float, default=10.0, help='provider request timeout in seconds')
+    run.add_argument('--min-age', type=float, default=5.0,
+                     help='leave rows younger than this many seconds to the payment redirect (default: 5)')
+    run.add_argument('--recheck', type=float, default=60.0,
+                     help='seconds before a still-PENDING row is asked about again (default: 60)')
+    run.add_argument('--lease', type=float, default=300.0,
+                     help='seconds before a PROCESSING row left by a dead worker is claimed again; '
+                          'keep it above the time a batch takes (default: 300)')
+    run.add_argument('--idle-sleep', type=float, default=2.0, help='pause when the queue is empty')
+    run.add_argument('--report-interval', type=float, default=10.0, help='seconds between metric lines')
+    run.add_argument('--once', action='store_true', help='exit once no claimable row is left')
+    run.add_argument('--metrics-json', help='write the final metrics to this file')
+    run.set_defaults(func=cmd_run)
+
+    mock = commands.add_parser('mock-provider', help='serve a fake MonCash/NatCash status API')
+    mock.add_argument('--host', default='127.0.0.1')
+    mock.add_argument('--port', type=int, default=8089)
+    mock.add_argument('--latency-ms', type=float, default=40.0, help='mean response time')
+    mock.add_argument('--success', type=float, default=0.85, help='share of SUCCESS answers')
+    mock.add_argument('--failed', type=float, default=0.10, help='share of FAILED answers (rest: PENDING)')
+    mock.add_argument('--errors', type=float, default=0.01, help='share of HTTP 503 responses')
+    mock.set_defaults(func=cmd_mock_provider)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Pre-render creator profile pages to static HTML snapshots
+
+profil.php serves profiles/<id>.html when it exists and only queries the
+database on a miss. This script writes those snapshots from a users
+export (CSV/JSONL) or straight from the database, using the generated
+profil.php itself as the template: its few <?php echo ...; ?> blocks are
+filled in the same way PHP would, so the markup has a single source.
+
+Runs are incremental. users.updated_at is the watermark: only rows at or
+after the previous run's watermark, minus --overlap, are read, and a
+snapshot is rewritten only when its content changes. The overlap covers
+transactions that were still open when the previous run read the table
+(their updated_at is older than the rows they commit after); raise it if
+users are updated by longer transactions. Snapshots of creators that are
+gone (deleted, deactivated, no longer creators) are removed, so an export
+must list every user. Editing profil.php (or regenerating it with
+different site variables) invalidates every snapshot.
+
+    prerender-profiles.py --dsn "dbname=jakob_db" --root /var/www/jakob
+    psql -c "\\copy (SELECT id, username, prenom, nom, is_creator, active, updated_at
+                     FROM users) TO 'users.csv' CSV HEADER"
+    prerender-profiles.py --export users.csv --root /var/www/jakob
+"""
+
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote_plus
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+    try:
+        import psycopg2
+    except ImportError:  # --export works without a driver
+        psycopg2 = None
+
+SNAPSHOT_DIR = 'profiles'
+STATE_NAME = '.state.json'
+# Bumped when render_profile's output changes, so every snapshot is rebuilt
+RENDER_VERSION = 2
+
+# Every PHP block left in profil.php's HTML must be one of these
+ECHO_DISPLAY_NAME = '<?php echo htmlspecialchars($displayName); ?>'
+ECHO_AVATAR_URL = '<?php echo htmlspecialchars($avatarUrl); ?>'
+ECHO_USER_ID = "<?php echo $user['id']; ?>"
+PHP_BLOCK_RE = re.compile(r'<\?php.*?\?>', re.DOTALL)
+
+USERS_SQL = """\
+SELECT id, username, prenom, nom, is_creator, active, updated_at
+FROM users
+WHERE updated_at >= %s
+ORDER BY updated_at"""
+
+# Every id that should have a snapshot, to drop the pages of deleted creators
+LIVE_CREATORS_SQL = "SELECT id FROM users WHERE is_creator AND active"
+
+# Re-read window before the stored watermark, in seconds
+DEFAULT_OVERLAP = 600
+
+TRUE_VALUES = {'t', 'true', '1', 'yes'}
+
+
+def htmlspecialchars(text):
+    """PHP 8 htmlspecialchars() defaults (ENT_QUOTES)"""
+    return (text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&quot;').replace("'", '&#039;'))
+
+
+def php_urlencode(text):
+    return quote_plus(text, safe='').replace('~', '%7E')
+
+
+def load_page_template(profile_php):
+    """The HTML part of profil.php, after its leading PHP block"""
+    source = profile_php.read_text(encoding='utf-8')
+    marker = source.find('?>')
+    if marker < 0:
+        raise ValueError(f"{profile_php}: no closing ?> after the PHP header")
+    page = source[marker + 2:].lstrip('\n')
+    unknown = set(PHP_BLOCK_RE.findall(page)) - {ECHO_DISPLAY_NAME, ECHO_AVATAR_URL, ECHO_USER_ID}
+    if unknown:
+        raise ValueError(f"{profile_php}: cannot pre-render {sorted(unknown)}")
+    return page, hashlib.sha256(f"{RENDER_VERSION}\n{source}".encode('utf-8')).hexdigest()
+
+
+def display_name(user):
+    """Same rule as profil.php"""
+    return f"@{user['username']}" if user.get('username') else (user.get('prenom') or '')
+
+
+def render_profile(page, user):
+    """profil.php's page for user
+
+    The avatar always goes through avatar.php, which serves or regenerates
+    avatars/<key>.svg: a snapshot can outlive that file (the avatars.py LRU
+    evicts it) and is only rewritten when the user changes.
+    """
+    name = display_name(user)
+    avatar_url = f"avatar.php?name={php_urlencode(name)}"
+    return (page.replace(ECHO_DISPLAY_NAME, htmlspecialchars(name))
+                .replace(ECHO_AVATAR_URL, htmlspecialchars(avatar_url))
+                .replace(ECHO_USER_ID, str(user['id'])))
+
+
+def parse_timestamp(value):
+    """PostgreSQL/ISO timestamp text or datetime -> aware datetime"""
+    if isinstance(value, datetime.datetime):
+        moment = value
+    else:
+        text = str(value).strip().replace(' ', 'T', 1)
+        if re.search(r'[+-]\d\d$', text):
+            text += ':00'
+        moment = datetime.datetime.fromisoformat(text.replace('Z', '+00:00'))
+    return moment if moment.tzinfo else moment.replace(tzinfo=datetime.timezone.utc)
+
+
+def is_true(value):
+    return value is True or str(value).strip().lower() in TRUE_VALUES
+
+
+# ---------------------------------------------------------
+# Sources
+# ---------------------------------------------------------
+
+def is_live_creator(user):
+    return is_true(user.get('is_creator')) and is_true(user.get('active', True))
+
+
+def rows_from_export(path, since, live_ids):
+    """Rows updated at or after since; live_ids collects every active creator"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for record in records:
+            if is_live_creator(record):
+                live_ids.add(int(record['id']))
+            updated = parse_timestamp(record['updated_at'])
+            if since is None or updated >= since:
+                yield {**record, 'id': int(record['id']), 'updated_at': updated}
+
+
+def rows_from_database(dsn, since, live_ids, batch_size=5000):
+    """Rows updated at or after since; live_ids is filled once they are all read"""
+    since = since or datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    if psycopg is not None:
+        conn = psycopg.connect(dsn)
+        cursor = conn.cursor(name='prerender_profiles')  # server-side: constant memory
+    elif psycopg2 is not None:
+        conn = psycopg2.connect(dsn)
+        cursor = conn.cursor(name='prerender_profiles')
+    else:
+        sys.exit("[!] --dsn needs psycopg (or psycopg2); export users to CSV and use --export")
+    try:
+        cursor.execute(USERS_SQL, (since,))
+        columns = ('id', 'username', 'prenom', 'nom', 'is_creator', 'active', 'updated_at')
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                record = dict(zip(columns, row))
+                record['updated_at'] = parse_timestamp(record['updated_at'])
+                yield record
+        # Read after the rows, so a creator added meanwhile is not dropped
+        with conn.cursor() as ids_cursor:
+            ids_cursor.execute(LIVE_CREATORS_SQL)
+            live_ids.update(row[0] for row in ids_cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# ---------------------------------------------------------
+# Writing
+# ---------------------------------------------------------
+
+def load_state(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state_path, state):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=0, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+
+def write_snapshot(path, html):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(html)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', type=Path, default=Path('.'),
+                        help='generated project holding profil.php (default: current directory)')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--export', type=Path, help='users export (.csv or .jsonl) with updated_at')
+    source.add_argument('--dsn', help='read users straight from PostgreSQL (psycopg or psycopg2)')
+    parser.add_argument('-j', '--jobs', type=int, default=(os.cpu_count() or 1) * 2,
+                        help='parallel snapshot writers (default: 2x CPU count)')
+    parser.add_argument('--overlap', type=float, default=DEFAULT_OVERLAP,
+                        help=f'seconds re-read before the stored watermark (default: {DEFAULT_OVERLAP})')
+    parser.add_argument('--force', action='store_true', help='ignore the watermark and rebuild everything')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Refresh the profile snapshots"""
+    args = parse_args(argv)
+    root = args.root
+    snapshot_dir = root / SNAPSHOT_DIR
+    state_path = snapshot_dir / STATE_NAME
+    start = time.perf_counter()
+
+    try:
+        page, template_hash = load_page_template(root / 'profil.php')
+    except (OSError, ValueError) as e:
+        sys.exit(f"[!] {e}")
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+    state = {} if args.force else load_state(state_path)
+    pages = state.get('pages', {})
+    watermark = parse_timestamp(state['watermark']) if state.get('watermark') else None
+    if state.get('template') != template_hash:
+        if state:
+            print("[!] profil.php changed: every snapshot is rebuilt")
+        # Old snapshots would be served with the old markup; a miss is safer
+        for name in pages:
+            (snapshot_dir / f"{name}.html").unlink(missing_ok=True)
+        pages, watermark = {}, None
+
+    since = watermark - datetime.timedelta(seconds=args.overlap) if watermark else None
+    live_ids = set()
+    if args.export:
+        rows = rows_from_export(args.export, since, live_ids)
+    else:
+        rows = rows_from_database(args.dsn, since, live_ids)
+
+    written = unchanged = removed = 0
+    new_watermark = watermark
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+        pending = []
+        for user in rows:
+            if new_watermark is None or user['updated_at'] > new_watermark:
+                new_watermark = user['updated_at']
+            key = str(user['id'])
+            path = snapshot_dir / f"{key}.html"
+
+            # Only active creators are snapshotted; anyone else goes back to profil.php
+            if not is_live_creator(user):
+                if pages.pop(key, None) is not None:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+                continue
+
+            html = render_profile(page, user)
+            digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+            if pages.get(key) == digest and path.exists():
+                unchanged += 1
+                continue
+            pages[key] = digest
+            pending.append(executor.submit(write_snapshot, path, html))
+            written += 1
+        for future in pending:
+            future.result()
+
+    # Creators deleted since the last run never show up as updated rows
+    for key in [key for key in pages if int(key) not in live_ids]:
+        del pages[key]
+        (snapshot_dir / f"{key}.html").unlink(missing_ok=True)
+        removed += 1
+
+    save_state(state_path, {
+        'template': template_hash,
+        'watermark': new_watermark.isoformat() if new_watermark else None,
+        'pages': pages,
+    })
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'='*50}")
+    print(f"Summary:")
+    print(f"  Snapshots written: {written}")
+    print(f"  Unchanged: {unchanged}")
+    print(f"  Removed (deleted or no longer active creators): {removed}")
+    print(f"  Total snapshots: {len(pages)}")
+    print(f"  Watermark: {new_watermark.isoformat() if new_watermark else '-'}")
+    print(f"  Elapsed: {elapsed:.2f}s")
+    print(f"{'='*50}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""Reconcile transactions_jakob exports against MonCash/NatCash settlement files
+
+Both sides are streamed from CSV or JSONL and joined on reference_externe.
+Flags:
+
+  missing_in_settlement   SUCCESS in the ledger, never settled
+  missing_in_ledger       settled, unknown to the ledger
+  duplicate_ledger        reference appears more than once in the ledger
+  duplicate_settlement    reference settled more than once
+  amount_mismatch         settled amount differs from montant_brut
+  fee_mismatch            platform_fee differs from round(montant_brut * rate, 2)
+  status_mismatch         settled, but the ledger row is not SUCCESS
+
+and writes per-creator and per-channel totals.
+
+Memory stays bounded however many months are fed in: rows are first
+spilled to --buckets temporary files by a hash of the reference, then
+each bucket is joined on its own, with NumPy when it is installed.
+Amounts are handled as integer cents throughout.
+
+    reconcile.py --ledger tx-2026-09.csv --settlement moncash-09.csv natcash-09.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # buckets are joined with dicts instead
+    np = None
+
+DEFAULT_BUCKETS = 64
+DEFAULT_FEE_RATE = '0.05'  # same as the fee_rate installer variable
+# Unreadable rows listed in the issues file; the rest are only counted
+DEFAULT_MAX_BAD_ROWS = 1000
+
+ISSUE_KINDS = ('missing_in_settlement', 'missing_in_ledger', 'duplicate_ledger', 'duplicate_settlement',
+               'amount_mismatch', 'fee_mismatch', 'status_mismatch')
+ISSUE_COLUMNS = ('kind', 'reference_externe', 'recipient_id', 'canal', 'ledger_amount',
+                 'settlement_amount', 'platform_fee', 'expected_fee', 'source')
+
+# Spilled row layouts
+LEDGER_FIELDS = ('ref', 'recipient', 'amount', 'fee', 'canal', 'statut', 'source')
+SETTLEMENT_FIELDS = ('ref', 'amount', 'canal', 'source')
+
+
+# ---------------------------------------------------------
+# Reading
+# ---------------------------------------------------------
+
+def iter_records(path):
+    """(source, dict) for each row of a .csv or .jsonl/.ndjson file"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.suffix.lower() in ('.jsonl', '.ndjson', '.json'):
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    yield f"{path.name}:{number}", json.loads(line)
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield f"{path.name}:{reader.line_num}", row
+
+
+def to_cents(value):
+    """'150.5' -> 15050; exact, no float rounding"""
+    return int((Decimal(str(value).strip()) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def format_cents(cents):
+    if cents is None or cents == '':
+        return ''
+    cents = int(cents)
+    sign = '-' if cents < 0 else ''
+    return f"{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}"
+
+
+def fee_ratio(rate):
+    """'0.05' -> (5, 100)"""
+    return Decimal(rate).as_integer_ratio()
+
+
+def expected_fee_cents(amount_cents, numerator, denominator):
+    """round(amount * rate, 2), half away from zero like PHP round() and SQL ROUND()"""
+    return (2 * amount_cents * numerator + denominator) // (2 * denominator)
+
+
+def bucket_of(ref, buckets):
+    return zlib.crc32(ref.encode('utf-8')) % buckets
+
+
+class BadRows:
+    """Unreadable rows: the first `limit` are kept for the report, all are counted"""
+
+    def __init__(self, limit=DEFAULT_MAX_BAD_ROWS):
+        self.limit = limit
+        self.rows = []
+        self.count = 0
+
+    def add(self, source, error):
+        self.count += 1
+        if len(self.rows) < self.limit:
+            self.rows.append((source, error))
+
+    @property
+    def omitted(self):
+        return self.count - len(self.rows)
+
+
+def spill(paths, side, columns, writers, buckets, bad_rows):
+    """Normalise rows and append them to their bucket file; returns rows read"""
+    count = 0
+    for path in paths:
+        for source, record in iter_records(path):
+            count += 1
+            ref = str(record.get(columns['ref']) or '').strip()
+            try:
+                if not ref:
+                    raise ValueError('no reference')
+                amount = to_cents(record[columns['amount']])
+                if side == 'ledger':
+                    row = (ref, str(record.get('recipient_id') or ''), amount,
+                           to_cents(record.get('platform_fee') or 0),
+                           str(record.get('canal') or '').upper(), str(record.get('statut') or '').upper(),
+                           source)
+                else:
+                    canal = record.get(columns['canal']) if columns['canal'] else ''
+                    row = (ref, amount, str(canal or '').upper(), source)
+            except (KeyError, ValueError, InvalidOperation) as e:
+                bad_rows.add(source, str(e) or 'invalid row')
+                continue
+            writers[bucket_of(ref, buckets)].writerow(row)
+    return count
+
+
+def read_bucket(path, fields):
+    if not path.exists():
+        return {name: [] for name in fields}
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    return {name: [row[i] for row in rows] for i, name in enumerate(fields)}
+
+
+# ---------------------------------------------------------
+# Joining one bucket
+# ---------------------------------------------------------
+
+class Totals:
+    """Running per-creator and per-channel sums, in cents"""
+
+    def __init__(self):
+        self.creators = {}
+        self.channels = {}
+
+    def add_creator(self, recipient, count, gross, fees):
+        row = self.creators.setdefault(recipient, [0, 0, 0])
+        row[0] += int(count)
+        row[1] += int(gross)
+        row[2] += int(fees)
+
+    def add_channel(self, canal, key, value):
+        row = self.channels.setdefault(canal or 'UNKNOWN', {'ledger_count': 0, 'ledger_gross': 0,
+                                                           'ledger_fees': 0, 'settled_count': 0,
+                                                           'settled_gross': 0})
+        row[key] += int(value)
+
+
+def _issue(kind, ref, recipient='', canal='', amount=None, settled=None, fee=None, expected=None, source=''):
+    return (kind, ref, recipient, canal, format_cents(amount), format_cents(settled),
+            format_cents(fee), format_cents(expected), source)
+
+
+def join_bucket_numpy(ledger, settlement, ratio, totals):
+    """Vectorised join of one bucket; returns the issues found"""
+    numerator, denominator = ratio
+    issues = []
+    l_ref = np.array(ledger['ref'], dtype=str)
+    l_amount = np.array([int(v) for v in ledger['amount']], dtype=np.int64)
+    l_fee = np.array([int(v) for v in ledger['fee']], dtype=np.int64)
+    l_status = np.array(ledger['statut'], dtype=str)
+    l_canal = np.array(ledger['canal'], dtype=str)
+    l_recipient = np.array(ledger['recipient'], dtype=str)
+    s_ref = np.array(settlement['ref'], dtype=str)
+    s_amount = np.array([int(v) for v in settlement['amount']], dtype=np.int64)
+    s_canal = np.array(settlement['canal'], dtype=str)
+
+    # Duplicates: every occurrence after the first is reported
+    l_unique, l_first = np.unique(l_ref, return_index=True)
+    s_unique, s_first = np.unique(s_ref, return_index=True)
+    for i in np.flatnonzero(~np.isin(np.arange(len(l_ref)), l_first)):
+        issues.append(_issue('duplicate_ledger', l_ref[i], l_recipient[i], l_canal[i], l_amount[i],
+                             source=ledger['source'][i]))
+    for i in np.flatnonzero(~np.isin(np.arange(len(s_ref)), s_first)):
+        issues.append(_issue('duplicate_settlement', s_ref[i], canal=s_canal[i], settled=s_amount[i],
+                             source=settlement['source'][i]))
+
+    # Fee audit over the whole ledger
+    expected = (2 * l_amount * numerator + denominator) // (2 * denominator)
+    for i in np.flatnonzero(l_fee != expected):
+        issues.append(_issue('fee_mismatch', l_ref[i], l_recipient[i], l_canal[i], l_amount[i],
+                             fee=l_fee[i], expected=expected[i], source=ledger['source'][i]))
+
+    # Join first occurrences
+    _, li, si = np.intersect1d(l_unique, s_unique, assume_unique=True, return_indices=True)
+    l_idx, s_idx = l_first[li], s_first[si]
+    differs = l_amount[l_idx] != s_amount[s_idx]
+    for i, j in zip(l_idx[differs], s_idx[differs]):
+        issues.append(_issue('amount_mismatch', l_ref[i], l_recipient[i], l_canal[i], l_amount[i],
+                             s_amount[j], source=f"{ledger['source'][i]} / {settlement['source'][j]}"))
+    not_success = l_status[l_idx] != 'SUCCESS'
+    for i, j in zip(l_idx[not_success], s_idx[not_success]):
+        issues.append(_issue('status_mismatch', l_ref[i], l_recipient[i], l_canal[i], l_amount[i],
+                             s_amount[j], source=f"{ledger['source'][i]} ({l_status[i]})"))
+
+    success = l_status[l_first] == 'SUCCESS'
+    for i in l_first[success & ~np.isin(l_unique, s_unique)]:
+        issues.append(_issue('missing_in_settlement', l_ref[i], l_recipient[i], l_canal[i], l_amount[i],
+                             source=ledger['source'][i]))
+    for j in s_first[~np.isin(s_unique, l_unique)]:
+        issues.append(_issue('missing_in_ledger', s_ref[j], canal=s_canal[j], settled=s_amount[j],
+                             source=settlement['source'][j]))
+
+    # Totals: SUCCESS ledger rows (first occurrence) and every first settlement
+    rows = l_first[success]
+    recipients, inverse = np.unique(l_recipient[rows], return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(recipients))
+    gross = np.zeros(len(recipients), dtype=np.int64)
+    fees = np.zeros(len(recipients), dtype=np.int64)
+    np.add.at(gross, inverse, l_amount[rows])
+    np.add.at(fees, inverse, l_fee[rows])
+    for k, recipient in enumerate(recipients):
+        totals.add_creator(str(recipient), counts[k], gross[k], fees[k])
+    for canal in np.unique(l_canal[rows]):
+        mask = l_canal[rows] == canal
+        totals.add_channel(str(canal), 'ledger_count', mask.sum())
+        totals.add_channel(str(canal), 'ledger_gross', l_amount[rows][mask].sum())
+        totals.add_channel(str(canal), 'ledger_fees', l_fee[rows][mask].sum())
+    for canal in np.unique(s_canal[s_first]):
+        mask = s_canal[s_first] == canal
+        totals.add_channel(str(canal), 'settled_count', mask.sum())
+        totals.add_channel(str(canal), 'settled_gross', s_amount[s_first][mask].sum())
+    return issues
+
+
+def join_bucket_python(ledger, settlement, ratio, totals):
+    """Same as join_bucket_numpy, with dicts"""
+    numerator, denominator = ratio
+    issues = []
+    ledger_rows = [dict(zip(LEDGER_FIELDS, values)) for values in zip(*(ledger[f] for f in LEDGER_FIELDS))]
+    settled_rows = [dict(zip(SETTLEMENT_FIELDS, values))
+                    for values in zip(*(settlement[f] for f in SETTLEMENT_FIELDS))]
+
+    by_ref = {}
+    for row in ledger_rows:
+        row['amount'], row['fee'] = int(row['amount']), int(row['fee'])
+        expected = expected_fee_cents(row['amount'], numerator, denominator)
+        if row['fee'] != expected:
+            issues.append(_issue('fee_mismatch', row['ref'], row['recipient'], row['canal'], row['amount'],
+                                 fee=row['fee'], expected=expected, source=row['source']))
+        if row['ref'] in by_ref:
+            issues.append(_issue('duplicate_ledger', row['ref'], row['recipient'], row['canal'],
+                                 row['amount'], source=row['source']))
+            continue
+        by_ref[row['ref']] = row
+        if row['statut'] == 'SUCCESS':
+            totals.add_creator(row['recipient'], 1, row['amount'], row['fee'])
+            totals.add_channel(row['canal'], 'ledger_count', 1)
+            totals.add_channel(row['canal'], 'ledger_gross', row['amount'])
+            totals.add_channel(row['canal'], 'ledger_fees', row['fee'])
+
+    settled = set()
+    for row in settled_rows:
+        row['amount'] = int(row['amount'])
+        if row['ref'] in settled:
+            issues.append(_issue('duplicate_settlement', row['ref'], canal=row['canal'],
+                                 settled=row['amount'], source=row['source']))
+            continue
+        settled.add(row['ref'])
+        totals.add_channel(row['canal'], 'settled_count', 1)
+        totals.add_channel(row['canal'], 'settled_gross', row['amount'])
+        match = by_ref.get(row['ref'])
+        if match is None:
+            issues.append(_issue('missing_in_ledger', row['ref'], canal=row['canal'], settled=row['amount'],
+                                 source=row['source']))
+            continue
+        if match['amount'] != row['amount']:
+            issues.append(_issue('amount_mismatch', row['ref'], match['recipient'], match['canal'],
+                                 match['amount'], row['amount'], source=f"{match['source']} / {row['source']}"))
+        if match['statut'] != 'SUCCESS':
+            issues.append(_issue('status_mismatch', row['ref'], match['recipient'], match['canal'],
+                                 match['amount'], row['amount'], source=f"{match['source']} ({match['statut']})"))
+
+    for ref, row in by_ref.items():
+        if row['statut'] == 'SUCCESS' and ref not in settled:
+            issues.append(_issue('missing_in_settlement', ref, row['recipient'], row['canal'], row['amount'],
+                                 source=row['source']))
+    return issues
+
+
+# ---------------------------------------------------------
+# Driver
+# ---------------------------------------------------------
+
+def reconcile(ledger_paths, settlement_paths, issues_path, fee_rate=DEFAULT_FEE_RATE,
+              buckets=DEFAULT_BUCKETS, settlement_columns=None, use_numpy=True,
+              max_bad_rows=DEFAULT_MAX_BAD_ROWS):
+    """Run the whole reconciliation; returns (issue counts, Totals, stats dict)"""
+    settlement_columns = settlement_columns or {'ref': 'reference', 'amount': 'amount', 'canal': 'canal'}
+    ledger_columns = {'ref': 'reference_externe', 'amount': 'montant_brut'}
+    join = join_bucket_numpy if use_numpy and np is not None else join_bucket_python
+    ratio = fee_ratio(fee_rate)
+    totals = Totals()
+    counts = dict.fromkeys(ISSUE_KINDS, 0)
+    bad_rows = BadRows(max_bad_rows)
+
+    with tempfile.TemporaryDirectory(prefix='reconcile-') as tmp:
+        tmp = Path(tmp)
+        stats = {}
+        for side, paths, columns in (('ledger', ledger_paths, ledger_columns),
+                                     ('settlement', settlement_paths, settlement_columns)):
+            files = [open(tmp / f"{side}.{b}.csv", 'w', newline='', encoding='utf-8') for b in range(buckets)]
+            try:
+                writers = [csv.writer(f) for f in files]
+                stats[side] = spill(paths, side, columns, writers, buckets, bad_rows)
+            finally:
+                for f in files:
+                    f.close()
+
+        tmp_issues = f"{issues_path}.tmp"
+        with open(tmp_issues, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(ISSUE_COLUMNS)
+            for b in range(buckets):
+                ledger = read_bucket(tmp / f"ledger.{b}.csv", LEDGER_FIELDS)
+                settlement = read_bucket(tmp / f"settlement.{b}.csv", SETTLEMENT_FIELDS)
+                for issue in join(ledger, settlement, ratio, totals):
+                    counts[issue[0]] += 1
+                    writer.writerow(issue)
+            for source, error in bad_rows.rows:
+                writer.writerow(('unreadable', '', '', '', '', '', '', '', f"{source}: {error}"))
+            if bad_rows.omitted:
+                writer.writerow(('unreadable', '', '', '', '', '', '', '',
+                                 f"{bad_rows.omitted} more unreadable row(s) not listed"))
+        os.replace(tmp_issues, issues_path)
+
+    stats['unreadable'] = bad_rows.count
+    return counts, totals, stats
+
+
+def write_totals(totals_path, totals):
+    creators = {recipient: {'count': c, 'gross': format_cents(g), 'fees': format_cents(f)}
+                for recipient, (c, g, f) in sorted(totals.creators.items())}
+    channels = {canal: {key: (format_cents(value) if key.endswith(('gross', 'fees')) else value)
+                        for key, value in row.items()}
+                for canal, row in sorted(totals.channels.items())}
+    tmp_path = f"{totals_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'creators': creators, 'channels': channels}, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, totals_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ledger', type=Path, nargs='+', required=True,
+                        help='transactions_jakob exports (.csv or .jsonl)')
+    parser.add_argument('--settlement', type=Path, nargs='+', required=True,
+                        help='MonCash/NatCash settlement files (.csv or .jsonl)')
+    parser.add_argument('--ref-column', default='reference',
+                        help='settlement column holding reference_externe (default: reference)')
+    parser.add_argument('--amount-column', default='amount',
+                        help='settlement column holding the amount (default: amount)')
+    parser.add_argument('--canal-column', default='canal',
+                        help='settlement column holding the channel; empty if none (default: canal)')
+    parser.add_argument('--fee-rate', default=DEFAULT_FEE_RATE,
+                        help=f'expected platform fee rate (default: {DEFAULT_FEE_RATE})')
+    parser.add_argument('--buckets', type=int, default=DEFAULT_BUCKETS,
+                        help='spill partitions; raise it to lower peak memory (default: %(default)s)')
+    parser.add_argument('--issues', type=Path, default=Path('reconciliation-issues.csv'))
+    parser.add_argument('--totals', type=Path, default=Path('reconciliation-totals.json'))
+    parser.add_argument('--max-bad-rows', type=int, default=DEFAULT_MAX_BAD_ROWS,
+                        help='unreadable rows listed in the issues file; the rest are only counted '
+                             '(default: %(default)s)')
+    parser.add_argument('--no-numpy', action='store_true', help='join with plain dicts even if NumPy is installed')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Reconcile and report"""
+    args = parse_args(argv)
+    start = time.perf_counter()
+    columns = {'ref': args.ref_column, 'amount': args.amount_column, 'canal': args.canal_column}
+    try:
+        counts, totals, stats = reconcile(args.ledger, args.settlement, args.issues, args.fee_rate,
+                                          max(args.buckets, 1), columns, not args.no_numpy,
+                                          max(args.max_bad_rows, 0))
+    except (OSError, ValueError) as e:
+        sys.exit(f"[!] {e}")
+    write_totals(args.totals, totals)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'='*50}")
+    print(f"Summary:")
+    print(f"  Ledger rows: {stats['ledger']:,}, settlement rows: {stats['settlement']:,}, "
+          f"unreadable: {stats['unreadable']:,}")
+    for kind in ISSUE_KINDS:
+        print(f"  {kind:<22} {counts[kind]:>10,}")
+    for canal, row in sorted(totals.channels.items()):
+        print(f"  {canal:<10} ledger {format_cents(row['ledger_gross']):>14} "
+              f"settled {format_cents(row['settled_gross']):>14}")
+    print(f"  Issues: {args.issues}, totals: {args.totals}")
+    engine = 'numpy' if np is not None and not args.no_numpy else 'python'
+    print(f"  Elapsed: {elapsed:.2f}s ({engine})")
+    print(f"{'='*50}")
+    return 1 if any(counts.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""Generate synthetic users and transactions_jakob rows in PostgreSQL COPY format
+
+Rows are skewed like real traffic: a few creators receive most donations
+(Zipf), a long tail of donors gives once or twice, about a third of
+donations are anonymous, and the canal/statut mix is configurable below.
+
+Generation happens in blocks of BLOCK_ROWS rows, each with its own RNG
+seeded from (seed, table, block). Output therefore depends only on the
+seed, the row counts and --end, not on how many shards or jobs produced
+it. Memory stays constant: one block is in memory at a time. On the
+partitioned schema, the monthly partitions covering --days are created
+before loading.
+
+    seed-data.py --users 200000 --transactions 5000000 --out seed/ -j 8
+    psql -d jakob_db -f seed/load.sql
+
+    seed-data.py --transactions 1000000 --stdout transactions | \\
+        psql -d jakob_db -c "\\copy transactions_jakob (...) FROM STDIN"
+
+    seed-data.py --dsn "dbname=jakob_db" -j 8    # COPY straight in (psycopg)
+"""
+
+import argparse
+import datetime
+import gzip
+import importlib.util
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+    try:
+        import psycopg2
+    except ImportError:  # --dsn needs one of them; file and stdout output do not
+        psycopg2 = None
+
+# Rows generated per RNG block; also the unit of work handed to shards
+BLOCK_ROWS = 10_000
+
+# Explicit user ids start above this, clear of rows inserted by database.sql
+ID_OFFSET = 1000
+
+USER_COLUMNS = ('id', 'username', 'telephone', 'prenom', 'nom', 'is_creator', 'active', 'created_at')
+TRANSACTION_COLUMNS = ('user_id', 'recipient_id', 'montant_brut', 'platform_fee', 'canal',
+                       'reference_externe', 'statut', 'created_at')
+TABLES = {'users': ('users', USER_COLUMNS),
+          'transactions': ('transactions_jakob', TRANSACTION_COLUMNS)}
+
+CANALS = (('MONCASH', 0.7), ('NATCASH', 0.3))
+STATUSES = (('SUCCESS', 0.85), ('PENDING', 0.08), ('FAILED', 0.07))
+ANONYMOUS_RATE = 0.3
+CREATOR_ZIPF_EXPONENT = 1.1
+FEE_RATE_PERCENT = 5  # same 5% as api/don.php
+MIN_AMOUNT = 50       # CHECK (montant_brut >= 50)
+
+FIRST_NAMES = ('Jean', 'Marie', 'Pierre', 'Rose', 'Jacques', 'Nadège', 'Wood', 'Mirlande',
+               'Ricardo', 'Fabienne', 'Kervens', 'Roseline', 'Stanley', 'Guerline', 'Widlin', 'Esther')
+LAST_NAMES = ('Joseph', 'Pierre', 'Jean-Baptiste', 'Louis', 'Charles', 'Saint-Fleur', 'Dorsainvil',
+              'Casimir', 'Toussaint', 'Désir', 'Exantus', 'Augustin', 'Delva', 'Célestin')
+
+
+def block_rng(seed, table, block):
+    return random.Random(f"{seed}/{table}/{block}")
+
+
+def copy_text(value):
+    """One COPY text-format field; generated values never need escaping"""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return str(value)
+
+
+def format_rows(rows):
+    return ''.join('\t'.join(copy_text(v) for v in row) + '\n' for row in rows)
+
+
+def timestamp(end, seconds_before):
+    return (end - datetime.timedelta(seconds=seconds_before)).strftime('%Y-%m-%d %H:%M:%S+00')
+
+
+def weighted(rng, choices, k):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=k)
+
+
+class SeedSpec:
+    """Everything a worker needs to regenerate any block"""
+
+    def __init__(self, seed, users, creators, transactions, days, end):
+        self.seed = seed
+        self.users = users
+        self.creators = creators
+        self.transactions = transactions
+        self.days = days
+        self.end = end
+
+    def blocks(self, table):
+        rows = self.users if table == 'users' else self.transactions
+        return math.ceil(rows / BLOCK_ROWS)
+
+    def user_rows(self, block):
+        rng = block_rng(self.seed, 'users', block)
+        first = block * BLOCK_ROWS
+        for index in range(first, min(first + BLOCK_ROWS, self.users)):
+            uid = ID_OFFSET + 1 + index
+            prenom, nom = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f"{prenom}{nom}".lower().replace('-', '').replace('è', 'e').replace('é', 'e')
+            yield (uid, f"{username}{uid}", f"509{30000000 + uid:08d}",
+                   prenom if rng.random() < 0.8 else None, nom if rng.random() < 0.8 else None,
+                   index < self.creators, rng.random() < 0.97,
+                   timestamp(self.end, rng.uniform(0, self.days * 86400)))
+
+    def _creator_weights(self):
+        # Cumulative Zipf weights; creator ranks are the first user ids
+        total = 0.0
+        cumulative = []
+        for rank in range(1, self.creators + 1):
+            total += rank ** -CREATOR_ZIPF_EXPONENT
+            cumulative.append(total)
+        return cumulative
+
+    def _donor_stride(self):
+        # Scatters skewed donor ranks over all user ids (coprime => permutation)
+        stride = 7919
+        while math.gcd(stride, self.users) != 1:
+            stride += 2
+        return stride
+
+    def transaction_rows(self, block, cumulative=None):
+        rng = block_rng(self.seed, 'transactions', block)
+        first = block * BLOCK_ROWS
+        count = max(0, min(BLOCK_ROWS, self.transactions - first))
+        cumulative = cumulative or self._creator_weights()
+        stride = self._donor_stride()
+
+        recipients = rng.choices(range(ID_OFFSET + 1, ID_OFFSET + 1 + self.creators),
+                                 cum_weights=cumulative, k=count)
+        canals = weighted(rng, CANALS, count)
+        statuses = weighted(rng, STATUSES, count)
+        for i in range(count):
+            if rng.random() < ANONYMOUS_RATE:
+                donor = None
+            else:
+                # r**3 piles most donations onto few donors, the rest give rarely
+                donor = ID_OFFSET + 1 + (int(self.users * rng.random() ** 3) * stride) % self.users
+            amount = max(MIN_AMOUNT, min(100_000, round(rng.lognormvariate(math.log(250), 0.9) / 5) * 5))
+            fee_cents = amount * FEE_RATE_PERCENT
+            yield (donor, recipients[i], f"{amount}.00", f"{fee_cents // 100}.{fee_cents % 100:02d}",
+                   canals[i], f"seed-{self.seed}-{first + i:010d}", statuses[i],
+                   timestamp(self.end, rng.uniform(0, self.days * 86400)))
+
+    def rows(self, table, block, cumulative=None):
+        if table == 'users':
+            return self.user_rows(block)
+        return self.transaction_rows(block, cumulative)
+
+
+def shard_blocks(total_blocks, shards, shard):
+    """Contiguous block range for one shard"""
+    start = total_blocks * shard // shards
+    return range(start, total_blocks * (shard + 1) // shards)
+
+
+def iter_copy_data(spec, table, blocks):
+    """COPY text for the given blocks, one block per chunk"""
+    cumulative = spec._creator_weights() if table == 'transactions' else None
+    for block in blocks:
+        yield format_rows(spec.rows(table, block, cumulative))
+
+
+# ---------------------------------------------------------
+# Outputs
+# ---------------------------------------------------------
+
+def write_shard_file(spec, table, shards, shard, out_dir, compress):
+    """Write one shard to <out>/<table>.<shard>.copy[.gz]; returns (path, rows)"""
+    path = out_dir / f"{table}.{shard:03d}.copy{'.gz' if compress else ''}"
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    opener = gzip.open if compress else open
+    rows = 0
+    with opener(tmp_path, 'wt', encoding='utf-8', newline='') as f:
+        for chunk in iter_copy_data(spec, table, shard_blocks(spec.blocks(table), shards, shard)):
+            f.write(chunk)
+            rows += chunk.count('\n')
+    os.replace(tmp_path, path)
+    return path, rows
+
+
+class _CopyStream:
+    """Minimal file-like object for psycopg2's copy_expert"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk.encode('utf-8')
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    readline = read
+
+
+def copy_sql(table):
+    name, columns = TABLES[table]
+    return f"COPY {name} ({', '.join(columns)}) FROM STDIN"
+
+
+def load_shard(spec, table, shards, shard, dsn):
+    """COPY one shard straight into the database; returns rows loaded"""
+    chunks = iter_copy_data(spec, table, shard_blocks(spec.blocks(table), shards, shard))
+    rows = 0
+    if psycopg is not None:
+        with psycopg.connect(dsn) as conn, conn.cursor() as cursor:
+            with cursor.copy(copy_sql(table)) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+                    rows += chunk.count('\n')
+        return rows
+
+    def counted():
+        nonlocal rows
+        for chunk in chunks:
+            rows += chunk.count('\n')
+            yield chunk
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.copy_expert(copy_sql(table), _CopyStream(counted()))
+    finally:
+        conn.close()
+    return rows
+
+
+BEFORE_LOAD_SQL = """\
+-- Totals are rebuilt once at the end instead of row by row during COPY
+ALTER TABLE transactions_jakob DISABLE TRIGGER trg_creator_totals;
+"""
+
+ENABLE_TRIGGER_SQL = """\
+ALTER TABLE transactions_jakob ENABLE TRIGGER trg_creator_totals;
+"""
+
+POST_LOAD_SQL = """\
+SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT MAX(id) FROM users));
+ANALYZE users;
+ANALYZE transactions_jakob;
+-- Then fill creator_totals: psql -f backfill_creator_totals.sql
+"""
+
+AFTER_LOAD_SQL = ENABLE_TRIGGER_SQL + POST_LOAD_SQL
+
+
+def partitions_sql(spec):
+    """DO block creating every monthly partition the seed's created_at range needs
+
+    A no-op on the plain schema. On the partitioned one (installer.py
+    --partitioned) rows would otherwise land in transactions_jakob_default,
+    and a month created later would then fail on them. Partition names and
+    bounds come from manage-partitions.py.
+    """
+    path = Path(__file__).resolve().parent / 'manage-partitions.py'
+    module_spec = importlib.util.spec_from_file_location('manage_partitions', path)
+    partitions = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(partitions)
+
+    month = partitions.month_start((spec.end - datetime.timedelta(days=spec.days)).date())
+    last = partitions.month_start(spec.end.date())
+    statements = []
+    while month <= last:
+        statements.append(f"        EXECUTE $ddl${partitions.create_partition_sql(month)}$ddl$;")
+        month = partitions.add_months(month, 1)
+    return '\n'.join([
+        "DO $$",
+        "BEGIN",
+        "    IF (SELECT relkind FROM pg_class WHERE oid = 'transactions_jakob'::regclass) = 'p' THEN",
+        *statements,
+        "    END IF;",
+        "END $$;",
+        "",
+    ])
+
+
+def write_load_script(out_dir, files, spec):
+    """psql script loading every shard file in dependency order, in one transaction
+
+    A failed \\copy rolls everything back, trigger change included.
+    """
+    lines = ["\\set ON_ERROR_STOP on", "BEGIN;", partitions_sql(spec), BEFORE_LOAD_SQL]
+    for table in ('users', 'transactions'):
+        name, columns = TABLES[table]
+        for path in files[table]:
+            source = f"program 'gzip -dc {path.resolve()}'" if path.suffix == '.gz' else f"'{path.resolve()}'"
+            lines.append(f"\\copy {name} ({', '.join(columns)}) FROM {source}")
+    lines.append('')
+    lines.append(AFTER_LOAD_SQL)
+    lines.append('COMMIT;')
+    path = out_dir / 'load.sql'
+    path.write_text('\n'.join(lines), encoding='utf-8')
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--creators', type=int,
+                        help='how many of the users are creators (default: 2%% of users)')
+    parser.add_argument('--transactions', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=365,
+                        help='spread created_at over this many days before --end (default: 365)')
+    parser.add_argument('--end', type=datetime.date.fromisoformat,
+                        default=datetime.datetime.now(datetime.timezone.utc).date(),
+                        help='latest created_at, YYYY-MM-DD (default: today; fix it for reproducible output)')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='split each table into this many files/COPY streams (default: --jobs)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of parallel workers (default: CPU count)')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--out', type=Path, default=Path('seed'),
+                        help='directory for the COPY files and load.sql (default: seed/)')
+    output.add_argument('--stdout', choices=sorted(TABLES),
+                        help='stream one table to stdout instead, for psql \\copy ... FROM STDIN')
+    output.add_argument('--dsn', help='COPY straight into this database (needs psycopg or psycopg2)')
+    parser.add_argument('--gzip', action='store_true', help='gzip the COPY files')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Generate the seed data"""
+    args = parse_args(argv)
+    creators = args.creators if args.creators is not None else max(1, args.users // 50)
+    if not 0 < creators <= args.users:
+        sys.exit("[!] --creators must be between 1 and --users")
+    end = datetime.datetime.combine(args.end, datetime.time(), datetime.timezone.utc)
+    spec = SeedSpec(args.seed, args.users, creators, args.transactions, args.days, end)
+
+    if args.stdout:
+        for chunk in iter_copy_data(spec, args.stdout, range(spec.blocks(args.stdout))):
+            sys.stdout.write(chunk)
+        return
+
+    if args.dsn and psycopg is None and psycopg2 is None:
+        sys.exit("[!] --dsn needs psycopg (or psycopg2); use --out and psql instead")
+
+    workers = max(args.jobs, 1)
+    shards = max(args.shards or workers, 1)
+    start = time.perf_counter()
+    totals = {}
+    files = {}
+    if not args.dsn:
+        args.out.mkdir(parents=True, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if args.dsn:
+            with (psycopg or psycopg2).connect(args.dsn) as conn, conn.cursor() as cursor:
+                cursor.execute(partitions_sql(spec))
+                cursor.execute(BEFORE_LOAD_SQL)
+        # The shards COPY in parallel connections, so the trigger cannot be
+        # disabled in their transaction: it is switched back on whatever happens
+        futures = []
+        try:
+            # users first: transactions reference them
+            for table in ('users', 'transactions'):
+                if args.dsn:
+                    futures = [executor.submit(load_shard, spec, table, shards, shard, args.dsn)
+                               for shard in range(shards)]
+                    totals[table] = sum(future.result() for future in futures)
+                else:
+                    futures = [executor.submit(write_shard_file, spec, table, shards, shard, args.out, args.gzip)
+                               for shard in range(shards)]
+                    results = [future.result() for future in futures]
+                    files[table] = [path for path, _ in results]
+                    totals[table] = sum(rows for _, rows in results)
+                print(f"[+] {table}: {totals[table]:,} rows in {shards} shard(s)")
+        finally:
+            if args.dsn:
+                for future in futures:
+                    future.cancel()
+                with (psycopg or psycopg2).connect(args.dsn) as conn, conn.cursor() as cursor:
+                    cursor.execute(ENABLE_TRIGGER_SQL)
+        if args.dsn:
+            with (psycopg or psycopg2).connect(args.dsn) as conn, conn.cursor() as cursor:
+                cursor.execute(POST_LOAD_SQL)
+
+    elapsed = time.perf_counter() - start
+    rows = sum(totals.values())
+    print(f"\n{'='*50}")
+    print(f"  Users: {totals['users']:,} ({creators:,} creators)")
+    print(f"  Transactions: {totals['transactions']:,}")
+    if args.dsn:
+        print(f"  Loaded into the database; run backfill_creator_totals.sql next")
+    else:
+        print(f"  Load with: psql -f {write_load_script(args.out, files, spec)}")
+    print(f"  Elapsed: {elapsed:.2f}s with {workers} worker(s), {rows / max(elapsed, 1e-9):,.0f} rows/s")
+    print(f"{'='*50}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+-- 2. TABLE TRANSACTIONS (partitionnée par mois sur created_at, PostgreSQL 13+)
+-- Variante générée par installer.py --partitioned
+-- Les partitions mensuelles s'appellent transactions_jakob_pAAAAMM ;
+-- manage-partitions.py crée les suivantes et archive les anciennes.
+CREATE TABLE IF NOT EXISTS transactions_jakob (
+    id BIGSERIAL,
+    user_id INTEGER, -- NULL si anonyme
+    recipient_id INTEGER NOT NULL REFERENCES users(id),
+    montant_brut NUMERIC(12,2) NOT NULL CHECK (montant_brut >= 50),
+    platform_fee NUMERIC(12,2) NOT NULL DEFAULT 0,
+    canal VARCHAR(20) CHECK (canal IN ('MONCASH', 'NATCASH')),
+    reference_externe VARCHAR(100),
+    statut VARCHAR(20) DEFAULT 'PENDING',
+    metadata JSONB DEFAULT '{}',
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Filet de sécurité : une ligne hors de toute partition mensuelle atterrit ici.
+-- Elle doit rester vide (manage-partitions.py le signale sinon).
+CREATE TABLE IF NOT EXISTS transactions_jakob_default
+    PARTITION OF transactions_jakob DEFAULT;
+
+-- Mois courant et deux mois d'avance, pour que le site marche dès l'import
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR i IN 0..2 LOOP
+        month_start := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => i))::date;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF transactions_jakob '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'transactions_jakob_p' || to_char(month_start, 'YYYYMM'),
+            month_start || ' 00:00:00+00',
+            (month_start + INTERVAL '1 month')::date || ' 00:00:00+00');
+    END LOOP;
+END $$;
+
+-- 2b. IDEMPOTENCE DE reference_externe
+-- Une contrainte UNIQUE sur une table partitionnée doit contenir created_at :
+-- elle ne garantirait l'unicité que mois par mois. Les références vivent donc
+-- dans une table non partitionnée, qui survit aussi à l'archivage des
+-- partitions. Un doublon est ignoré comme le ferait ON CONFLICT DO NOTHING
+-- (aucune ligne insérée, RETURNING vide).
+CREATE TABLE IF NOT EXISTS transaction_refs (
+    reference_externe VARCHAR(100) PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION transaction_refs_claim() RETURNS trigger AS $$
+BEGIN
+    IF NEW.reference_externe IS NULL THEN
+        RETURN NEW;
+    END IF;
+    INSERT INTO transaction_refs (reference_externe) VALUES (NEW.reference_externe)
+    ON CONFLICT DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN NULL; -- déjà vue : le don n'est pas inséré une deuxième fois
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_transaction_refs ON transactions_jakob;
+CREATE TRIGGER trg_transaction_refs
+    BEFORE INSERT ON transactions_jakob
+    FOR EACH ROW EXECUTE FUNCTION transaction_refs_claim();
+
+-- Parcours par période (archivage, rapports) : BRIN, quelques pages par partition
+CREATE INDEX IF NOT EXISTS idx_tx_created_brin
+    ON transactions_jakob USING BRIN (created_at);
@@ -0,0 +1,54 @@
+<?php
+// Statistiques de réutilisation des connexions (réservé à localhost)
+header("Content-Type: application/json");
+
+if (!in_array($_SERVER['REMOTE_ADDR'] ?? '', ['127.0.0.1', '::1'], true)) {
+    http_response_code(403);
+    echo json_encode(["error" => "Accès réservé à localhost."]);
+    exit;
+}
+
+require_once '../db.php';
+
+try {
+    // Côté PHP : le worker courant et le coût de sa connexion
+    $backend = $pdo->query("SELECT pg_backend_pid() AS pid")->fetch();
+    $stats = [
+        "php_worker_pid" => getmypid(),
+        "connect_ms" => round($dbConnectMs, 3),
+        "server_backend_pid" => (int) $backend['pid']
+    ];
+
+    // Côté PgBouncer : console d'administration (base virtuelle "pgbouncer")
+    $admin = new PDO("pgsql:host=$host;port=$port;dbname=pgbouncer", $user, $pass, [
+        PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+        PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC,
+        PDO::ATTR_EMULATE_PREPARES => true
+    ]);
+    foreach ($admin->query("SHOW POOLS") as $pool) {
+        if ($pool['database'] !== $db) continue;
+        $servers = $pool['sv_active'] + $pool['sv_idle'] + $pool['sv_used'];
+        $stats['pool'] = [
+            "clients" => $pool['cl_active'] + $pool['cl_waiting'],
+            "clients_waiting" => (int) $pool['cl_waiting'],
+            "servers" => $servers,
+            "clients_per_server" => $servers ? round(($pool['cl_active'] + $pool['cl_waiting']) / $servers, 2) : null
+        ];
+    }
+    foreach ($admin->query("SHOW STATS") as $row) {
+        if ($row['database'] !== $db) continue;
+        $servers = $stats['pool']['servers'] ?? 0;
+        $stats['stats'] = [
+            "transactions" => (int) $row['total_xact_count'],
+            "avg_wait_us" => (int) $row['avg_wait_time'],
+            "transactions_per_server" => $servers ? round($row['total_xact_count'] / $servers, 1) : null
+        ];
+    }
+
+    echo json_encode($stats);
+
+} catch (Exception $e) {
+    http_response_code(500);
+    echo json_encode(["error" => $e->getMessage()]);
+}
+?>
@@ -0,0 +1,28 @@
+<?php
+// db.php (profil poolé)
+// Connexions PDO persistantes vers PgBouncer (mode transaction), voir config/pgbouncer.ini
+$host = '127.0.0.1';
+$db   = '{{ db_name }}';
+$user = '{{ db_user }}'; 
+$pass = '{{ db_password }}'; // <--- CHANGE CECI (et dans config/userlist.txt)
+$port = "{{ pgbouncer_port }}";
+
+try {
+    $dbConnectStart = microtime(true);
+    $pdo = new PDO("pgsql:host=$host;port=$port;dbname=$db", $user, $pass, [
+        PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+        PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC,
+        // Le worker PHP garde sa connexion d'une requête à l'autre
+        PDO::ATTR_PERSISTENT => true,
+        // En mode transaction, deux requêtes ne retombent pas forcément sur le
+        // même serveur : pas de requêtes préparées côté PostgreSQL.
+        PDO::ATTR_EMULATE_PREPARES => true
+    ]);
+    // Quasi nul quand la connexion persistante est réutilisée
+    $dbConnectMs = (microtime(true) - $dbConnectStart) * 1000;
+} catch (\PDOException $e) {
+    http_response_code(500);
+    // En prod : error_log($e->getMessage());
+    die(json_encode(["error" => "Erreur de connexion BDD. Vérifiez db.php et PgBouncer"]));
+}
+?>
@@ -0,0 +1,53 @@
+<?php
+// timing.php (généré par installer.py --timing)
+// Chronomètre les phases d'une requête : en-tête Server-Timing + une ligne
+// JSON par requête dans {{ timing_log }} (lue par analyze-timing.py). Les
+// pages appellent timing_start()/timing_stop() dans tous les cas ; sans
+// --timing, templates/timing.php les rend vides.
+$GLOBALS['jakob_timing'] = ['start' => microtime(true), 'phases' => [], 'open' => []];
+
+// Tout est bufferisé : l'en-tête peut encore partir à la fin de la requête
+ob_start();
+
+function timing_start($phase) {
+    $GLOBALS['jakob_timing']['open'][$phase] = microtime(true);
+}
+
+function timing_stop($phase) {
+    $timing = &$GLOBALS['jakob_timing'];
+    if (!isset($timing['open'][$phase])) return;
+    $ms = (microtime(true) - $timing['open'][$phase]) * 1000;
+    $timing['phases'][$phase] = ($timing['phases'][$phase] ?? 0) + $ms;
+    unset($timing['open'][$phase]);
+}
+
+function timing_flush() {
+    $timing = &$GLOBALS['jakob_timing'];
+    foreach (array_keys($timing['open']) as $phase) timing_stop($phase); // exit/die en cours de phase
+    $total = (microtime(true) - $timing['start']) * 1000;
+
+    if (!headers_sent()) {
+        $metrics = [];
+        foreach ($timing['phases'] as $phase => $ms) $metrics[] = sprintf('%s;dur=%.2f', $phase, $ms);
+        $metrics[] = sprintf('total;dur=%.2f', $total);
+        header('Server-Timing: ' . implode(', ', $metrics));
+    }
+
+    $line = json_encode([
+        'ts' => gmdate('Y-m-d\TH:i:s\Z'),
+        'endpoint' => ltrim(str_replace(__DIR__, '', $_SERVER['SCRIPT_FILENAME'] ?? ''), '/'),
+        'method' => $_SERVER['REQUEST_METHOD'] ?? 'CLI',
+        'status' => http_response_code() ?: 200,
+        'total_ms' => round($total, 3),
+        'phases' => array_map(function ($ms) { return round($ms, 3); }, $timing['phases'])
+    ]);
+    // Chemin relatif : à côté du projet, jamais dans la racine web
+    $log = '{{ timing_log }}';
+    if ($log[0] !== '/') $log = dirname(__DIR__) . '/' . $log;
+    if (@file_put_contents($log, $line . "\n", FILE_APPEND | LOCK_EX) === false) {
+        error_log('jakob-timing ' . $line);
+    }
+}
+
+register_shutdown_function('timing_flush');
+?>
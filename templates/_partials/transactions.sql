@@ -0,0 +1,13 @@
+-- 2. TABLE TRANSACTIONS
+CREATE TABLE IF NOT EXISTS transactions_jakob (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER, -- NULL si anonyme
+    recipient_id INTEGER NOT NULL REFERENCES users(id),
+    montant_brut NUMERIC(12,2) NOT NULL CHECK (montant_brut >= 50),
+    platform_fee NUMERIC(12,2) NOT NULL DEFAULT 0,
+    canal VARCHAR(20) CHECK (canal IN ('MONCASH', 'NATCASH')),
+    reference_externe VARCHAR(100) UNIQUE,
+    statut VARCHAR(20) DEFAULT 'PENDING',
+    metadata JSONB DEFAULT '{}',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
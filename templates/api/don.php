@@ -0,0 +1,59 @@
+<?php
+header("Access-Control-Allow-Origin: *");
+header("Content-Type: application/json");
+require_once '../timing.php';
+timing_start('connect');
+require_once '../db.php';
+timing_stop('connect');
+
+$input = json_decode(file_get_contents("php://input"), true);
+
+if (empty($input['createurId']) || empty($input['montant']) || empty($input['canal'])) {
+    http_response_code(400);
+    echo json_encode(["error" => "Données incomplètes."]);
+    exit;
+}
+
+try {
+    // Vérif créateur + frais + insertion idempotente : un seul aller-retour.
+    // Une référence déjà vue n'insère rien (transaction_id NULL) : le retry
+    // reçoit la même réponse, sans insertion avortée ni exception.
+    $sql = "WITH don (recipient_id, montant, canal, reference_externe) AS (
+                VALUES (CAST(? AS INTEGER), CAST(? AS NUMERIC), CAST(? AS VARCHAR), CAST(? AS VARCHAR))
+            ), createur AS (
+                SELECT u.id FROM users u JOIN don d ON u.id = d.recipient_id
+                WHERE u.is_creator = TRUE
+            ), insere AS (
+                INSERT INTO transactions_jakob
+                    (recipient_id, montant_brut, platform_fee, canal, reference_externe, statut)
+                SELECT c.id, d.montant, ROUND(d.montant * {{ fee_rate }}, 2), d.canal, d.reference_externe, 'PENDING'
+                FROM don d JOIN createur c ON c.id = d.recipient_id
+                ON CONFLICT DO NOTHING
+                RETURNING id
+            )
+            SELECT (SELECT id FROM createur) AS createur_id,
+                   (SELECT id FROM insere) AS transaction_id";
+
+    timing_start('donation_insert');
+    $stmt = $pdo->prepare($sql);
+    $stmt->execute([
+        $input['createurId'],
+        $input['montant'],
+        $input['canal'],
+        $input['idempotencyKey'] ?? null
+    ]);
+    $row = $stmt->fetch();
+    timing_stop('donation_insert');
+    if ($row['createur_id'] === null) throw new Exception("Créateur introuvable.");
+
+    // Succès (ou doublon déjà enregistré)
+    echo json_encode([
+        "success" => true,
+        "payment_url" => "thanks.html" 
+    ]);
+
+} catch (Exception $e) {
+    http_response_code(400);
+    echo json_encode(["error" => $e->getMessage()]);
+}
+?>
\ No newline at end of file
@@ -0,0 +1,47 @@
+<?php
+header("Access-Control-Allow-Origin: *");
+header("Content-Type: application/json");
+require_once '../timing.php';
+timing_start('connect');
+require_once '../db.php';
+timing_stop('connect');
+
+$input = json_decode(file_get_contents("php://input"), true);
+
+// Validation
+if (empty($input['username']) || empty($input['telephone'])) {
+    http_response_code(400);
+    echo json_encode(["error" => "Username et Téléphone requis."]);
+    exit;
+}
+
+// Nettoyage
+$username = strtolower(preg_replace('/[^a-zA-Z0-9_]/', '', $input['username']));
+$phone = preg_replace('/[^0-9]/', '', $input['telephone']);
+if (strlen($phone) == 8) $phone = '509' . $phone;
+
+try {
+    // Vérification doublons
+    timing_start('dup_check');
+    $check = $pdo->prepare("SELECT id FROM users WHERE telephone = ? OR username = ?");
+    $check->execute([$phone, $username]);
+    $duplicate = $check->fetch();
+    timing_stop('dup_check');
+    if ($duplicate) {
+        throw new Exception("Ce numéro ou ce nom d'utilisateur est déjà pris.");
+    }
+
+    // Insertion
+    timing_start('insert');
+    $stmt = $pdo->prepare("INSERT INTO users (username, telephone, active) VALUES (?, ?, TRUE)");
+    $stmt->execute([$username, $phone]);
+    timing_stop('insert');
+
+    http_response_code(201);
+    echo json_encode(["success" => true]);
+
+} catch (Exception $e) {
+    http_response_code(400);
+    echo json_encode(["error" => $e->getMessage()]);
+}
+?>
\ No newline at end of file
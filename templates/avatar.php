@@ -0,0 +1,24 @@
+<?php
+// avatar.php
+// Avatar SVG à initiales, identique à avatars.py (utilisé quand avatars/<clé>.svg manque)
+$name = trim($_GET['name'] ?? '?');
+$key = substr(sha1(mb_strtolower($name, 'UTF-8')), 0, 16);
+
+$palette = ['#2b7a78', '#3aafa9', '#17252a', '#ea2a33', '#6a4c93', '#1982c4', '#8ac926', '#ff924c'];
+$background = $palette[hexdec(substr($key, 0, 8)) % count($palette)];
+
+$parts = preg_split('/[\s_.\-]+/u', ltrim($name, '@'), -1, PREG_SPLIT_NO_EMPTY);
+$initials = '';
+foreach (array_slice($parts, 0, 2) as $part) {
+    $initials .= mb_substr($part, 0, 1, 'UTF-8');
+}
+$initials = $initials === '' ? '?' : mb_strtoupper($initials, 'UTF-8');
+
+header("Content-Type: image/svg+xml");
+header("Cache-Control: public, max-age=604800");
+echo '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+    . '<rect width="100" height="100" fill="' . $background . '"/>'
+    . '<text x="50" y="50" dy=".35em" text-anchor="middle" '
+    . 'font-family="Segoe UI, sans-serif" font-size="40" fill="#ffffff">'
+    . htmlspecialchars($initials, ENT_NOQUOTES) . '</text></svg>';
+?>
\ No newline at end of file
@@ -0,0 +1,48 @@
+
+-- RECALCUL DE creator_totals DEPUIS transactions_jakob
+-- A lancer hors transaction, après database.sql, sur une base déjà remplie :
+--   psql -d {{ db_name }} -f backfill_creator_totals.sql
+-- Chaque lot de créateurs est committé séparément : les dons continuent
+-- d'arriver pendant le recalcul. Le verrou pris par lot bloque seulement
+-- le trigger le temps du lot, pour qu'aucun don ne soit compté deux fois
+-- ou perdu.
+
+DO $$
+DECLARE
+    batch_size CONSTANT INTEGER := 1000;
+    last_id INTEGER := 0;
+    max_id INTEGER;
+BEGIN
+    SELECT COALESCE(MAX(id), 0) INTO max_id FROM users;
+
+    WHILE last_id < max_id LOOP
+        LOCK TABLE creator_totals IN SHARE ROW EXCLUSIVE MODE;
+
+        INSERT INTO creator_totals AS t
+               (recipient_id, gross, fees, donation_count, last_donation_at, updated_at)
+        SELECT recipient_id, SUM(montant_brut), SUM(platform_fee), COUNT(*), MAX(created_at),
+               CURRENT_TIMESTAMP
+          FROM transactions_jakob
+         WHERE recipient_id > last_id AND recipient_id <= last_id + batch_size
+           AND statut = 'SUCCESS'
+         GROUP BY recipient_id
+        ON CONFLICT (recipient_id) DO UPDATE
+           SET gross = EXCLUDED.gross,
+               fees = EXCLUDED.fees,
+               donation_count = EXCLUDED.donation_count,
+               last_donation_at = EXCLUDED.last_donation_at,
+               updated_at = EXCLUDED.updated_at;
+
+        -- Créateurs qui n'ont plus aucun don 'SUCCESS'
+        UPDATE creator_totals c
+           SET gross = 0, fees = 0, donation_count = 0, last_donation_at = NULL,
+               updated_at = CURRENT_TIMESTAMP
+         WHERE c.recipient_id > last_id AND c.recipient_id <= last_id + batch_size
+           AND NOT EXISTS (SELECT 1 FROM transactions_jakob tx
+                            WHERE tx.recipient_id = c.recipient_id AND tx.statut = 'SUCCESS');
+
+        last_id := last_id + batch_size;
+        COMMIT;
+        RAISE NOTICE 'creator_totals : créateurs 1..% recalculés', LEAST(last_id, max_id);
+    END LOOP;
+END $$;
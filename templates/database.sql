@@ -0,0 +1,108 @@
+
+-- SCHEMA DE BASE DE DONNEES JAKOB
+-- A importer dans PostgreSQL
+
+-- 1. TABLE UTILISATEURS
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    telephone VARCHAR(20) UNIQUE NOT NULL,
+    prenom VARCHAR(50), -- Optionnel
+    nom VARCHAR(50),    -- Optionnel
+    is_creator BOOLEAN DEFAULT FALSE,
+    active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Bases créées avant l'ajout de la colonne
+ALTER TABLE users ADD COLUMN IF NOT EXISTS
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+-- updated_at sert de watermark à prerender-profiles.py
+CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users (updated_at);
+
+CREATE OR REPLACE FUNCTION users_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp(); -- heure réelle, pas le début de la transaction
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_touch ON users;
+CREATE TRIGGER trg_users_touch
+    BEFORE UPDATE OF username, prenom, nom, is_creator, active ON users
+    FOR EACH ROW EXECUTE FUNCTION users_touch();
+
+{{> transactions.sql }}
+
+-- 3. INDEX DES REQUETES CHAUDES
+-- Portefeuille / historique d'un créateur (du plus récent au plus ancien)
+CREATE INDEX IF NOT EXISTS idx_tx_recipient_created
+    ON transactions_jakob (recipient_id, created_at DESC)
+    INCLUDE (montant_brut, platform_fee, statut);
+
+-- Totaux d'un créateur par statut (index-only scan)
+CREATE INDEX IF NOT EXISTS idx_tx_recipient_statut
+    ON transactions_jakob (recipient_id, statut)
+    INCLUDE (montant_brut, platform_fee, created_at);
+
+-- File des paiements en attente (petit index partiel). payment-worker.py
+-- passe les dons qu'il traite en 'PROCESSING' le temps de l'appel au
+-- fournisseur ; l'ancien index (PENDING seul) est remplacé.
+DROP INDEX IF EXISTS idx_tx_pending_created;
+CREATE INDEX IF NOT EXISTS idx_tx_queue_created
+    ON transactions_jakob (created_at)
+    WHERE statut IN ('PENDING', 'PROCESSING');
+
+-- 4. TOTAUX PAR CREATEUR (maintenus par trigger)
+-- Seuls les dons au statut 'SUCCESS' sont comptés. Le tableau de bord lit
+-- une seule ligne : SELECT * FROM creator_totals WHERE recipient_id = ?
+-- last_donation_at ne recule pas si un don repasse hors 'SUCCESS' ;
+-- backfill_creator_totals.sql le recalcule exactement.
+CREATE TABLE IF NOT EXISTS creator_totals (
+    recipient_id INTEGER PRIMARY KEY REFERENCES users(id),
+    gross NUMERIC(14,2) NOT NULL DEFAULT 0,
+    fees NUMERIC(14,2) NOT NULL DEFAULT 0,
+    donation_count BIGINT NOT NULL DEFAULT 0,
+    last_donation_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION creator_totals_apply() RETURNS trigger AS $$
+BEGIN
+    -- Retire l'ancienne contribution...
+    IF TG_OP = 'UPDATE' AND OLD.statut = 'SUCCESS' THEN
+        UPDATE creator_totals
+           SET gross = gross - OLD.montant_brut,
+               fees = fees - OLD.platform_fee,
+               donation_count = donation_count - 1,
+               updated_at = CURRENT_TIMESTAMP
+         WHERE recipient_id = OLD.recipient_id;
+    END IF;
+
+    -- ...puis ajoute la nouvelle, dans la même transaction que le don
+    IF NEW.statut = 'SUCCESS' THEN
+        INSERT INTO creator_totals AS t (recipient_id, gross, fees, donation_count, last_donation_at)
+        VALUES (NEW.recipient_id, NEW.montant_brut, NEW.platform_fee, 1, NEW.created_at)
+        ON CONFLICT (recipient_id) DO UPDATE
+           SET gross = t.gross + EXCLUDED.gross,
+               fees = t.fees + EXCLUDED.fees,
+               donation_count = t.donation_count + 1,
+               last_donation_at = GREATEST(t.last_donation_at, EXCLUDED.last_donation_at),
+               updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_creator_totals ON transactions_jakob;
+CREATE TRIGGER trg_creator_totals
+    AFTER INSERT OR UPDATE OF statut, montant_brut, platform_fee, recipient_id
+    ON transactions_jakob
+    FOR EACH ROW EXECUTE FUNCTION creator_totals_apply();
+
+-- DONNEES DE TEST
+INSERT INTO users (username, telephone, is_creator) 
+VALUES ('megantheestallion', '50900000000', TRUE)
+ON CONFLICT DO NOTHING;
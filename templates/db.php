@@ -0,0 +1,20 @@
+<?php
+// db.php
+// Configuration sécurisée de la base de données
+$host = '{{ db_host }}';
+$db   = '{{ db_name }}';
+$user = '{{ db_user }}'; 
+$pass = '{{ db_password }}'; // <--- CHANGE CECI
+$port = "{{ db_port }}";
+
+try {
+    $pdo = new PDO("pgsql:host=$host;port=$port;dbname=$db", $user, $pass, [
+        PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+        PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC
+    ]);
+} catch (\PDOException $e) {
+    http_response_code(500);
+    // En prod : error_log($e->getMessage());
+    die(json_encode(["error" => "Erreur de connexion BDD. Vérifiez db.php"]));
+}
+?>
\ No newline at end of file
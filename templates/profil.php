@@ -0,0 +1,125 @@
+<?php
+require_once 'timing.php';
+$id = $_GET['id'] ?? 1; // ID par défaut
+
+// Instantané statique généré par prerender-profiles.py : aucune requête BDD
+$snapshot = __DIR__ . '/profiles/' . $id . '.html';
+if (ctype_digit((string) $id) && is_file($snapshot)) {
+    readfile($snapshot);
+    exit;
+}
+
+timing_start('connect');
+require_once 'db.php';
+timing_stop('connect');
+
+try {
+    timing_start('user_select');
+    $stmt = $pdo->prepare("SELECT id, username, prenom, nom FROM users WHERE id = ?");
+    $stmt->execute([$id]);
+    $user = $stmt->fetch();
+    timing_stop('user_select');
+    
+    // Fallback si user non trouvé (pour éviter crash démo)
+    if (!$user) { 
+        $user = ['id' => 0, 'username' => 'Inconnu', 'prenom' => '', 'nom' => '']; 
+        $displayName = "Utilisateur Introuvable";
+    } else {
+        $displayName = $user['username'] ? "@" . $user['username'] : $user['prenom'];
+    }
+} catch (Exception $e) { die("Erreur système"); }
+
+// Avatar local : fichier pré-généré par avatars.py, sinon rendu par avatar.php
+$avatarKey = substr(sha1(mb_strtolower(trim($displayName), 'UTF-8')), 0, 16);
+$avatarUrl = file_exists(__DIR__ . "/avatars/$avatarKey.svg")
+    ? "avatars/$avatarKey.svg"
+    : "avatar.php?name=" . urlencode($displayName);
+?>
+<!DOCTYPE html>
+<html lang="fr">
+<head>
+  <meta charset="UTF-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <title>Profil de <?php echo htmlspecialchars($displayName); ?></title>
+  <link rel="stylesheet" href="style.css" />
+</head>
+<body>
+  <header class="header">
+    <div class="logo-container">
+      <img src="logo.svg" alt="Logo" class="logo" />
+      <h1 class="site-title">{{ site_name }}</h1>
+    </div>
+    <button class="menu-button" onclick="window.location.href='menu.html'">&#9776;</button>
+  </header>
+
+  <main>
+    <div class="orbit-container">
+      <img src="<?php echo htmlspecialchars($avatarUrl); ?>" alt="Profil" class="profile-pic" />
+    </div>
+
+    <div class="profile-container">
+      <h3 class="profile-name"><?php echo htmlspecialchars($displayName); ?></h3>
+      <p class="profile-bio">Merci pour votre soutien ! 🙏🏽</p>
+
+      <div id="donationMsg" class="alert" style="display:none;"></div>
+      <input type="hidden" id="createurId" value="<?php echo $user['id']; ?>">
+
+      <div class="amount-section">
+        <input type="number" id="customAmount" placeholder="Montant (Gourdes)" class="input-phone" min="50" />
+        
+        <select id="canalSelect" class="input-phone" style="margin-top:5px; background:white;">
+            <option value="" disabled selected>Choisir Paiement</option>
+            <option value="MONCASH">MonCash</option>
+            <option value="NATCASH">NatCash</option>
+        </select>
+
+        <div class="suggested-amounts">
+           <button onclick="document.getElementById('customAmount').value=100">100 G</button>
+           <button onclick="document.getElementById('customAmount').value=250">250 G</button>
+           <button onclick="document.getElementById('customAmount').value=500">500 G</button>
+           <button onclick="document.getElementById('customAmount').value=1000">1000 G</button>
+        </div>
+        
+        <button id="btnPay" class="validate-button" onclick="processDonation()">ENVOYER LE DON</button>
+      </div>
+    </div>
+  </main>
+
+  <script>
+    const idempotencyKey = 'uuid-' + Date.now() + '-' + Math.random().toString(36).substr(2, 9);
+
+    async function processDonation() {
+        const amount = document.getElementById('customAmount').value;
+        const canal = document.getElementById('canalSelect').value;
+        const btn = document.getElementById('btnPay');
+        const msg = document.getElementById('donationMsg');
+
+        if(amount < 50) { alert("Minimum 50 Gourdes"); return; }
+        if(!canal) { alert("Choisissez MonCash ou NatCash"); return; }
+
+        btn.disabled = true; btn.innerText = "Traitement..."; msg.style.display = 'none';
+
+        try {
+            const res = await fetch('api/don.php', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({
+                    createurId: document.getElementById('createurId').value,
+                    montant: amount,
+                    canal: canal,
+                    idempotencyKey: idempotencyKey
+                })
+            });
+            const data = await res.json();
+            if(!res.ok) throw new Error(data.error || "Erreur");
+
+            window.location.href = data.payment_url; 
+
+        } catch(e) {
+            msg.className = "alert error"; msg.innerText = "❌ " + e.message; msg.style.display = 'block';
+            btn.disabled = false; btn.innerText = "ENVOYER";
+        }
+    }
+  </script>
+</body>
+</html>
\ No newline at end of file
@@ -0,0 +1,7 @@
+<?php
+// timing.php : chronométrage désactivé (deux fonctions vides).
+// installer.py --timing remplace ce fichier par la version instrumentée :
+// en-tête Server-Timing + journal JSON lu par analyze-timing.py.
+function timing_start($phase) {}
+function timing_stop($phase) {}
+?>
@@ -0,0 +1,157 @@
+"""Fast .gitignore-aware file walker shared by the build tools
+
+Uses os.scandir, so file types and stat results come from the directory
+read itself, never descends into .git, and prunes ignored directories
+instead of filtering their contents afterwards. Supports the usual
+.gitignore syntax: comments, !negation, trailing / for directories,
+leading or inner / for anchoring, *, ?, [...] and **. Nested .gitignore
+files and .git/info/exclude are honoured; the global excludes file is not.
+"""
+
+import os
+import re
+
+# Never walked, ignored or not
+ALWAYS_SKIP = {'.git'}
+
+
+def _translate(pattern):
+    """Glob pattern (already stripped of !, / and anchors) -> regex source"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == n:
+            out.append('/.*')
+            i += 3
+            continue
+        if c == '*':
+            out.append('[^/]*')
+            while i + 1 < n and pattern[i + 1] == '*':  # a stray ** is a plain *
+                i += 1
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def compile_pattern(line):
+    """One .gitignore line -> (regex, negate, dir_only), or None for blanks and comments"""
+    line = line.rstrip('\n').rstrip('\r')
+    if not line.endswith('\\ '):
+        line = line.rstrip()
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\'):  # \# and \! are literals
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    anchored = '/' in line
+    regex = _translate(line.lstrip('/'))
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return re.compile(regex + r'\Z'), negate, dir_only
+
+
+class GitIgnore:
+    """Rules in effect for one directory; the last matching rule wins"""
+
+    def __init__(self, rules=()):
+        self.rules = tuple(rules)  # (base, regex, negate, dir_only)
+
+    @classmethod
+    def load(cls, root):
+        """Rules for the walk root: .git/info/exclude plus root/.gitignore"""
+        rules = []
+        for path in (os.path.join(root, '.git', 'info', 'exclude'), os.path.join(root, '.gitignore')):
+            rules += cls._read(path, '')
+        return cls(rules)
+
+    @staticmethod
+    def _read(path, base):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        return [(base, *compiled) for compiled in map(compile_pattern, lines) if compiled]
+
+    def child(self, directory, rel_dir):
+        """Rules for a subdirectory, adding its own .gitignore if it has one"""
+        extra = self._read(os.path.join(directory, '.gitignore'), rel_dir)
+        return GitIgnore(self.rules + tuple(extra)) if extra else self
+
+    def ignored(self, rel_path, is_dir=False):
+        result = False
+        for base, regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + '/'):
+                    continue
+                path = rel_path[len(base) + 1:]
+            else:
+                path = rel_path
+            if regex.match(path):
+                result = not negate
+        return result
+
+
+def walk_files(root, suffixes=None, use_gitignore=True):
+    """Yield (relative posix path, os.DirEntry) for every file under root
+
+    suffixes is an optional tuple of lower-case endings, e.g. ('.html',).
+    Symlinked directories are not followed.
+    """
+    root = os.fspath(root)
+    stack = [('', root, GitIgnore.load(root) if use_gitignore else GitIgnore())]
+    while stack:
+        rel_dir, directory, ignore = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if name in ALWAYS_SKIP or ignore.ignored(rel, True):
+                            continue
+                        child = ignore.child(entry.path, rel) if use_gitignore else ignore
+                        stack.append((rel, entry.path, child))
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                if suffixes and not name.lower().endswith(suffixes):
+                    continue
+                if ignore.ignored(rel):
+                    continue
+                yield rel, entry